@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# The GeoTag-X project builder's benchmark suite.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+def main(argv):
+	exitval = 0
+	try:
+		import os, shutil, tempfile
+		from src._argparse import CustomArgumentParser, CustomHelpFormatter
+		from src import benchmark
+
+		defaults = benchmark.DEFAULT_PARAMETERS
+		parser = CustomArgumentParser(
+			description="measures the performance of the project builder on synthetic projects, and compares it to a baseline.",
+			formatter_class=CustomHelpFormatter,
+			add_help=False
+		)
+		parser.add_argument("-b", "--baseline",  metavar="FILE", help="compares the results to the baseline stored in FILE, and fails if any benchmark is slower than its baseline by more than the regression threshold.")
+		parser.add_argument("--benchmark",       action="append", metavar="NAME", help="only runs the benchmark with the specified NAME. This option may be repeated. The benchmarks are 'project', 'questionnaire', 'validate' (which validates 10000 questions in bulk), 'write', 'write-compress', 'fleet', 'fleet-compress', as well as 'startup-help', 'startup-summarize' and 'startup-check', which measure the time it takes to run the project builder with the '--help', '--summarize' and '--check' options respectively.")
+		parser.add_argument("--depth",           type=int, default=defaults["depth"], metavar="N", help="sets the depth of each synthetic project's conditional branches. The default is {}.".format(defaults["depth"]))
+		parser.add_argument("-h", "--help",      action="help", help="prints this help message and exits.")
+		parser.add_argument("--help-files",      type=int, default=defaults["helpfiles"], metavar="N", help="sets the number of help files in each synthetic project. The default is {}.".format(defaults["helpfiles"]))
+		parser.add_argument("-j", "--jobs",      type=int, default=defaults["jobs"], metavar="N", help="builds the fleet of synthetic projects with N worker processes. The default is {}.".format(defaults["jobs"]))
+		parser.add_argument("--js-size",         type=int, default=defaults["jssize"], metavar="BYTES", help="sets the size of each synthetic project's project.js file. The default is {} bytes.".format(defaults["jssize"]))
+		parser.add_argument("--projects",        type=int, default=defaults["projects"], metavar="N", help="sets the number of synthetic projects in the fleet. The default is {}.".format(defaults["projects"]))
+		parser.add_argument("--questions",       type=int, default=defaults["questions"], metavar="N", help="sets the number of questions in each synthetic project. The default is {}.".format(defaults["questions"]))
+		parser.add_argument("-r", "--repeat",    type=int, default=defaults["repeat"], metavar="N", help="runs each benchmark N times and keeps the best time. The default is {}.".format(defaults["repeat"]))
+		parser.add_argument("--save",            action="store_true", help="writes the results to the baseline file specified with the '-b' or '--baseline' option, keeping its regression thresholds.")
+		parser.add_argument("-t", "--theme",     nargs=1, metavar="THEME", help="sets the path to the theme used by the benchmarks. By default, a synthetic theme is generated.")
+		parser.add_argument("--threshold",       type=float, default=benchmark.DEFAULT_THRESHOLD * 100, metavar="PERCENT", help="sets the default regression threshold, i.e. how much slower than its baseline a benchmark may be. Thresholds for specific benchmarks may be set in the baseline file's 'thresholds' dictionary. The default is {:.0f}%%.".format(benchmark.DEFAULT_THRESHOLD * 100))
+		parser.add_argument("--tutorial",        type=int, default=defaults["tutorial"], metavar="N", help="sets the number of tutorial entries in each synthetic project. The default is {}.".format(defaults["tutorial"]))
+		parser.add_argument("--types",           metavar="TYPES", help="sets the mix of question types in the synthetic projects, as a comma-separated list of TYPE:WEIGHT pairs, e.g. 'binary:3,select:1'. By default, every type is used.")
+
+		args = parser.parse_args(argv[1:])
+		if args.save and args.baseline is None:
+			raise Exception("Error! The '--save' option requires a baseline file.")
+
+		parameters = {
+			"questions":args.questions,
+			"depth":args.depth,
+			"tutorial":args.tutorial,
+			"helpfiles":args.help_files,
+			"jssize":args.js_size,
+			"projects":args.projects,
+			"jobs":args.jobs,
+			"repeat":args.repeat,
+		}
+		if args.types is not None:
+			parameters["types"] = {t:int(w) for t, w in [pair.split(":") for pair in args.types.split(",")]}
+
+		workdir = tempfile.mkdtemp(prefix="geotagx-benchmark-")
+		try:
+			results, memory = benchmark.run(workdir, parameters, None if args.theme is None else args.theme[0], args.benchmark)
+		finally:
+			shutil.rmtree(workdir, ignore_errors=True)
+
+		baseline = None if args.baseline is None else benchmark.loadbaseline(args.baseline)
+		if baseline is not None and baseline.get("parameters") != parameters:
+			print "Warning! The baseline was obtained with different parameters, so the results may not be comparable."
+
+		comparison = benchmark.compare(results, baseline or {}, args.threshold / 100.0)
+		print benchmark.summarize(comparison)
+		print "Memory: {} bytes per question".format(memory)
+
+		if args.save:
+			benchmark.savebaseline(args.baseline, results, parameters, None if baseline is None else baseline.get("thresholds"))
+			print "The results were saved to '{}'.".format(args.baseline)
+		elif any(regressed for _, _, _, _, regressed in comparison):
+			exitval = 1
+
+	except Exception as e:
+		print e
+		exitval = 1
+	finally:
+		sys.exit(exitval)
+
+
+if __name__ == "__main__":
+	import sys
+	main(sys.argv)
@@ -16,11 +16,19 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
-from src.project import Project
+import sys
 
+# Note that modules are imported when the stage that requires them runs, so that
+# printing the usage, summarizing or checking projects does not pay the cost of
+# loading the template engine and minifiers.
 def main(argv):
 	exitval = 0
 	try:
+		# Encode printed unicode strings, e.g. project names, with the locale's
+		# encoding instead of ASCII when the output is redirected.
+		import locale, codecs
+		sys.stdout = codecs.getwriter(locale.getpreferredencoding())(sys.stdout)
+
 		from src._argparse import CustomArgumentParser, CustomHelpFormatter
 
 		parser = CustomArgumentParser(
@@ -29,30 +37,62 @@ def main(argv):
 			add_help=False
 		)
 		parser.add_argument("path", metavar="PATH", nargs='+')
+		parser.add_argument("--asset-dir",       metavar="DIR",       help="writes the theme's asset bundles to DIR, each in a file named after a digest of its content, and references them from the task presenters and tutorials instead of inlining them. Project-specific scripts and stylesheets are still inlined.")
+		parser.add_argument("--asset-url",       metavar="URL", default="", help="sets the URL prefix used to reference the asset bundles written with the '--asset-dir' option, e.g. 'https://cdn.example.com/assets/'.")
+		parser.add_argument("--cache-dir",       metavar="DIR",       help="sets the directory in which parsed configurations, minified project scripts and stylesheets, as well as compiled theme templates, are cached. By default, the user-level cache directory is used.")
+		parser.add_argument("--cache-size",      type=int, metavar="MB", help="limits the size of the minification cache to MB megabytes. When the limit is exceeded, the least recently used entries are evicted. The default limit is 64 MB.")
+		parser.add_argument("--no-cache",        action="store_true", help="disables the configuration, minification and template caches.")
+		parser.add_argument("--precompile",      action="store_true", help="compiles the theme's templates into Python modules that are stored in the cache directory and imported by subsequent builds, instead of using Jinja2's bytecode cache.")
+		parser.add_argument("--changed",         metavar="FILE",      help="writes the paths to the task presenters and tutorials whose content was changed, or that were removed, by the build to FILE, one per line, e.g. for use with rsync's '--files-from' option. Unchanged files are never rewritten, so they keep their modification time.")
+		parser.add_argument("--check",           action="store_true", help="validates the project configurations without building the projects, and prints one JSON object per project that lists every error and warning found. The template engine and minifiers are not loaded, so checking is fast. Use with the '-j' or '--jobs' option to check many projects in parallel.")
 		parser.add_argument("-c", "--compress",  action="store_true", help="compresses the generated files, effectively generating smaller, albeit less readable, task presenters and tutorials.")
-		parser.add_argument("-f", "--force",     action="store_true", help="overwrites any existing task presenter and/or tutorial in the specified directory.")
+		parser.add_argument("-f", "--force",     action="store_true", help="overwrites any existing task presenter and/or tutorial in the specified directory, and rebuilds projects even if their build manifest shows they are up to date.")
 		parser.add_argument("-h", "--help",      action="help",       help="prints this help message and exits.")
-		parser.add_argument("-pm", "--pdf",      action="store_true",       help="prepares a template for analysing PDF files (instead of Image files)")
+		parser.add_argument("-j", "--jobs",      type=int, default=1, metavar="N", help="builds up to N projects in parallel, each in a separate worker process, and prints a summary of every project's build status once all builds have completed.")
+		parser.add_argument("--locales",         metavar="LOCALES",   help="also writes a variant of every task presenter and tutorial for each locale in the comma-separated LOCALES list, e.g. 'fr,es', named after the locale, e.g. template.fr.html. The messages in the theme's templates are translated with the message catalogs (<locale>.po or <locale>.mo) in the 'locales' directory of the theme and of each project, the latter taking precedence. Each project is only parsed, and the theme only compiled, once for all locales.")
+		parser.add_argument("--minify-templates", action="store_true", help="when used with the '-c' or '--compress' flag, minifies the theme's templates once, when they are loaded, instead of minifying every generated task presenter and tutorial. Only the project-specific fragments, such as help, are then minified for each project.")
+		parser.add_argument("--profile",         metavar="FILE",      help="measures the time spent in each stage of every project's build, as well as the peak memory usage, writes a report to FILE with one JSON record per project, and prints a summary of the slowest projects and stages.")
+		parser.add_argument("--profile-top",     type=int, default=10, metavar="N", help="sets the number of projects and stages listed in the summaries printed by the '--profile' and '--sizes' options. The default is 10.")
+		parser.add_argument("-pm", "--pdf",      action="store_true",       help="prepares a template for analysing PDF files (instead of Image files). This is equivalent to '--targets pdf,tutorial'.")
+		parser.add_argument("--sizes",           metavar="FILE",      help="breaks down the size of every task presenter and tutorial that is built by source, i.e. the theme's asset bundles, the project's stylesheet and script, the questions' help, the tutorial and the theme's markup, before and after gzip compression. Writes a report to FILE with one JSON record per project, and prints a summary aggregated across the projects.")
+		parser.add_argument("--size-budget",     action="append", metavar="NAME=KB", help="fails the build if an output (e.g. 'template.html') or source (e.g. 'project.js', 'help', 'bundle:core') is larger than KB kilobytes in any project that is built. This option may be repeated.")
 		parser.add_argument("-s", "--summarize", action="store_true", help="prints a project's overview.")
+		parser.add_argument("--targets",         metavar="TARGETS",   help="renders each of the targets in the comma-separated TARGETS list, i.e. 'image' (a task presenter for analysing image files), 'pdf' (a task presenter for analysing PDF files) and 'tutorial', from a single parse of each project. The first task presenter target is written to template.html and any other to a file named after the target, e.g. template.pdf.html. The default is 'image,tutorial'.")
 		parser.add_argument("-t", "--theme",     nargs=1, metavar="THEME", help="sets the path to a user-defined theme.")
 		parser.add_argument("-v", "--verbose",   action="store_true", help="explains what is being done.")
+		parser.add_argument("-w", "--watch",     action="store_true", help="once the projects are built, watches them and the theme for changes, and rebuilds a project as soon as it is modified, or every project when the theme is modified. The builder remains in memory so that rebuilds are almost instantaneous. Press Ctrl+C to stop.")
 
-		if len(sys.argv) < 2:
+		if len(argv) < 2:
 			parser.print_usage()
 			exitval = 1
+		elif argv[1] in COMMANDS:
+			exitval = COMMANDS[argv[1]]("{} {}".format(argv[0], argv[1]), argv[2:])
 		else:
-			args = parser.parse_args()
+			args = parser.parse_args(argv[1:])
 
 			# Ignore all duplicate paths, including symbolic links.
 			import os
 			args.path = set([os.path.realpath(path) for path in args.path])
 
-			if args.summarize:
+			if args.check:
+				import json
+				from src.checker import Checker
+				from src.scheduler import schedule
+
+				results = schedule(args.path, Checker, ("" if args.no_cache else args.cache_dir,), args.jobs, None)
+				for path, result, error in results:
+					errors, warnings = ([error], []) if error is not None else result
+					print json.dumps({"path":path, "valid":len(errors) < 1, "errors":errors, "warnings":warnings}, sort_keys=True)
+					if len(errors) > 0:
+						exitval = 1
+			elif args.summarize:
+				from src.project import Project
 				for path in args.path:
 					print Project(path)
 			else:
-				from src.theme import Theme
-				from src.htmlwriter import HtmlWriter
+				import functools
+				from src.builder import Builder
+				from src.scheduler import schedule
 
 				# If no path to a custom theme is specified, use the default theme.
 				if args.theme is None:
@@ -60,16 +100,73 @@ def main(argv):
 				else:
 					args.theme = args.theme[0]
 
-				theme = Theme(args.theme)
-				writer = HtmlWriter(theme, args.compress, args.force, args.pdf, args.verbose)
+				budgets = getbudgets(args.size_budget or [])
 
-				for path in args.path:
-					writable, message = writer.iswritabledir(path)
-					if writable:
-						project = Project(path)
-						writer.write(project)
-					else:
-						print message
+				builderkwargs = {
+					"themepath":args.theme,
+					"compress":args.compress,
+					"overwrite":args.force,
+					"pdfmode":args.pdf,
+					"verbose":args.verbose,
+					"cachedir":"" if args.no_cache else args.cache_dir,
+					"cachesize":None if args.cache_size is None else args.cache_size * 1024 * 1024,
+					"precompile":args.precompile,
+					"minifytemplates":args.minify_templates,
+					"assetdir":None if args.asset_dir is None else os.path.realpath(args.asset_dir),
+					"asseturl":args.asset_url,
+					"profile":args.profile is not None,
+					"measure":args.sizes is not None or args.size_budget is not None,
+					"locales":getlocales(args.locales),
+					"targets":gettargets(args.targets, args.pdf)
+				}
+				results = schedule(args.path, functools.partial(Builder, **builderkwargs), (), args.jobs)
+				if args.jobs > 1 or args.verbose:
+					print Builder.summarize(results)
+				else:
+					for path, result, error in results:
+						if error is not None:
+							print error
+						elif result[1] is not None:
+							print result[1]
+
+				if args.profile is not None:
+					from src import profiler
+
+					records = [result[2] for _, result, _ in results if result is not None and result[2] is not None]
+					profiler.writereport(records, args.profile)
+					print profiler.summarize(records, args.profile_top)
+
+				if args.changed is not None:
+					with open(args.changed, "w") as file:
+						for _, result, _ in results:
+							if result is not None:
+								file.write("".join([f + "\n" for f in result[4]]))
+
+				if args.sizes is not None or args.size_budget is not None:
+					from src import profiler, sizes
+
+					records = [result[3] for _, result, _ in results if result is not None and result[3] is not None]
+					if args.sizes is not None:
+						profiler.writereport(records, args.sizes)
+						print sizes.summarize(records, args.profile_top)
+
+					messages = sizes.check(records, budgets)
+					if len(messages) > 0:
+						print "\n".join(messages)
+						exitval = 1
+
+				if any(error is not None for _, _, error in results):
+					exitval = 1
+
+				if args.watch:
+					from src.watcher import watch
+
+					# Once the projects are built, only changes need to be rebuilt so
+					# up-to-date projects are skipped, although existing outputs may
+					# still be overwritten if the overwrite flag is set. Rebuilds are
+					# neither profiled nor measured.
+					print "Watching {} project(s) for changes. Press Ctrl+C to stop.".format(len(args.path))
+					watch(args.path, args.theme, functools.partial(Builder, **dict(builderkwargs, rebuild=False, profile=False, measure=False)), ())
 
 	except Exception as e:
 		print e
@@ -78,6 +175,198 @@ def main(argv):
 		sys.exit(exitval)
 
 
+def getbudgets(specifications):
+	"""getbudgets(specifications:list)
+	Returns a dictionary that maps the name of an output or source to its size
+	budget in bytes, given a list of NAME=KB specifications.
+	"""
+	budgets = {}
+	for specification in specifications:
+		name, separator, size = specification.rpartition("=")
+		try:
+			budgets[name.strip()] = int(float(size) * 1024)
+		except ValueError:
+			separator = None
+
+		if not separator or not name.strip():
+			raise Exception("Error! The size budget '{}' is not of the form NAME=KB.".format(specification))
+
+	return budgets
+
+
+def getlocales(specification):
+	"""getlocales(specification:string)
+	Returns the list of locales in the specified comma-separated list, or None
+	if no list is specified.
+	"""
+	import re
+
+	if specification is None:
+		return None
+
+	locales = []
+	for locale in [l.strip() for l in specification.split(",") if len(l.strip()) > 0]:
+		if re.match(r"[A-Za-z]{2,3}([_-][A-Za-z0-9]+)*\Z", locale) is None:
+			raise Exception("Error! The string '{}' is not a valid locale.".format(locale))
+		elif locale not in locales:
+			locales.append(locale)
+
+	return locales
+
+
+def gettargets(specification, pdfmode=False):
+	"""gettargets(specification:string, pdfmode:bool)
+	Returns the list of render targets in the specified comma-separated list,
+	or None if no list is specified, in which case the targets are selected by
+	the specified pdfmode flag.
+	"""
+	if specification is None:
+		return None
+	elif pdfmode:
+		raise Exception("Error! The '--pdf' and '--targets' options can not be used together. Use the 'pdf' target instead.")
+
+	targets = []
+	for target in [t.strip() for t in specification.split(",") if len(t.strip()) > 0]:
+		if target not in targets:
+			targets.append(target)
+
+	if len(targets) < 1:
+		raise Exception("Error! At least one render target is required.")
+
+	return targets
+
+
+def importtasks(prog, argv):
+	"""importtasks(prog:string, argv:list)
+	Runs the import-tasks command with the specified arguments, and returns its
+	exit status.
+	"""
+	import os
+	from src._argparse import CustomArgumentParser, CustomHelpFormatter
+	from src import importer
+
+	parser = CustomArgumentParser(
+		prog=prog,
+		description="creates a task in a PyBossa project for each row of the specified CSV or JSON file.",
+		formatter_class=CustomHelpFormatter,
+		add_help=False
+	)
+	parser.add_argument("path", metavar="PATH", nargs=1)
+	parser.add_argument("--api-key",        metavar="KEY", default=os.environ.get("PYBOSSA_API_KEY"), help="sets the API key used to authenticate with the server. By default, the value of the PYBOSSA_API_KEY environment variable is used.")
+	parser.add_argument("--batch-size",     type=int, default=importer.DEFAULT_BATCH_SIZE, metavar="N", help="saves the checkpoint every N rows. The default is {}.".format(importer.DEFAULT_BATCH_SIZE))
+	parser.add_argument("--checkpoint",     metavar="FILE", help="records the rows that were imported in FILE, so that an interrupted import is resumed, without creating any task twice, when the command is run again. The default is PATH.checkpoint.")
+	parser.add_argument("-h", "--help",     action="help", help="prints this help message and exits.")
+	parser.add_argument("-j", "--jobs",     type=int, default=4, metavar="N", help="sends up to N requests at a time over as many keep-alive connections. The default is 4.")
+	parser.add_argument("-p", "--project",  required=True, metavar="SLUG", help="sets the short name of the project the tasks are created in.")
+	parser.add_argument("--retries",        type=int, default=5, metavar="N", help="sends a request that fails because the server could not be reached, or is rate-limiting or unavailable, up to N more times, waiting twice as long before each attempt. A request whose response times out, or fails with any other server error, may have created its task and is therefore never sent again: its row is reported as uncertain. The default is 5.")
+	parser.add_argument("-s", "--server",   required=True, metavar="URL", help="sets the URL of the PyBossa server, e.g. 'https://geotagx.org'.")
+	parser.add_argument("-v", "--verbose",  action="store_true", help="prints the import's progress after every batch.")
+
+	args = parser.parse_args(argv)
+
+	from src.client import Client
+	client = Client(args.server, args.api_key, args.jobs, args.retries)
+	try:
+		imported, skipped, uncertain = importer.importtasks(client, args.project, args.path[0], args.checkpoint, args.batch_size, args.jobs, args.verbose)
+	finally:
+		client.close()
+
+	print "Created {} task(s) in the project '{}', and skipped {} row(s) that were already imported.".format(imported, args.project, skipped)
+	if len(uncertain) > 0:
+		print "Warning! The requests for the row(s) {} failed in a way that does not show whether their tasks were created, so they were not sent again. Check them on the server: they are listed under 'uncertain' in the checkpoint file.".format(", ".join(str(row) for row in uncertain))
+		return 1
+
+	return 0
+
+
+def synchronize(prog, argv):
+	"""synchronize(prog:string, argv:list)
+	Runs the sync command with the specified arguments, and returns its exit
+	status.
+	"""
+	import os
+	from src._argparse import CustomArgumentParser, CustomHelpFormatter
+	from src import sync
+
+	parser = CustomArgumentParser(
+		prog=prog,
+		description="uploads the task presenter, tutorial, name, description and reason of the built projects located in the specified directories to their counterparts on a PyBossa server, if they changed since they were last uploaded.",
+		formatter_class=CustomHelpFormatter,
+		add_help=False
+	)
+	parser.add_argument("path", metavar="PATH", nargs="+")
+	parser.add_argument("--api-key",        metavar="KEY", default=os.environ.get("PYBOSSA_API_KEY"), help="sets the API key used to authenticate with the server. By default, the value of the PYBOSSA_API_KEY environment variable is used.")
+	parser.add_argument("-h", "--help",     action="help", help="prints this help message and exits.")
+	parser.add_argument("-j", "--jobs",     type=int, default=4, metavar="N", help="uploads up to N projects at a time over as many keep-alive connections. The default is 4.")
+	parser.add_argument("-n", "--dry-run",  action="store_true", help="lists the projects that changed since they were last uploaded, and what changed, without uploading anything.")
+	parser.add_argument("--record",         metavar="FILE", default=sync.SyncRecord.FILENAME, help="sets the file that records the digests of what was last uploaded to each server for each project. The default is '{}' in the current directory.".format(sync.SyncRecord.FILENAME))
+	parser.add_argument("--retries",        type=int, default=5, metavar="N", help="sends a request that fails because of a connection error or a server error up to N more times, waiting twice as long before each attempt. The default is 5.")
+	parser.add_argument("-s", "--server",   required=True, metavar="URL", help="sets the URL of the PyBossa server, e.g. 'https://geotagx.org'.")
+
+	args = parser.parse_args(argv)
+	paths = [os.path.realpath(path) for path in args.path]
+
+	from src.client import Client
+	client = Client(args.server, args.api_key, args.jobs, args.retries)
+	try:
+		results = sync.sync(client, paths, sync.SyncRecord(args.record, client.endpoint), args.jobs, args.dry_run)
+	finally:
+		client.close()
+
+	print sync.summarize(results, args.dry_run)
+	return 1 if any(error is not None for _, _, _, error in results) else 0
+
+
+def aggregate(prog, argv):
+	"""aggregate(prog:string, argv:list)
+	Runs the aggregate command with the specified arguments, and returns its
+	exit status.
+	"""
+	from src._argparse import CustomArgumentParser, CustomHelpFormatter
+
+	parser = CustomArgumentParser(
+		prog=prog,
+		description="aggregates the answers of the task runs in the specified CSV or JSON exports for each task, based on the questionnaire of the project located in the specified directory.",
+		formatter_class=CustomHelpFormatter,
+		add_help=False
+	)
+	parser.add_argument("path", metavar="PATH", nargs="+")
+	parser.add_argument("--sorted",         action="store_true", help="aggregates the task runs in a single pass, which requires them to be sorted by task. Otherwise, they are first sorted through temporary files. In both cases, the memory used does not depend on the size of the exports.")
+	parser.add_argument("-h", "--help",     action="help", help="prints this help message and exits.")
+	parser.add_argument("-o", "--output",   metavar="FILE", help="writes the results to FILE, one JSON object per task, instead of the standard output.")
+
+	args = parser.parse_args(argv)
+	if len(args.path) < 2:
+		raise Exception("Error! The aggregate command requires a project directory, followed by one or more task run exports.")
+
+	import itertools
+	from src.project import Project
+	from src.rows import readrows
+	from src import aggregator
+
+	questionnaire = Project(args.path[0]).questionnaire
+	taskruns = itertools.chain.from_iterable(readrows(filepath) for filepath in args.path[1:])
+	if not args.sorted:
+		taskruns = aggregator.sortbytask(taskruns)
+
+	if args.output is None:
+		tasks, runs = aggregator.aggregate(questionnaire, taskruns, sys.stdout)
+	else:
+		with open(args.output, "w") as output:
+			tasks, runs = aggregator.aggregate(questionnaire, taskruns, output)
+		print "Aggregated {} task run(s) of {} task(s).".format(runs, tasks)
+
+	return 0
+
+
+# The commands that the builder runs instead of building projects, when their
+# name is the first argument, e.g. 'build.py import-tasks'.
+COMMANDS = {
+	"aggregate":aggregate,
+	"import-tasks":importtasks,
+	"sync":synchronize
+}
+
+
 if __name__ == "__main__":
-	import sys
 	main(sys.argv)
@@ -0,0 +1,319 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import json, math
+
+class Vote:
+	counts    = None
+	spellings = None
+
+
+	def __init__(self):
+		"""__init__()
+		Instantiates a Vote object that finds the answer given by the majority
+		of volunteers to a question with a single answer, e.g. a binary question.
+		"""
+		self.counts    = {}
+		self.spellings = {}
+
+
+	def add(self, answer):
+		"""add(answer:object)
+		Counts the specified answer. Answers are compared case-insensitively,
+		and reported as they were first spelled. Empty answers are ignored.
+		"""
+		if not isinstance(answer, basestring):
+			answer = json.dumps(answer, sort_keys=True) if isinstance(answer, (list, dict)) else unicode(answer)
+
+		answer = answer.strip()
+		if len(answer) > 0:
+			key = answer.lower()
+			self.counts[key] = self.counts.get(key, 0) + 1
+			self.spellings.setdefault(key, answer)
+
+
+	def getresult(self):
+		"""getresult()
+		Returns the majority answer, or None if no answer has more votes than
+		every other, the number of votes it received as a fraction of all votes
+		(i.e. the agreement), as well as the number of votes for each answer.
+		"""
+		total = sum(self.counts.itervalues())
+		ranking = sorted(self.counts.iteritems(), key=lambda c: c[1], reverse=True)
+		if len(ranking) < 1 or (len(ranking) > 1 and ranking[0][1] == ranking[1][1]):
+			answer = None
+		else:
+			answer = ranking[0][0]
+
+		return {
+			"answer":None if answer is None else self.spellings[answer],
+			"agreement":None if answer is None else self.counts[answer] / float(total),
+			"count":total,
+			"votes":{self.spellings[key]:count for key, count in self.counts.iteritems()}
+		}
+
+
+class Tally:
+	count  = 0
+	counts = None
+
+
+	def __init__(self):
+		"""__init__()
+		Instantiates a Tally object that counts how many volunteers selected
+		each option of a question with several answers, e.g. a checklist.
+		"""
+		self.counts = {}
+
+
+	def add(self, answer):
+		"""add(answer:object)
+		Counts each of the options in the specified answer, i.e. a list of
+		options or a string of comma-separated options.
+		"""
+		if isinstance(answer, basestring):
+			answer = answer.split(",")
+		elif not isinstance(answer, list):
+			return
+
+		self.count += 1
+		for option in set(unicode(o).strip() for o in answer if o is not None):
+			if len(option) > 0:
+				self.counts[option] = self.counts.get(option, 0) + 1
+
+
+	def getresult(self):
+		"""getresult()
+		Returns the number of answers, and the number of times each option was
+		selected.
+		"""
+		return {
+			"count":self.count,
+			"options":self.counts
+		}
+
+
+class Statistics:
+	count   = 0
+	mean    = 0.0
+	squares = 0.0
+	minimum = None
+	maximum = None
+
+
+	def add(self, answer):
+		"""add(answer:object)
+		Adds the specified answer, i.e. a number or a string that contains a
+		number, to the statistics. Answers that are not numbers are ignored. The
+		mean and variance are updated with Welford's method, which is
+		numerically stable and keeps no answer in memory.
+		"""
+		if isinstance(answer, bool):
+			return
+		try:
+			value = float(answer)
+		except (TypeError, ValueError):
+			return
+		if math.isnan(value) or math.isinf(value):
+			return
+
+		self.count += 1
+		delta = value - self.mean
+		self.mean += delta / self.count
+		self.squares += delta * (value - self.mean)
+		self.minimum = value if self.minimum is None else min(self.minimum, value)
+		self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+
+	def getresult(self):
+		"""getresult()
+		Returns the number of answers, as well as their mean, standard deviation,
+		minimum and maximum, or None if there are no answers.
+		"""
+		return {
+			"count":self.count,
+			"mean":self.mean if self.count > 0 else None,
+			"stddev":math.sqrt(self.squares / self.count) if self.count > 0 else None,
+			"min":self.minimum,
+			"max":self.maximum
+		}
+
+
+# The maximum number of task runs that sortbytask keeps in memory.
+BUFFER_SIZE = 100000
+
+# The aggregate computed for each question type. Answers to questions of other
+# types, e.g. text or geotagging, are not aggregated.
+AGGREGATES = {
+	"binary":Vote,
+	"select":Vote,
+	"dropdown-list":Vote,
+	"checklist":Tally,
+	"illustrative-checklist":Tally,
+	"number":Statistics
+}
+
+class Aggregator:
+	types   = None
+	taskid  = None
+	runs    = 0
+	results = None
+
+
+	def __init__(self, types, taskid):
+		"""__init__(types:dict, taskid:object)
+		Instantiates an Aggregator object that aggregates the answers of the
+		task runs of the task with the specified identifier, given a dictionary
+		that maps the key of each question to aggregate to its type.
+		"""
+		self.types   = types
+		self.taskid  = taskid
+		self.results = {key:AGGREGATES[type]() for key, type in types.iteritems()}
+
+
+	def add(self, answers):
+		"""add(answers:dict)
+		Adds the specified answers of a task run, i.e. a dictionary that maps a
+		question key to its answer. Questions that were not answered, e.g.
+		because of a conditional branch, are ignored.
+		"""
+		self.runs += 1
+		for key, result in self.results.iteritems():
+			answer = answers.get(key)
+			if answer is not None:
+				result.add(answer)
+
+
+	def getresult(self):
+		"""getresult()
+		Returns the task's aggregated answers, in the form of a dictionary.
+		"""
+		return {
+			"task_id":self.taskid,
+			"runs":self.runs,
+			"answers":{key:result.getresult() for key, result in self.results.iteritems()}
+		}
+
+
+def gettypes(questionnaire):
+	"""gettypes(questionnaire:Questionnaire)
+	Returns a dictionary that maps the key of each question in the specified
+	questionnaire whose answers are aggregated to the question's type.
+	"""
+	return {key:question.type for key, question in questionnaire.questions.iteritems() if question.type in AGGREGATES}
+
+
+def getanswers(taskrun):
+	"""getanswers(taskrun:dict)
+	Returns the answers stored in the specified task run, i.e. its info, which
+	a CSV export stores as a JSON string. If the task run has no info, its other
+	fields are considered to be the answers.
+	"""
+	answers = taskrun.get("info", taskrun)
+	if isinstance(answers, basestring):
+		try:
+			answers = json.loads(answers)
+		except ValueError:
+			answers = None
+
+	return answers if isinstance(answers, dict) else {}
+
+
+def gettaskid(taskrun):
+	"""gettaskid(taskrun:dict)
+	Returns the identifier of the task the specified task run belongs to, or
+	None if it has none. Numeric identifiers, which a CSV export stores as
+	strings, are converted to integers so that they are sorted and compared
+	the same way regardless of the export's format.
+	"""
+	taskid = taskrun.get("task_id")
+	if isinstance(taskid, basestring) and taskid.strip().isdigit():
+		return int(taskid)
+	return taskid
+
+
+def aggregate(questionnaire, taskruns, output):
+	"""aggregate(questionnaire:Questionnaire, taskruns:iterable, output:file)
+	Aggregates the answers of the specified task runs for each task, based on
+	the type of each question in the specified questionnaire, and writes one
+	JSON object per task to the specified output. Returns the number of tasks
+	and task runs. The task runs must be sorted by task identifier (see
+	sortbytask): they are read one at a time, and each task is written as soon
+	as its last task run is read, so that only the aggregates of one task are
+	kept in memory. An exception is raised if a task run is out of order.
+	"""
+	types = gettypes(questionnaire)
+	aggregator, tasks, runs = None, 0, 0
+	for taskrun in taskruns:
+		runs += 1
+		taskid = gettaskid(taskrun)
+		if taskid is None:
+			raise Exception("Error! The task run {} has no task_id.".format(runs))
+
+		if aggregator is None or taskid != aggregator.taskid:
+			if aggregator is not None:
+				if taskid < aggregator.taskid:
+					raise Exception("Error! The task runs are not sorted by task: the task {} follows the task {} in the task run {}.".format(taskid, aggregator.taskid, runs))
+				_write(output, aggregator)
+			aggregator = Aggregator(types, taskid)
+			tasks += 1
+		aggregator.add(getanswers(taskrun))
+
+	if aggregator is not None:
+		_write(output, aggregator)
+
+	return (tasks, runs)
+
+
+def sortbytask(taskruns, buffersize=BUFFER_SIZE):
+	"""sortbytask(taskruns:iterable, buffersize:int)
+	Returns a generator that yields the specified task runs sorted by task
+	identifier, and in their original order for each task. At most the
+	specified number of task runs are kept in memory: larger inputs are
+	sorted in runs that are written to temporary files, and then merged.
+	"""
+	import heapq, tempfile
+
+	files, buffer = [], []
+	try:
+		for index, taskrun in enumerate(taskruns):
+			taskid = gettaskid(taskrun)
+			if taskid is None:
+				raise Exception("Error! The task run {} has no task_id.".format(index + 1))
+
+			buffer.append((taskid, index, taskrun))
+			if len(buffer) >= buffersize:
+				buffer.sort()
+				file = tempfile.TemporaryFile()
+				file.writelines(json.dumps(entry) + "\n" for entry in buffer)
+				file.seek(0)
+				files.append(file)
+				buffer = []
+
+		buffer.sort()
+		sources = [(tuple(json.loads(line)) for line in file) for file in files] + [iter(buffer)]
+		for _, _, taskrun in heapq.merge(*sources):
+			yield taskrun
+	finally:
+		for file in files:
+			file.close()
+
+
+def _write(output, aggregator):
+	"""_write(output:file, aggregator:Aggregator)
+	Writes the specified task's aggregated answers to the specified output.
+	Keys are not sorted, since sorting them disables json's C encoder.
+	"""
+	output.write(json.dumps(aggregator.getresult()) + "\n")
@@ -0,0 +1,122 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os
+
+class AtomicFile:
+	filepath = None
+	temppath = None
+	file     = None
+	digest   = None
+	size     = 0
+	changed  = None
+
+
+	def __init__(self, filepath):
+		"""__init__(filepath:string)
+		Instantiates an AtomicFile object that writes to a temporary file in
+		the directory of the file located at the specified path. When the
+		AtomicFile is closed, the temporary file replaces the file, which means
+		readers never see a partially written file, but only if their contents
+		differ. An unchanged file therefore keeps its modification time.
+		"""
+		import hashlib, tempfile
+
+		self.filepath = filepath
+		descriptor, self.temppath = tempfile.mkstemp(dir=os.path.dirname(filepath) or ".", prefix=".tmp")
+		self.file   = os.fdopen(descriptor, "wb")
+		self.digest = hashlib.sha1()
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, type, value, traceback):
+		if type is None:
+			self.close()
+		else:
+			self.discard()
+
+
+	def write(self, data):
+		"""write(data:string)
+		Writes the specified bytes to the temporary file.
+		"""
+		self.file.write(data)
+		self.digest.update(data)
+		self.size += len(data)
+
+
+	def close(self):
+		"""close()
+		Closes the temporary file and, if its content differs from the file's,
+		renames it into place. Otherwise, the temporary file is removed. Returns
+		true if the file was replaced, false otherwise.
+		"""
+		self.file.close()
+		self.changed = not self.isidentical()
+		if self.changed:
+			if os.path.isfile(self.filepath):
+				import shutil
+				shutil.copymode(self.filepath, self.temppath)
+			else:
+				os.chmod(self.temppath, 0666 & ~getumask())
+			os.rename(self.temppath, self.filepath)
+		else:
+			os.remove(self.temppath)
+
+		return self.changed
+
+
+	def discard(self):
+		"""discard()
+		Closes and removes the temporary file, leaving the file untouched.
+		"""
+		self.file.close()
+		try:
+			os.remove(self.temppath)
+		except OSError:
+			pass
+
+
+	def isidentical(self):
+		"""isidentical()
+		Returns true if the file exists and has the same content as the
+		temporary file, false otherwise. The file is only hashed if both files
+		have the same size.
+		"""
+		from src.manifest import Manifest
+
+		try:
+			if os.path.getsize(self.filepath) != self.size:
+				return False
+			return Manifest.getdigest([self.filepath]) == self.digest.hexdigest()
+		except (IOError, OSError):
+			return False
+
+
+def getumask():
+	"""getumask()
+	Returns the process' file mode creation mask, as it was when this module
+	was loaded.
+	"""
+	return _umask
+
+
+# The process' file mode creation mask. It can only be read by setting it,
+# which is not thread-safe, so it is read once when the module is loaded.
+_umask = os.umask(0)
+os.umask(_umask)
@@ -0,0 +1,270 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, time
+
+# The version of the baseline file format.
+VERSION = 1
+
+# The default parameters of a benchmark run. The project parameters, as well as
+# an optional 'types' dictionary, are passed to src.synthetic.generate, while
+# 'projects' and 'jobs' describe the fleet.
+DEFAULT_PARAMETERS = {
+	"questions":40,
+	"depth":5,
+	"tutorial":10,
+	"helpfiles":10,
+	"jssize":8192,
+	"projects":20,
+	"jobs":1,
+	"repeat":5,
+}
+
+# The number of question configurations validated in bulk by the 'validate'
+# benchmark, whose time therefore measures the validation throughput.
+VALIDATION_SIZE = 10000
+
+# The default relative slowdown past which a benchmark is considered to have
+# regressed, e.g. 0.25 means a benchmark may be at most 25% slower than its
+# baseline.
+DEFAULT_THRESHOLD = 0.25
+
+
+def run(workdir, parameters=None, themepath=None, benchmarks=None):
+	"""run(workdir:string, parameters:dict, themepath:string, benchmarks:list)
+	Runs the benchmarks with the specified names, or all of them if no names
+	are specified, and returns a (results, memory) tuple where the results map
+	each benchmark's name to its best time in seconds over the configured
+	number of repetitions, and the memory is the number of bytes used by each
+	question of a loaded project. The synthetic projects, as well as a
+	synthetic theme if no theme path is specified, are generated in the
+	specified working directory.
+	"""
+	from src import synthetic, configuration, minifier
+
+	parameters = dict(DEFAULT_PARAMETERS, **(parameters or {}))
+	projectparameters = {k:parameters.get(k) for k in ["questions", "types", "depth", "tutorial", "helpfiles", "jssize"]}
+
+	# Caches are disabled since they would hide the cost of the work measured.
+	configuration.setcache(None)
+	minifier.setcache(None)
+
+	if themepath is None:
+		themepath = synthetic.generatetheme(os.path.join(workdir, "theme"))
+
+	project = synthetic.generate(os.path.join(workdir, "project"), **projectparameters)
+	fleet = [synthetic.generate(os.path.join(workdir, "fleet", "{:04d}".format(i)), seed=i, **projectparameters) for i in range(parameters["projects"])]
+
+	results = {}
+	for name, setup, function in getbenchmarks(project, fleet, themepath, parameters["jobs"]):
+		if benchmarks is None or name in benchmarks:
+			results[name] = measure(setup, function, parameters["repeat"])
+
+	return results, measurememory(project)
+
+
+def getbenchmarks(project, fleet, themepath, jobs):
+	"""getbenchmarks(project:string, fleet:list, themepath:string, jobs:int)
+	Returns a list of (name, setup, function) tuples that describe the
+	benchmarks for the specified project, fleet of projects and theme. The
+	setup function returns the arguments passed to the benchmarked function,
+	and is not timed.
+	"""
+	import copy
+	from src.project import Project
+	from src.questionnaire import Questionnaire
+	from src.question import Question
+	from src.theme import Theme
+	from src.htmlwriter import HtmlWriter
+
+	questions = Project.getconfiguration(project)["questionnaire"]
+	bulk = (questions * (VALIDATION_SIZE // len(questions) + 1))[:VALIDATION_SIZE]
+	theme = Theme(themepath)
+	writer = HtmlWriter(theme, False, True, False, False)
+	compressor = HtmlWriter(theme, True, True, False, False)
+
+	return [
+		("project",           lambda: (project,),                           Project),
+		("questionnaire",     lambda: (copy.deepcopy(questions),),          Questionnaire),
+		("validate",          lambda: (bulk,),                              Question.validate),
+		("write",             lambda: (Project(project),),                  writer.write),
+		("write-compress",    lambda: (Project(project),),                  compressor.write),
+		("fleet",             lambda: (fleet, themepath, False, jobs),      _build),
+		("fleet-compress",    lambda: (fleet, themepath, True, jobs),       _build),
+		("startup-help",      lambda: (["--help"],),                        _start),
+		("startup-summarize", lambda: (["--summarize", project],),          _start),
+		("startup-check",     lambda: (["--check", "--no-cache", project],), _start),
+	]
+
+
+def _build(paths, themepath, compress, jobs):
+	"""_build(paths:list, themepath:string, compress:bool, jobs:int)
+	Builds the projects located at the specified paths, without caching, and
+	raises an exception if any of them fails to build.
+	"""
+	from src.builder import Builder
+	from src.scheduler import schedule
+
+	for path, _, error in schedule(paths, Builder, (themepath, compress, True, False, False, ""), jobs):
+		if error is not None:
+			raise Exception("Error! Could not build the project '{}': {}".format(path, error))
+
+
+def _start(args):
+	"""_start(args:list)
+	Runs the project builder with the specified command-line arguments, in a
+	new process, and raises an exception if it fails. This measures the
+	builder's startup time, which dominates short invocations.
+	"""
+	import subprocess, sys
+
+	script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "build.py")
+	with open(os.devnull, "w") as devnull:
+		status = subprocess.call([sys.executable, script] + args, stdout=devnull)
+		if status != 0:
+			raise Exception("Error! The project builder exited with the status {}.".format(status))
+
+
+def measure(setup, function, repeat):
+	"""measure(setup:function, function:function, repeat:int)
+	Calls the specified function the specified number of times, each time
+	with the arguments returned by the setup function, and returns the
+	shortest time it took, in seconds. The shortest time is the one least
+	affected by other processes.
+	"""
+	best = None
+	for _ in range(max(1, repeat)):
+		args = setup()
+		start = time.time()
+		function(*args)
+		elapsed = time.time() - start
+		best = elapsed if best is None else min(best, elapsed)
+
+	return best
+
+
+def measurememory(project):
+	"""measurememory(project:string)
+	Returns the average number of bytes used by each question of the project
+	located at the specified path, once it is loaded. Objects shared by several
+	questions, such as default parameters, are only counted once.
+	"""
+	from src.project import Project
+
+	questions = Project(project).questionnaire.questions.values()
+	seen = set()
+	return sum(getsize(question, seen) for question in questions) // len(questions)
+
+
+def getsize(obj, seen):
+	"""getsize(obj:object, seen:set)
+	Returns the number of bytes used by the specified object and the objects
+	it references, excluding those whose identifiers are in the specified set.
+	The identifiers of the counted objects are added to the set.
+	"""
+	import sys
+
+	if id(obj) in seen or obj is None or isinstance(obj, (bool, type)):
+		return 0
+
+	seen.add(id(obj))
+	size = sys.getsizeof(obj)
+	if isinstance(obj, dict):
+		size += sum(getsize(k, seen) + getsize(v, seen) for k, v in obj.iteritems())
+	elif isinstance(obj, (list, tuple, set, frozenset)):
+		size += sum(getsize(item, seen) for item in obj)
+	else:
+		if hasattr(obj, "__dict__"):
+			size += getsize(obj.__dict__, seen)
+		for name in getattr(type(obj), "__slots__", ()):
+			size += getsize(getattr(obj, name, None), seen)
+
+	return size
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+	"""compare(results:dict, baseline:dict, threshold:float)
+	Compares the specified results to the specified baseline, and returns a
+	list of (name, time, baseline time, relative change, regressed) tuples
+	sorted by benchmark name. A benchmark regresses if it is slower than its
+	baseline by more than its threshold, which is either set in the baseline's
+	'thresholds' dictionary or the specified default threshold.
+	"""
+	comparison = []
+	previous = baseline.get("results", {})
+	thresholds = baseline.get("thresholds", {})
+	for name in sorted(results):
+		current, reference = results[name], previous.get(name)
+		if reference is None or reference <= 0:
+			comparison.append((name, current, reference, None, False))
+		else:
+			change = (current - reference) / reference
+			comparison.append((name, current, reference, change, change > thresholds.get(name, threshold)))
+
+	return comparison
+
+
+def loadbaseline(filepath):
+	"""loadbaseline(filepath:string)
+	Returns the baseline stored in the file located at the specified path, or
+	None if the file does not exist. Raises an exception if the baseline was
+	written by an incompatible version.
+	"""
+	import json
+
+	if not os.path.isfile(filepath):
+		return None
+
+	with open(filepath, "r") as file:
+		baseline = json.load(file)
+		if baseline.get("version") != VERSION:
+			raise Exception("Error! The baseline '{}' was written by an incompatible version of the benchmark suite. Please regenerate it.".format(filepath))
+
+		return baseline
+
+
+def savebaseline(filepath, results, parameters, thresholds=None):
+	"""savebaseline(filepath:string, results:dict, parameters:dict, thresholds:dict)
+	Writes the specified results, the parameters they were obtained with and
+	the per-benchmark regression thresholds to the file located at the
+	specified path.
+	"""
+	import json, platform
+
+	with open(filepath, "w") as file:
+		json.dump({
+			"version":VERSION,
+			"platform":platform.platform(),
+			"python":platform.python_version(),
+			"parameters":parameters,
+			"thresholds":thresholds or {},
+			"results":results
+		}, file, indent=1, sort_keys=True)
+		file.write("\n")
+
+
+def summarize(comparison):
+	"""summarize(comparison:list)
+	Returns the specified comparison, as returned by the compare function, in
+	the form of a string.
+	"""
+	lines = []
+	for name, current, reference, change, regressed in comparison:
+		if change is None:
+			lines.append("{:<20}{:>10.2f} ms".format(name, current * 1000))
+		else:
+			lines.append("{:<20}{:>10.2f} ms  (baseline {:.2f} ms, {:+.1f}%){}".format(name, current * 1000, reference * 1000, change * 100, "  REGRESSED" if regressed else ""))
+
+	return "\n".join(lines)
@@ -0,0 +1,185 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+from src.project import Project
+from src import profiler, sizes
+
+class Builder:
+	BUILT     = "built"
+	SKIPPED   = "skipped"
+	UNCHANGED = "unchanged"
+
+	theme   = None
+	writer  = None
+	flags   = None
+	rebuild = None
+
+
+	def __init__(self, themepath, compress, overwrite, pdfmode, verbose, cachedir=None, cachesize=None, precompile=False, minifytemplates=False, assetdir=None, asseturl="", profile=False, measure=False, locales=None, targets=None, rebuild=None):
+		"""__init__(themepath:string, compress:bool, overwrite:bool, pdfmode:bool, verbose:bool, cachedir:string, cachesize:int, precompile:bool, minifytemplates:bool, assetdir:string, asseturl:string, profile:bool, measure:bool, locales:list, targets:list, rebuild:bool)
+		Instantiates a Builder object that writes task presenters and tutorials
+		with the theme located at the specified path. Parsed configurations,
+		minified project scripts and stylesheets, as well as compiled theme
+		templates, are stored in the specified cache directory, unless it is
+		an empty string. If no cache directory is specified, the user-level
+		cache directory is used. If both the compress and minifytemplates
+		flags are set, the theme's templates are minified once instead of
+		minifying every generated file. If an asset directory is specified,
+		the theme's asset bundles are written to it and referenced, with the
+		specified URL prefix, instead of being inlined. If the profile flag is
+		set, the time spent in each stage of a build is measured. If the
+		measure flag is set, the size of each output is broken down by source.
+		A variant of each output is also written for each of the specified
+		locales. If render targets are specified (see HtmlWriter.TARGETS), they
+		are all written by each build, instead of the task presenter and
+		tutorial selected by the pdfmode flag. If the rebuild flag is set,
+		projects are built even if their build manifest shows they are up to
+		date. It defaults to the overwrite flag.
+		"""
+		import os
+		from src.theme import Theme
+		from src.htmlwriter import HtmlWriter
+		from src import configuration, minifier
+
+		profiler.setprofiler(profiler.Profiler() if profile else None)
+		sizes.setreport(sizes.SizeReport() if measure else None)
+		if cachedir is None:
+			cachedir = Builder.getcachedir()
+
+		minifytemplates = bool(compress and minifytemplates)
+		if cachedir == "":
+			configuration.setcache(None)
+			minifier.setcache(None)
+			self.theme = Theme(themepath, minify=minifytemplates)
+		else:
+			configuration.setcache(configuration.ConfigurationCache(os.path.join(cachedir, "config")))
+			minifier.setcache(minifier.MinificationCache(os.path.join(cachedir, "minify"), cachesize))
+			self.theme = Theme(themepath, cachedir, precompile, minifytemplates)
+
+		self.writer  = HtmlWriter(self.theme, compress, overwrite, pdfmode, verbose, assetdir, asseturl, locales, targets)
+		self.rebuild = overwrite if rebuild is None else rebuild
+		self.flags   = {
+			"compress":bool(compress),
+			"pdfmode":bool(self.writer.pdfmode),
+			"targets":self.writer.targets,
+			"minifytemplates":minifytemplates,
+			"assetdir":self.writer.assetdir,
+			"asseturl":None if self.writer.assetdir is None else asseturl,
+			"locales":sorted(locales or [])
+		}
+
+
+	def __call__(self, path):
+		"""__call__(path:string)
+		Builds the task presenter and tutorial for the project located at the
+		specified path. Returns a (status, message, profile, sizes, changed)
+		tuple where the status is either 'built', 'skipped' or 'unchanged', the
+		profile is the build's record if profiling is enabled, and the sizes are
+		the record of the outputs' sizes if they are measured and the project
+		was built. Both records are None otherwise. Changed are the paths to the
+		outputs whose content was changed, or that were removed, by the build.
+
+		A project is left unchanged if its build manifest shows that none of
+		its inputs, the theme or the builder flags have changed since it was
+		last built, unless the rebuild flag is set. Outputs recorded in a
+		manifest were written by the builder and may therefore be replaced
+		without the overwrite flag.
+		"""
+		profiler.begin(path)
+		sizes.begin(path)
+		status, message, changed = self.build(path)
+		record = sizes.end()
+		return (status, message, profiler.end(), record if status == Builder.BUILT else None, changed)
+
+
+	def build(self, path):
+		"""build(path:string)
+		Builds the project located at the specified path and returns a
+		(status, message, changed) tuple.
+		"""
+		import os
+		from src.manifest import Manifest
+
+		with profiler.stage("manifest"):
+			manifest = Manifest(path)
+			theme = self.theme.getdigest()
+			inputs = manifest.getinputs()
+			if not self.rebuild and manifest.isuptodate(theme, self.flags, inputs):
+				# Inputs that were touched without being modified are recorded,
+				# so that they are not hashed again by the next check.
+				manifest.refresh(inputs)
+				return (Builder.UNCHANGED, None, [])
+
+		writable, message = self.writer.iswritabledir(path, True if not manifest.isempty() else None)
+		if not writable:
+			return (Builder.SKIPPED, message, [])
+
+		with profiler.stage("configuration"):
+			project = Project(path)
+
+		outputs, changed = self.writer.write(project)
+
+		# Outputs of the previous build that are no longer written, e.g. the
+		# variant for a locale that was dropped, are removed.
+		for filename in [f for f in manifest.outputs if f not in outputs and f not in changed]:
+			filepath = os.path.join(path, filename)
+			if os.path.isfile(filepath):
+				os.remove(filepath)
+				changed.append(filename)
+
+		with profiler.stage("manifest"):
+			manifest.update(inputs, theme, self.flags, outputs, self.writer.getassetfiles(project))
+
+		return (Builder.BUILT, None, [os.path.join(path, f) for f in changed])
+
+
+	@staticmethod
+	def getcachedir():
+		"""getcachedir()
+		Returns the path to the user-level cache directory.
+		"""
+		import os
+
+		base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+		return os.path.join(base, "geotagx")
+
+
+	@staticmethod
+	def summarize(results):
+		"""summarize(results:list)
+		Returns a summary of the specified (path, result, error) tuples, as
+		returned by src.scheduler.schedule, in the form of a string.
+		"""
+		lines = []
+		built, skipped, unchanged, failed, changed = 0, 0, 0, 0, 0
+		for path, result, error in results:
+			if error is not None:
+				failed += 1
+				lines.append("FAILED    {}: {}".format(path, error))
+			else:
+				status, message, _, _, files = result
+				changed += len(files)
+				if status == Builder.SKIPPED:
+					skipped += 1
+					lines.append("SKIPPED   {}: {}".format(path, message))
+				elif status == Builder.UNCHANGED:
+					unchanged += 1
+					lines.append("UNCHANGED {}".format(path))
+				else:
+					built += 1
+					lines.append("BUILT     {} ({} file(s) changed)".format(path, len(files)))
+
+		lines.append("{} project(s): {} built, {} unchanged, {} skipped, {} failed. {} file(s) changed.".format(len(results), built, unchanged, skipped, failed, changed))
+		return "\n".join(lines)
@@ -0,0 +1,117 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os
+
+class Checker:
+	def __init__(self, cachedir=None):
+		"""__init__(cachedir:string)
+		Instantiates a Checker object that validates project configurations.
+		Parsed configurations are stored in the specified cache directory,
+		unless it is an empty string. If no cache directory is specified, the
+		user-level cache directory is used.
+
+		Note that only the modules required to validate configurations are
+		loaded: the template engine and minifiers are not.
+		"""
+		from src import configuration
+		from src.builder import Builder
+
+		if cachedir is None:
+			cachedir = Builder.getcachedir()
+
+		configuration.setcache(None if cachedir == "" else configuration.ConfigurationCache(os.path.join(cachedir, "config")))
+
+
+	def __call__(self, path):
+		"""__call__(path:string)
+		Validates the project located at the specified path, and returns an
+		(errors, warnings) tuple of lists of messages.
+		"""
+		return check(path)
+
+
+def check(path):
+	"""check(path:string)
+	Validates the configuration of the project located at the specified path,
+	and returns an (errors, warnings) tuple of lists of messages. Unlike the
+	Project class, which stops at the first invalid question, every error is
+	reported.
+	"""
+	from src import schema
+	from src.project import Project
+
+	errors, warnings = [], []
+	if not os.path.isdir(path) or not os.access(path, os.R_OK):
+		return (["Error! The path '{}' does not point to a readable directory.".format(path)], warnings)
+
+	filenames = set(os.listdir(path))
+	try:
+		config = Project.getprojectconfiguration(path, filenames)
+	except Exception as e:
+		return (["Error! Could not parse the project configuration: {}".format(e)], warnings)
+
+	if config is None:
+		return (["Error! The directory '{}' does not contain a GeoTag-X project configuration file or you may not have sufficient access permissions.".format(path)], warnings)
+	elif not isinstance(config, dict):
+		return (["Error! The project configuration must be a dictionary."], warnings)
+
+	errors.extend(schema.validate("project", config))
+	checkquestionnaire(config.get("questionnaire"), errors, warnings)
+
+	try:
+		tutorial = Project.gettutorialconfiguration(path, filenames)
+		if tutorial is not None:
+			errors.extend(schema.validate("tutorial", tutorial))
+	except Exception as e:
+		errors.append("Error! Could not parse the tutorial configuration: {}".format(e))
+
+	return (errors, warnings)
+
+
+def checkquestionnaire(questions, errors, warnings):
+	"""checkquestionnaire(questions:list, errors:list, warnings:list)
+	Validates the semantics and control flow of the specified questionnaire
+	configuration, and appends every error and warning to the specified lists.
+	Its structure is validated by the project configuration's JSON schema.
+	"""
+	from src.question import Question
+	from src.controlflow import ControlFlowGraph
+
+	if not isinstance(questions, list) or len(questions) < 1:
+		return
+
+	errors.extend([message for _, message in Question.validate(questions)])
+
+	# Compile the control flow of the questions whose keys are valid.
+	keys, controlflow = [], {}
+	for entry in [e for e in questions if isinstance(e, dict)]:
+		key = entry.get("key")
+		key = key.strip() if isinstance(key, basestring) else None
+		if Question.iskey(key)[0]:
+			if key in controlflow:
+				errors.append("Error! The key '{}' is used to identify more than one question. Please make sure each question has a unique key.".format(key))
+			else:
+				keys.append(key)
+				branch = entry.get("branch")
+				if isinstance(branch, dict):
+					branch = {k.lower() if isinstance(k, basestring) else k:v for k, v in branch.iteritems()}
+				controlflow[key] = branch
+
+	if len(keys) > 0:
+		graph = ControlFlowGraph(keys, controlflow)
+		errors.extend(graph.errors)
+		if graph.orphans:
+			warnings.append("Warning! The following questions can not be reached: {}.".format(", ".join(graph.orphans)))
@@ -0,0 +1,194 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import errno, json, random, socket, time
+
+# The status codes of the responses to a request that may succeed if it is
+# sent again, i.e. when the server is rate-limiting or temporarily unavailable.
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# The status codes of the responses that show a request was not processed, so
+# that even a request that is not idempotent may be sent again.
+UNPROCESSED_STATUSES = frozenset([429, 503])
+
+# The methods of requests that have the same effect if they are sent twice.
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+
+# The socket errors that show a connection was never established, i.e. that a
+# request never reached the server.
+UNSENT_ERRNOS = frozenset([errno.ECONNREFUSED, errno.EHOSTUNREACH, errno.ENETUNREACH])
+
+# The maximum delay, in seconds, between two attempts to send a request.
+MAX_DELAY = 60.0
+
+class UncertainError(Exception):
+	"""
+	Raised when a request that is not idempotent failed in a way that does not
+	show whether the server processed it, e.g. when the response timed out.
+	Such a request is not sent again, since it could be processed twice.
+	"""
+	pass
+
+
+class Client:
+	endpoint = None
+	session  = None
+	retries  = 5
+	backoff  = 1.0
+	timeout  = 30
+
+
+	def __init__(self, endpoint, apikey=None, connections=4, retries=5, backoff=1.0, timeout=30):
+		"""__init__(endpoint:string, apikey:string, connections:int, retries:int, backoff:float, timeout:float)
+		Instantiates a Client object that sends requests to the REST API of the
+		PyBossa server located at the specified endpoint, e.g. http://server.org,
+		authenticated with the specified API key. Requests are sent over a pool
+		of up to the specified number of keep-alive connections, which may be
+		shared by as many threads. A request that fails because of a connection
+		error, a timeout or a server error is sent again up to the specified
+		number of retries, after a delay that doubles with every attempt. A
+		request that is not idempotent, e.g. one that creates a task, is only
+		sent again if it provably was not processed (see request).
+		"""
+		import requests
+		from requests.adapters import HTTPAdapter
+
+		self.endpoint = endpoint.rstrip("/")
+		self.retries  = retries
+		self.backoff  = backoff
+		self.timeout  = timeout
+
+		# Threads wait for a pooled connection instead of opening a new one, which
+		# bounds the number of connections open at any given time.
+		adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, connections), pool_block=True)
+		self.session = requests.Session()
+		self.session.mount("http://", adapter)
+		self.session.mount("https://", adapter)
+		self.session.headers.update({"Content-Type":"application/json"})
+		if apikey:
+			self.session.params = {"api_key":apikey}
+
+
+	def request(self, method, path, params=None, payload=None):
+		"""request(method:string, path:string, params:dict, payload:object)
+		Sends a request with the specified method, query parameters and JSON
+		payload to the specified path of the API, e.g. /api/task, and returns
+		the decoded response. Raises an exception if the request fails after
+		every retry, or if the server rejects it. A request that is not
+		idempotent is only sent again if the connection could not be
+		established, or if the server responded that it did not process it
+		(429 or 503). Otherwise, e.g. when the response timed out, an
+		UncertainError is raised.
+		"""
+		import requests
+
+		url  = self.endpoint + path
+		data = None if payload is None else json.dumps(payload)
+		idempotent = method in IDEMPOTENT_METHODS
+		for attempt in xrange(self.retries + 1):
+			retryafter = None
+			try:
+				response = self.session.request(method, url, params=params, data=data, timeout=self.timeout)
+			except (requests.ConnectionError, requests.Timeout) as e:
+				if not idempotent and not Client.isunsent(e):
+					raise UncertainError("Error! The request '{} {}' failed, and may or may not have been processed by the server: {}".format(method, url, e))
+				elif attempt >= self.retries:
+					raise Exception("Error! The request '{} {}' failed after {} attempt(s): {}".format(method, url, attempt + 1, e))
+			else:
+				status = response.status_code
+				if status < 400:
+					return response.json() if len(response.content) > 0 else None
+				elif status not in (RETRY_STATUSES if idempotent else UNPROCESSED_STATUSES) or attempt >= self.retries:
+					message = "The server responded to the request '{} {}' with the status code {}: {}".format(method, url, status, response.text[:200])
+					if not idempotent and status >= 500 and status not in UNPROCESSED_STATUSES:
+						raise UncertainError("Error! {} The request may or may not have been processed.".format(message))
+					raise Exception("Error! " + message)
+				retryafter = response.headers.get("Retry-After")
+
+			time.sleep(self.getdelay(attempt, retryafter))
+
+
+	def getdelay(self, attempt, retryafter=None):
+		"""getdelay(attempt:int, retryafter:string)
+		Returns the number of seconds to wait before the specified attempt is
+		sent again. The delay doubles with every attempt, and is randomized so
+		that concurrent requests are not retried all at once, unless the server
+		requested a longer delay in its Retry-After header.
+		"""
+		delay = min(MAX_DELAY, self.backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+		try:
+			return max(delay, min(MAX_DELAY, float(retryafter)))
+		except (TypeError, ValueError):
+			return delay
+
+
+	@staticmethod
+	def isunsent(error):
+		"""isunsent(error:requests.RequestException)
+		Returns true if the specified error shows that the request never
+		reached the server, i.e. the connection was refused or timed out, or
+		the server's name could not be resolved, false otherwise.
+		"""
+		import requests
+
+		if isinstance(error, requests.exceptions.ConnectTimeout):
+			return True
+
+		# The socket error is wrapped by urllib3's and requests' exceptions.
+		pending = [error]
+		while len(pending) > 0:
+			error = pending.pop()
+			if isinstance(error, socket.gaierror) or (isinstance(error, socket.error) and error.errno in UNSENT_ERRNOS):
+				return True
+			pending.extend([a for a in getattr(error, "args", ()) if isinstance(a, BaseException)])
+			if isinstance(getattr(error, "reason", None), BaseException):
+				pending.append(error.reason)
+
+		return False
+
+
+	def getproject(self, slug):
+		"""getproject(slug:string)
+		Returns the project with the specified short name, in the form of a
+		dictionary. Raises an exception if the project does not exist.
+		"""
+		projects = self.request("GET", "/api/project", params={"short_name":slug})
+		if not projects:
+			raise Exception("Error! The project '{}' does not exist on the server '{}'.".format(slug, self.endpoint))
+
+		return projects[0]
+
+
+	def updateproject(self, projectid, fields):
+		"""updateproject(projectid:int, fields:dict)
+		Updates the specified fields of the project with the specified identifier,
+		and returns the project as updated by the server.
+		"""
+		return self.request("PUT", "/api/project/{}".format(projectid), payload=fields)
+
+
+	def createtask(self, task):
+		"""createtask(task:dict)
+		Creates the specified task, i.e. a dictionary that contains at least the
+		task's project_id and info, and returns it as created by the server.
+		"""
+		return self.request("POST", "/api/task", payload=task)
+
+
+	def close(self):
+		"""close()
+		Closes the pooled connections.
+		"""
+		self.session.close()
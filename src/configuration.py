@@ -0,0 +1,160 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os
+
+class ConfigurationCache:
+	path = None
+
+
+	def __init__(self, path):
+		"""__init__(path:string)
+		Instantiates a ConfigurationCache object that stores parsed configuration
+		files in the directory located at the specified path.
+		"""
+		self.path = path
+
+
+	def get(self, filepath, stat):
+		"""get(filepath:string, stat:posix.stat_result)
+		Returns the parsed configuration stored for the file located at the
+		specified path, or None if the cache does not contain it or if the
+		file's size or modification time differ from the specified stat.
+		"""
+		import cPickle
+
+		try:
+			with open(self.getfilepath(filepath), "rb") as file:
+				mtime, size, configuration = cPickle.load(file)
+				if mtime == stat.st_mtime and size == stat.st_size:
+					return configuration
+		except Exception:
+			# A missing or corrupt entry is simply a cache miss.
+			pass
+
+		return None
+
+
+	def put(self, filepath, stat, configuration):
+		"""put(filepath:string, stat:posix.stat_result, configuration:object)
+		Stores the parsed configuration for the file located at the specified
+		path. Since caching is merely an optimization, any error is ignored.
+		"""
+		import cPickle, tempfile
+
+		try:
+			if not os.path.isdir(self.path):
+				os.makedirs(self.path)
+
+			descriptor, temppath = tempfile.mkstemp(dir=self.path, prefix=".tmp")
+			with os.fdopen(descriptor, "wb") as file:
+				cPickle.dump((stat.st_mtime, stat.st_size, configuration), file, cPickle.HIGHEST_PROTOCOL)
+			os.rename(temppath, self.getfilepath(filepath))
+		except Exception:
+			pass
+
+
+	def getfilepath(self, filepath):
+		"""getfilepath(filepath:string)
+		Returns the path to the cache entry for the file located at the
+		specified path.
+		"""
+		import hashlib
+		return os.path.join(self.path, hashlib.sha1(os.path.realpath(filepath)).hexdigest())
+
+
+# The cache used by the load function. It is set by calling setcache.
+_cache = None
+
+
+def setcache(cache):
+	"""setcache(cache:ConfigurationCache)
+	Sets the cache used by the load function. If the specified cache is None,
+	configuration files are always parsed.
+	"""
+	global _cache
+	_cache = cache
+
+
+def load(filepath):
+	"""load(filepath:string)
+	Returns the parsed content of the JSON, YAML or message catalog (.po or
+	.mo) file located at the specified path. Raises an IOError if the file can not be read.
+	"""
+	parser = getparsers().get(os.path.splitext(filepath)[1])
+	if parser is None:
+		raise Exception("Error! Could not find a suitable configuration file parser for the file '{}'.".format(filepath))
+
+	with open(filepath, "rb") as file:
+		if _cache is None:
+			return parser(file)
+
+		stat = os.fstat(file.fileno())
+		configuration = _cache.get(filepath, stat)
+		if configuration is None:
+			configuration = parser(file)
+			_cache.put(filepath, stat, configuration)
+
+		return configuration
+
+
+def getparsers():
+	"""getparsers()
+	Returns a dictionary that maps each supported file extension to a function
+	that parses the content of a file with that extension.
+	"""
+	return {
+		".json":_parsejson,
+		".yaml":_parseyaml,
+		".po":_parsepo,
+		".mo":_parsemo
+	}
+
+
+def _parsejson(file):
+	"""_parsejson(file:file)
+	Returns the content of the specified JSON file.
+	"""
+	import json
+	return json.load(file)
+
+
+def _parseyaml(file):
+	"""_parseyaml(file:file)
+	Returns the content of the specified YAML file. The libyaml-based loader is
+	used if it is available, otherwise the pure-Python loader is used.
+	"""
+	import yaml
+	return yaml.load(file, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+def _parsepo(file):
+	"""_parsepo(file:file)
+	Returns the catalog contained in the specified gettext message catalog
+	(.po) file. See src.translation.parsecatalog.
+	"""
+	import polib
+	from src.translation import parsecatalog
+	return parsecatalog(polib.pofile(file.read().decode("utf-8")))
+
+
+def _parsemo(file):
+	"""_parsemo(file:file)
+	Returns the catalog contained in the specified compiled gettext message
+	catalog (.mo) file. See src.translation.parsecatalog.
+	"""
+	import polib
+	from src.translation import parsecatalog
+	return parsecatalog(polib.mofile(file.name))
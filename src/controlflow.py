@@ -0,0 +1,232 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+class ControlFlowGraph(object):
+	END = "end"
+
+	__slots__ = ("keys", "indices", "defaults", "branches", "errors", "cycle", "orphans", "remaining")
+
+
+	def __init__(self, keys, controlflow):
+		"""__init__(keys:list, controlflow:dict)
+		Instantiates a ControlFlowGraph object by compiling the specified
+		control flow, i.e. a dictionary that maps each of the specified question
+		keys to its branch, into a graph whose nodes are indexed in the order
+		of the keys. The node that follows the last question, i.e. the end of
+		the questionnaire, has the index len(keys).
+
+		A question's branch is either None, in which case the question leads
+		to the next one, a key, in which case it leads to the question with
+		that key, or a dictionary that maps an answer to the key of the
+		question it leads to. An answer that is not in the dictionary leads
+		to the next question. The special key 'end' ends the questionnaire.
+
+		The graph is validated in a time proportional to the number of
+		questions and branches. Any error is stored in the errors list.
+		"""
+		self.keys      = list(keys)
+		self.indices   = {key:index for index, key in enumerate(self.keys)}
+		self.indices[ControlFlowGraph.END] = len(self.keys)
+		self.defaults  = []
+		self.branches  = []
+		self.errors    = []
+		self.cycle     = None
+		self.orphans   = None
+		self.remaining = None
+
+		for index, key in enumerate(self.keys):
+			branch = controlflow.get(key)
+			default, branches = index + 1, {}
+			if branch is None:
+				pass
+			elif isinstance(branch, basestring):
+				default = self.getindex(key, branch)
+			elif isinstance(branch, dict):
+				for answer, target in branch.iteritems():
+					if isinstance(target, basestring):
+						branches[answer] = self.getindex(key, target)
+					else:
+						self.errors.append("Error! The branch for the answer '{}' to the question '{}' must be a question key.".format(answer, key))
+			else:
+				self.errors.append("Error! The branch of the question '{}' is not a string or dictionary.".format(key))
+
+			self.defaults.append(default)
+			self.branches.append(branches)
+
+		if len(self.errors) < 1:
+			self.analyze()
+
+
+	def getindex(self, key, target):
+		"""getindex(key:string, target:string)
+		Returns the index of the node with the specified target key, which the
+		question with the specified key branches to. If no such node exists,
+		an error is recorded and the index of the next question is returned.
+		"""
+		index = self.indices.get(target)
+		if index is None:
+			self.errors.append("Error! The key '{}' does not correspond to a question.".format(target))
+			index = self.indices[key] + 1
+
+		return index
+
+
+	def getsuccessors(self, index):
+		"""getsuccessors(index:int)
+		Returns the set of indices of the nodes that directly follow the node
+		with the specified index.
+		"""
+		successors = set(self.branches[index].itervalues())
+		successors.add(self.defaults[index])
+		return successors
+
+
+	def analyze(self):
+		"""analyze()
+		Detects cycles and orphaned questions, i.e. questions that can not be
+		reached from the first question, and computes the number of questions
+		remaining on the longest path from each node to the end.
+		"""
+		size = len(self.keys)
+		successors = [self.getsuccessors(index) for index in range(size)]
+
+		# Sort the nodes topologically (Kahn's algorithm). Nodes that can not be
+		# sorted are part of, or reachable from, a cycle.
+		indegrees = [0] * (size + 1)
+		for targets in successors:
+			for target in targets:
+				indegrees[target] += 1
+
+		order = [index for index in range(size) if indegrees[index] == 0]
+		for index in order:
+			for target in successors[index]:
+				indegrees[target] -= 1
+				if indegrees[target] == 0 and target < size:
+					order.append(target)
+
+		if len(order) < size:
+			self.cycle = self.findcycle(successors, set(range(size)) - set(order))
+			self.errors.append("Error! The questionnaire contains a cycle: {}. Please make sure no question leads back to itself.".format(" -> ".join(self.cycle)))
+			return
+
+		# Find the nodes that can be reached from the first question.
+		reachable = [False] * (size + 1)
+		reachable[0] = True
+		stack = [0]
+		while len(stack) > 0:
+			index = stack.pop()
+			for target in successors[index]:
+				if not reachable[target]:
+					reachable[target] = True
+					if target < size:
+						stack.append(target)
+
+		self.orphans = [self.keys[index] for index in range(size) if not reachable[index]]
+
+		# Compute the remaining path lengths in reverse topological order.
+		self.remaining = [0] * (size + 1)
+		for index in reversed(order):
+			self.remaining[index] = 1 + max(self.remaining[target] for target in successors[index])
+
+
+	def findcycle(self, successors, candidates):
+		"""findcycle(successors:list, candidates:set)
+		Returns the keys of the questions that form a cycle, given the nodes
+		that could not be sorted topologically. Since every such node has a
+		predecessor that could not be sorted either, walking backwards from
+		any of them eventually leads to a node that was already visited.
+		"""
+		predecessors = {}
+		for index in candidates:
+			for target in successors[index]:
+				if target in candidates:
+					predecessors[target] = index
+
+		path, visited = [], {}
+		index = min(candidates)
+		while index not in visited:
+			visited[index] = len(path)
+			path.append(index)
+			index = predecessors[index]
+
+		# The cycle starts with its earliest question.
+		cycle = list(reversed(path[visited[index]:]))
+		start = cycle.index(min(cycle))
+		cycle = cycle[start:] + cycle[:start]
+		return [self.keys[i] for i in cycle + [cycle[0]]]
+
+
+	def getmaxpathlength(self):
+		"""getmaxpathlength()
+		Returns the number of questions on the longest path through the
+		questionnaire, or None if the graph is invalid.
+		"""
+		return None if self.remaining is None else self.remaining[0]
+
+
+	def getjumptable(self):
+		"""getjumptable()
+		Returns the graph in a form that lets the task presenter find the next
+		question in constant time, i.e. a dictionary that contains the question
+		keys, the index of the end node and a table with one [next, branches,
+		remaining] entry per question, where next is the index of the question
+		that follows by default, branches maps each normalized answer (see the
+		normalize method) to the index of the question it leads to, and remaining
+		is the number of questions left on the longest path from the question
+		to the end, which can be used to display progress. Returns None if the
+		graph is invalid.
+		"""
+		if self.remaining is None:
+			return None
+
+		table = []
+		for index in range(len(self.keys)):
+			branches = {ControlFlowGraph.normalize(answer):target for answer, target in self.branches[index].iteritems()}
+			table.append([self.defaults[index], branches, self.remaining[index]])
+
+		return {
+			"keys":self.keys,
+			"end":len(self.keys),
+			"table":table
+		}
+
+
+	def __len__(self):
+		"""
+		Returns the number of questions in the graph.
+		"""
+		return len(self.keys)
+
+
+	@staticmethod
+	def normalize(answer):
+		"""normalize(answer:string)
+		Returns the specified answer in the form used by the jump table, i.e.
+		without leading or trailing whitespace and in lowercase.
+		"""
+		return answer.strip().lower()
+
+
+	@staticmethod
+	def isvalid(graph):
+		"""isvalid(graph:ControlFlowGraph)
+		Returns true if the specified graph is valid, false otherwise.
+		"""
+		if graph is None:
+			return (False, "Error! A 'NoneType' object is not considered a control-flow graph.")
+		elif len(graph.errors) > 0:
+			return (False, graph.errors[0])
+		else:
+			return (True, None)
@@ -13,114 +13,330 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
-import os, jinja2
-
-# TODO Find out what this does.
-import sys, locale, codecs; sys.stdout = codecs.getwriter(locale.getpreferredencoding())(sys.stdout)
+import os
+from src import profiler, sizes
 
 class HtmlWriter:
+	CHUNK_SIZE = 65536
+
+	# The render targets, i.e. the variants of a project's documents that can
+	# be written. Each target maps to the document it renders, either the task
+	# presenter (template) or the tutorial, and the template variables that set
+	# the variant apart.
+	TARGETS = {
+		"image":("template", {"pdfmode":False}),
+		"pdf":("template", {"pdfmode":True}),
+		"tutorial":("tutorial", {}),
+	}
+
 	theme     = None
 	compress  = None
 	overwrite = None
 	verbose   = None
 	pdfmode   = False
+	assetdir  = None
+	asseturl  = None
+	locales   = None
+	targets   = None
 
 
-	def __init__(self, theme, compress, overwrite, pdfmode, verbose):
+	def __init__(self, theme, compress, overwrite, pdfmode, verbose, assetdir=None, asseturl="", locales=None, targets=None):
+		"""__init__(theme:Theme, compress:bool, overwrite:bool, pdfmode:bool, verbose:bool, assetdir:string, asseturl:string, locales:list, targets:list)
+		Instantiates an HtmlWriter object that renders the specified targets
+		(see TARGETS) with the specified theme. If no targets are specified,
+		the task presenter for images, or PDF files if the pdfmode flag is set,
+		and the tutorial are rendered.
+		"""
+		if targets is None:
+			targets = ["pdf" if pdfmode else "image", "tutorial"]
+		for target in [t for t in targets if t not in HtmlWriter.TARGETS]:
+			raise Exception("Error! The render target '{}' is not recognized. The targets are {}.".format(target, ", ".join(sorted(HtmlWriter.TARGETS))))
+
 		self.theme     = theme
 		self.compress  = compress
 		self.overwrite = overwrite
-		self.pdfmode   = pdfmode
 		self.verbose   = verbose
+		self.assetdir  = assetdir
+		self.asseturl  = asseturl
+		self.locales   = locales or []
+		self.targets   = targets
+
+		# The tutorial is rendered in the mode of the first task presenter target.
+		presenters = [t for t in targets if HtmlWriter.TARGETS[t][0] == "template"]
+		self.pdfmode   = HtmlWriter.TARGETS[presenters[0]][1]["pdfmode"] if len(presenters) > 0 else bool(pdfmode)
 
+		# External assets are referenced where the theme renders the links to
+		# them, which a theme that predates external assets does not do. Such a
+		# theme's assets are inlined instead.
+		if assetdir is not None:
+			missing = [v for v in ["csslinks", "jslinks"] if not theme.isvariable(v)]
+			if len(missing) > 0:
+				print "[HtmlWriter] Warning! The theme's templates do not render the {} variable(s), so its assets are inlined instead of being written to '{}'. See the README to add them.".format(", ".join(missing), assetdir)
+				self.assetdir = None
 
-	def iswritabledir(self, path):
-		"""iswritabledir(path:string)
+
+	def iswritabledir(self, path, overwrite=None):
+		"""iswritabledir(path:string, overwrite:bool)
 		Returns true if the path points to a writable directory, false otherwise.
 		This method will also return false if the path contains an existing
 		task presenter (template.html) and tutorial (tutorial.html), and the
-		overwrite flag is set to false.
+		overwrite flag is set to false. If the overwrite parameter is not
+		specified, the writer's overwrite flag is used.
 		"""
+		overwrite = self.overwrite if overwrite is None else overwrite
 		if not os.path.isdir(path):
 			return (False, "The path '{}' does not point to a directory, or you may not have sufficient access permissions.".format(path))
 		elif not os.access(path, os.W_OK):
 			return (False, "The path '{}' does not point to a writable directory.".format(path))
-		elif not self.overwrite and (os.access(os.path.join(path, "template.html"), os.F_OK) or os.access(os.path.join(path, "tutorial.html"), os.F_OK)):
+		elif not overwrite and (os.access(os.path.join(path, "template.html"), os.F_OK) or os.access(os.path.join(path, "tutorial.html"), os.F_OK)):
 			return (False, "The directory '{}' already contains either a task presenter and or a tutorial. To overwrite them, set the '-f' or '--force' flag.".format(path))
 		else:
 			return (True, None)
 
 
-	def getassets(self, project):
-		"""getassets(project:Project)
-		Returns the assets for the specified project.
+	def getassetlinks(self, bundles):
+		"""getassetlinks(bundles:set)
+		Writes the specified theme asset bundles to the external asset directory
+		and returns the HTML markup that references their stylesheets and
+		scripts, in the form of a (css, js) tuple. The core bundle, if
+		specified, is always referenced first.
+		"""
+		import cgi
+
+		csslinks, jslinks = [], []
+		for bundle in sorted(bundles, key=lambda bundle: (bundle != "core", bundle)):
+			with profiler.stage("assets"):
+				css, js = self.theme.exportasset(bundle, self.assetdir)
+			if css is not None:
+				csslinks.append('<link rel="stylesheet" href="{}">'.format(cgi.escape(self.asseturl + css, True)))
+			if js is not None:
+				jslinks.append('<script src="{}"></script>'.format(cgi.escape(self.asseturl + js, True)))
+
+		return "".join(csslinks), "".join(jslinks)
+
+
+	def getassetfiles(self, project):
+		"""getassetfiles(project:Project)
+		Returns the sorted paths to the external asset files referenced by the
+		specified project's outputs, which are written if need be, or an empty
+		list if the theme's assets are inlined.
 		"""
-		# Get theme assets required by the project.
-		css, js = self.theme.getassets(project.get_required_assets())
+		if self.assetdir is None:
+			return []
 
-		# Append project-specific assets to the theme assets.
-		css += project.getcss()
-		js  += project.getjs()
+		bundles = project.get_required_assets() | set(["core"])
+		if project.tutorial is not None and "tutorial" in self.targets:
+			bundles.add("tutorial")
 
-		return css, js
+		filenames = [f for bundle in bundles for f in self.theme.exportasset(bundle, self.assetdir) if f is not None]
+		return sorted(os.path.join(self.assetdir, f) for f in filenames)
 
 
 	def write(self, project):
 		"""write(project:Project)
-		Writes the specified project's task presenter and tutorial.
+		Writes the specified project's render targets, e.g. its task presenter
+		and tutorial, and returns
+		an (outputs, changed) tuple where outputs are the names of the written
+		files, and changed are the names of the files whose content changed,
+		including a tutorial that was removed because the project no longer
+		has one. Files whose content is unchanged are left untouched. A variant
+		of each file is also written for each of the writer's locales, e.g.
+		template.fr.html, with the messages in the theme's templates translated
+		by the theme's and project's message catalogs for that locale.
 		"""
-		project = HtmlWriter.__preprocess(project)
-		css, js = self.getassets(project)
+		with profiler.stage("preprocess"):
+			project = HtmlWriter.__preprocess(project, self.compress and self.theme.minified)
+
+		outputs, changed = [], []
+
+		# If the theme's assets are external, only the project-specific assets
+		# are inlined, and the theme renders the links to the others next to them.
+		projectcss, projectjs = project.getcss(), project.getjs()
+		bundles = project.get_required_assets() | set(["core"])
+		external = self.assetdir is not None
+		if not external:
+			with profiler.stage("assets"):
+				css, js = self.theme.getassets(set(bundles))
+			css, js = css + projectcss, js + projectjs
+			csslinks, jslinks = "", ""
+		else:
+			css, js = projectcss, projectjs
+			csslinks, jslinks = self.getassetlinks(bundles)
+
 		context = {
 			"name":project.name,
 			"slug":project.slug,
 			"description":project.description,
 			"why":project.why,
 			"questionnaire":project.questionnaire,
+			"graph":project.questionnaire.graph,
+			"jumptable":project.questionnaire.jumptable,
 			"istutorial":False,
 			"js":js,
 			"css":css,
+			"jslinks":jslinks,
+			"csslinks":csslinks,
 			"pdfmode" : self.pdfmode
 		}
-		with open(os.path.join(project.path, "template.html"), "w") as output:
-			self.__render(context, output)
-
-		with open(os.path.join(project.path, "tutorial.html"), "w") as output:
-			# Note that in the event of a non-existent project tutorial configuration,
-			# an empty tutorial.html file is created.
-			if project.tutorial is not None:
-				css, js = self.theme.getasset("tutorial")
-				context["tutorial"] = str(project.tutorial)
-				context["tutorial_len"] = len(project.tutorial)
-				context["istutorial"] = True
-				context["pdfmode"] = self.pdfmode
+
+		# The sources of each output are only gathered if their sizes are measured.
+		sources = None
+		if sizes.isenabled():
+			sources = {
+				"project.css":projectcss,
+				"project.js":projectjs,
+				"help":"".join([q.help for q in project.questionnaire.questions.itervalues() if q.help is not None])
+			}
+			if not external:
+				sources.update({"bundle:" + bundle:"".join(self.theme.getasset(bundle)) for bundle in bundles})
+
+		templates = {"template":(context, sources)}
+		if project.tutorial is not None and "tutorial" in self.targets:
+			context = dict(context, tutorial=str(project.tutorial), tutorial_len=len(project.tutorial), istutorial=True)
+			if not external:
+				with profiler.stage("assets"):
+					css, js = self.theme.getasset("tutorial")
 				context["css"] += css
 				context["js"] += js
+			else:
+				css, js = self.getassetlinks(set(["tutorial"]))
+				context["csslinks"] += css
+				context["jslinks"] += js
+
+			if sources is not None:
+				sources = dict(sources, **{"tutorial.json":context["tutorial"]})
+				if not external:
+					sources["bundle:tutorial"] = css + js
+
+			templates["tutorial"] = (context, sources)
+		elif "tutorial" in self.targets and os.path.isfile(os.path.join(project.path, "tutorial.html")):
+			# A tutorial that was removed from the project is removed from the
+			# outputs as well.
+			os.remove(os.path.join(project.path, "tutorial.html"))
+			changed.append("tutorial.html")
+
+		# Each target is rendered from the same context, only its variables differ.
+		documents = []
+		for target, filename in self.getfilenames():
+			document, variables = HtmlWriter.TARGETS[target]
+			if document in templates:
+				context, sources = templates[document]
+				documents.append((filename, dict(context, **variables), sources))
+
+		# Every target and locale variant is rendered from the same preprocessed
+		# project, assets and compiled template.
+		for locale in [None] + self.locales:
+			variables = {"locale":locale}
+			if locale is not None:
+				from src import translation
+
+				directories = [os.path.join(path, translation.DIRECTORY) for path in [self.theme.path, project.path]]
+				variables.update(translation.gettranslations(locale, directories).getcontext())
 
-				self.__render(context, output)
+			for filename, context, sources in documents:
+				filename = HtmlWriter.getfilename(filename, locale)
+				outputs.append(filename)
 
+				counter = sizes.counter()
+				if self.__write(project.path, filename, dict(context, **variables), counter):
+					changed.append(filename)
+				sizes.record(filename, sources, counter)
 
-	def __render(self, context, f):
-		"""__render(context:dict, f:file)
+		return outputs, changed
+
+
+	def getfilenames(self):
+		"""getfilenames()
+		Returns a list of (target, filename) tuples that map each of the
+		writer's targets to the name of the file it is written to. The first
+		task presenter target is written to template.html and the tutorial to
+		tutorial.html, while any other target is written to a file named after
+		its document and the target, e.g. template.pdf.html.
+		"""
+		filenames, documents = [], set()
+		for target in self.targets:
+			document, _ = HtmlWriter.TARGETS[target]
+			filename = "{}.html".format(document) if document not in documents else "{}.{}.html".format(document, target)
+			filenames.append((target, filename))
+			documents.add(document)
+
+		return filenames
+
+
+	def __write(self, path, filename, context, counter=None):
+		"""__write(path:string, filename:string, context:dict, counter:Counter)
+		Renders the document with the specified file name, in the specified
+		directory, and returns true if it was changed, false otherwise. The
+		document is rendered to a temporary file that only replaces the
+		existing one if their contents differ, so that an unchanged document
+		keeps its modification time, and a reader never sees a partially
+		written document.
+		"""
+		from src.atomicfile import AtomicFile
+
+		with AtomicFile(os.path.join(path, filename)) as output:
+			self.__render(context, output, counter)
+
+		return output.changed
+
+
+	def __render(self, context, f, counter=None):
+		"""__render(context:dict, f:file, counter:Counter)
 		Renders a Jinja2 template in the given context, to the specified file in HTML format.
+		The template is rendered as a stream, which means the document is never
+		entirely held in memory: it is written to the file in chunks of at most
+		CHUNK_SIZE characters, each of which may be minified if compression is enabled.
+		If a counter is specified, it measures the size of the document as it
+		is written.
 		"""
-		html = self.theme.template.render(context)
-		if html is not None and len(html) > 0:
-			if self.compress:
-				import htmlmin
-				html = htmlmin.minify(html, remove_comments=True, remove_empty_space=True)
+		stream = profiler.iterate("render", self.theme.template.generate(context))
+
+		# If the theme's templates are minified, only the interpolated fragments
+		# need to be compressed, which is done when the project is preprocessed.
+		if self.compress and not self.theme.minified:
+			from src.minifier import minifyhtml
+			stream = profiler.iterate("minify", minifyhtml(HtmlWriter.__buffer(stream)))
 
-			f.write(html.encode("UTF-8"))
+		for chunk in HtmlWriter.__buffer(stream):
+			with profiler.stage("write"):
+				data = chunk.encode("UTF-8")
+				f.write(data)
+				if counter is not None:
+					counter.update(data)
 
 
 	@staticmethod
-	def __preprocess(project):
+	def __buffer(stream):
+		"""__buffer(stream:iterable)
+		Returns a generator that concatenates the strings in the specified
+		stream into chunks of roughly CHUNK_SIZE characters. A string that is
+		larger than CHUNK_SIZE is yielded as is.
+		"""
+		chunk, size = [], 0
+		for string in stream:
+			chunk.append(string)
+			size += len(string)
+			if size >= HtmlWriter.CHUNK_SIZE:
+				yield "".join(chunk)
+				chunk, size = [], 0
+
+		if size > 0:
+			yield "".join(chunk)
+
+
+	@staticmethod
+	def __preprocess(project, compress=False):
 		# TODO Document me.
 		if project is not None:
 			# Convert the control-flow dictionary into a Javascript object.
 			import json
 			project.questionnaire.controlflow = json.dumps(project.questionnaire.controlflow)
 
+			# Serialize the jump table the presenter uses to find the next question.
+			# Since the table is embedded in a script, closing tags are escaped.
+			jumptable = json.dumps(project.questionnaire.graph.getjumptable(), separators=(",", ":"))
+			project.questionnaire.jumptable = jumptable.replace("</", "<\\/")
+
 			# Load questionnaire help, if it exists.
 			helpdir = os.path.join(project.path, "help")
 			if os.path.isdir(helpdir) and os.access(helpdir, os.R_OK):
@@ -129,20 +345,34 @@ class HtmlWriter:
 					if key in project.questionnaire.questions:
 						with open(filename) as file:
 							help = file.read().decode('utf-8').strip()
+							if len(help) > 0 and compress:
+								import htmlmin
+								help = htmlmin.minify(help, remove_comments=True, remove_empty_space=True)
 							if len(help) > 0:
 								project.questionnaire.questions[key].help = help
 
 		return project
 
 
+	@staticmethod
+	def getfilename(filename, locale=None):
+		"""getfilename(filename:string, locale:string)
+		Returns the name of the variant of the specified output file for the
+		specified locale, e.g. template.fr.html for the 'fr' locale. If no locale
+		is specified, the file name is returned as is.
+		"""
+		if locale is None:
+			return filename
+		else:
+			base, extension = os.path.splitext(filename)
+			return "{}.{}{}".format(base, locale, extension)
+
+
 	@staticmethod
 	def isreservedkeyword(keyword):
 		"""isreservedkeyword(keyword:string)
 		Returns true if the specified keyword is reserved for internal use by
 		the HtmlWriter, false otherwise.
 		"""
-		return keyword in [
-			"end",
-			"photoAccessible",
-			"photoVisible",
-		]
+		from src.question import RESERVED_KEYWORDS
+		return keyword in RESERVED_KEYWORDS
@@ -0,0 +1,218 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import json, os
+
+# The columns of a task row that are attributes of the task itself rather than
+# part of its info, as with PyBossa's own CSV importer, and their types.
+ATTRIBUTES = {
+	"n_answers":int,
+	"priority_0":float
+}
+
+# The default number of tasks sent between two checkpoints.
+DEFAULT_BATCH_SIZE = 100
+
+class Checkpoint:
+	filepath = None
+	source   = None
+	server   = None
+	project  = None
+	offset    = 0
+	done      = None
+	uncertain = None
+
+
+	def __init__(self, filepath, source, server, project):
+		"""__init__(filepath:string, source:string, server:string, project:string)
+		Instantiates a Checkpoint object that records which rows of the specified
+		source file were imported into the specified project of the specified
+		server, and stores them in the file located at the specified path. If
+		the file exists, the import it records is resumed. Since rows are sent
+		concurrently, a checkpoint stores the number of leading rows that were
+		imported, as well as the indices of imported rows past them. It also
+		stores the indices of the uncertain rows, i.e. rows whose request failed
+		in a way that does not show whether their task was created. Uncertain
+		rows are considered imported, so that they are never sent twice.
+		"""
+		self.filepath  = filepath
+		self.source    = os.path.realpath(source)
+		self.server    = server
+		self.project   = project
+		self.done      = set()
+		self.uncertain = set()
+
+		if os.path.isfile(filepath):
+			with open(filepath, "rb") as file:
+				try:
+					state = json.load(file)
+				except ValueError:
+					raise Exception("Error! The checkpoint file '{}' is corrupted.".format(filepath))
+
+			if [state.get("source"), state.get("server"), state.get("project")] != [self.source, server, project]:
+				raise Exception("Error! The checkpoint file '{}' records the import of '{}' into the project '{}' of the server '{}'. Use a different checkpoint file.".format(filepath, state.get("source"), state.get("project"), state.get("server")))
+
+			self.offset    = state.get("offset", 0)
+			self.done      = set(state.get("done", []))
+			self.uncertain = set(state.get("uncertain", []))
+
+
+	def isdone(self, index):
+		"""isdone(index:int)
+		Returns true if the row with the specified index was imported, false otherwise.
+		"""
+		return index < self.offset or index in self.done
+
+
+	def add(self, index, uncertain=False):
+		"""add(index:int, uncertain:bool)
+		Records the row with the specified index as imported, or as uncertain if
+		the uncertain flag is set. This method may be called by concurrent threads.
+		"""
+		if uncertain:
+			self.uncertain.add(index)
+		self.done.add(index)
+
+
+	def save(self):
+		"""save()
+		Writes the checkpoint to its file. The file is replaced atomically, so an
+		interrupted import never leaves a partially written checkpoint.
+		"""
+		from src.atomicfile import AtomicFile
+
+		while self.offset in self.done:
+			self.done.remove(self.offset)
+			self.offset += 1
+
+		with AtomicFile(self.filepath) as file:
+			file.write(json.dumps({
+				"source":self.source,
+				"server":self.server,
+				"project":self.project,
+				"offset":self.offset,
+				"done":sorted(self.done),
+				"uncertain":sorted(self.uncertain)
+			}, sort_keys=True))
+
+
+def importtasks(client, slug, filepath, checkpointpath=None, batchsize=DEFAULT_BATCH_SIZE, jobs=4, verbose=False):
+	"""importtasks(client:Client, slug:string, filepath:string, checkpointpath:string, batchsize:int, jobs:int, verbose:bool)
+	Creates a task for each row of the CSV or JSON file located at the
+	specified path in the project with the specified short name, and returns
+	the number of tasks that were created, the number of rows that were
+	skipped because a previous import had already created them, and the sorted
+	numbers of the uncertain rows recorded by the checkpoint, i.e. rows whose
+	request failed in a way that does not show whether their task was created,
+	e.g. because the response timed out. Uncertain rows are not sent again,
+	and do not interrupt the import. The rows are
+	streamed, in batches of the specified size, and the tasks of a batch are
+	sent by the specified number of threads over the client's pooled
+	connections. The checkpoint, stored in the specified file (by default, the
+	source file's path with a .checkpoint suffix), is saved after every batch
+	as well as when the import fails or is interrupted, so that running the
+	import again resumes it without creating any task twice.
+	"""
+	from multiprocessing.pool import ThreadPool
+	from src.rows import readrows
+	from src.client import UncertainError
+
+	if batchsize < 1 or jobs < 1:
+		raise Exception("Error! The batch size and the number of jobs must be positive integers.")
+
+	projectid  = client.getproject(slug)["id"]
+	checkpoint = Checkpoint(checkpointpath or filepath + ".checkpoint", filepath, client.endpoint, slug)
+
+	def create(entry):
+		index, row = entry
+		try:
+			client.createtask(gettask(projectid, row))
+		except UncertainError:
+			checkpoint.add(index, True)
+			return None
+		except Exception as e:
+			return "{} (row {})".format(e, index + 1)
+
+		checkpoint.add(index)
+		return None
+
+	imported, skipped = 0, 0
+	pool = ThreadPool(jobs)
+	try:
+		for batch in getbatches(readrows(filepath), batchsize):
+			pending = [entry for entry in batch if not checkpoint.isdone(entry[0])]
+			skipped += len(batch) - len(pending)
+			if len(pending) < 1:
+				continue
+
+			# Waiting for a result without a timeout can not be interrupted in Python 2.
+			uncertain = len(checkpoint.uncertain)
+			result = pool.map_async(create, pending)
+			while not result.ready():
+				result.wait(1)
+
+			errors = [error for error in result.get() if error is not None]
+			imported += len(pending) - len(errors) - (len(checkpoint.uncertain) - uncertain)
+			if len(errors) > 0:
+				raise Exception("{}\nThe import was interrupted after {} task(s) were created. Run it again to resume it.".format(errors[0], imported))
+
+			checkpoint.save()
+			if verbose:
+				print "Imported {} task(s), skipped {} row(s).".format(imported, skipped)
+
+		pool.close()
+	finally:
+		# Let the requests that were already sent complete, so that the checkpoint
+		# records every task that was created.
+		pool.terminate()
+		pool.join()
+		checkpoint.save()
+
+	return (imported, skipped, sorted(index + 1 for index in checkpoint.uncertain))
+
+
+def getbatches(rows, size):
+	"""getbatches(rows:iterable, size:int)
+	Returns an iterator over lists of at most the specified number of
+	(index, row) tuples, where index is the position of a row in the specified
+	rows.
+	"""
+	import itertools
+
+	rows = enumerate(rows)
+	while True:
+		batch = list(itertools.islice(rows, size))
+		if len(batch) < 1:
+			break
+		yield batch
+
+
+def gettask(projectid, row):
+	"""gettask(projectid:int, row:dict)
+	Returns the task for the specified row, in the project with the specified
+	identifier. Every column of the row is part of the task's info, except for
+	the task attributes, e.g. n_answers.
+	"""
+	task = {"project_id":projectid, "info":{}}
+	for key, value in row.iteritems():
+		if key not in ATTRIBUTES:
+			task["info"][key] = value
+		elif value not in ["", None]:
+			try:
+				task[key] = ATTRIBUTES[key](value)
+			except (TypeError, ValueError):
+				raise Exception("Error! The task attribute '{}' has the invalid value '{}'.".format(key, value))
+
+	return task
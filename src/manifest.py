@@ -0,0 +1,235 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os
+
+class Manifest:
+	FILENAME = ".build.manifest"
+	VERSION  = 1
+	INPUTS   = [
+		"project.json",
+		"project.yaml",
+		"tutorial.json",
+		"tutorial.yaml",
+		"project.js",
+		"project.css",
+	]
+
+	path    = None
+	inputs  = None
+	theme   = None
+	flags   = None
+	outputs = None
+	assets  = None
+
+
+	def __init__(self, path):
+		"""__init__(path:string)
+		Instantiates a Manifest object for the project located at the specified
+		path. If the project contains a readable manifest, it is loaded,
+		otherwise the manifest is empty.
+		"""
+		self.path    = path
+		self.inputs  = {}
+		self.outputs = []
+		self.assets  = []
+
+		try:
+			import json
+			with open(os.path.join(path, Manifest.FILENAME), "r") as file:
+				data = json.load(file)
+				if data.get("version") == Manifest.VERSION:
+					self.inputs  = data.get("inputs", {})
+					self.theme   = data.get("theme")
+					self.flags   = data.get("flags")
+					self.outputs = data.get("outputs", [])
+					self.assets  = data.get("assets", [])
+		except (IOError, ValueError, AttributeError):
+			# A missing or corrupt manifest is equivalent to an empty one: the
+			# project will simply be rebuilt.
+			pass
+
+
+	def isempty(self):
+		"""isempty()
+		Returns true if the manifest does not describe a previous build, false otherwise.
+		"""
+		return len(self.outputs) < 1
+
+
+	def isuptodate(self, theme, flags, inputs=None):
+		"""isuptodate(theme:string, flags:dict, inputs:dict)
+		Returns true if the outputs recorded in the manifest, as well as the
+		external assets they reference, exist and were built from the project's
+		current inputs, with the theme that has the specified digest and the
+		specified builder flags, false otherwise. The current inputs, as returned
+		by getinputs, are read if they are not specified. The check never
+		modifies the manifest (see refresh).
+		"""
+		if self.isempty() or self.theme != theme or self.flags != flags:
+			return False
+		elif not all(os.path.isfile(os.path.join(self.path, f)) for f in self.outputs):
+			return False
+		elif not all(os.path.isfile(f) for f in self.assets):
+			return False
+		else:
+			inputs = self.getinputs() if inputs is None else inputs
+			return Manifest.getdigests(inputs) == Manifest.getdigests(self.inputs)
+
+
+	def refresh(self, inputs):
+		"""refresh(inputs:dict)
+		Records the size and modification time of the specified current inputs,
+		as returned by getinputs, whose content is unchanged, and writes the
+		manifest if any of them differ. This keeps inputs that were touched
+		since the last build from being hashed again by every check.
+		"""
+		refreshed = dict(self.inputs)
+		for filename, state in inputs.iteritems():
+			previous = refreshed.get(filename)
+			if previous is not None and previous["digest"] == state["digest"]:
+				refreshed[filename] = state
+
+		if refreshed != self.inputs:
+			self.inputs = refreshed
+			self.write()
+
+
+	def getinputs(self):
+		"""getinputs()
+		Returns the state of the project's current input files, i.e. a dictionary
+		that maps each input file's path, relative to the project directory, to
+		its size, modification time and content digest. A file is only hashed if
+		its size or modification time differs from the one recorded in the
+		manifest, which keeps the check for an unchanged project cheap.
+		"""
+		inputs = {}
+		for filename in Manifest.listinputs(self.path):
+			try:
+				stat = os.stat(os.path.join(self.path, filename))
+			except OSError:
+				continue
+
+			previous = self.inputs.get(filename)
+			if previous is not None and previous["size"] == stat.st_size and previous["mtime"] == stat.st_mtime:
+				inputs[filename] = previous
+			else:
+				inputs[filename] = {
+					"size":stat.st_size,
+					"mtime":stat.st_mtime,
+					"digest":Manifest.getdigest([os.path.join(self.path, filename)])
+				}
+
+		return inputs
+
+
+	def update(self, inputs, theme, flags, outputs, assets=None):
+		"""update(inputs:dict, theme:string, flags:dict, outputs:list, assets:list)
+		Records the specified build in the manifest and writes it to the
+		project directory, unless it is unchanged. The assets are the paths to
+		the external asset files referenced by the outputs, if any.
+		"""
+		self.inputs  = inputs
+		self.theme   = theme
+		self.flags   = flags
+		self.outputs = outputs
+		self.assets  = assets or []
+		self.write()
+
+
+	def write(self):
+		"""write()
+		Writes the manifest to the project directory, unless it is unchanged.
+		"""
+		import json
+		from src.atomicfile import AtomicFile
+
+		with AtomicFile(os.path.join(self.path, Manifest.FILENAME)) as file:
+			json.dump({
+				"version":Manifest.VERSION,
+				"inputs":self.inputs,
+				"theme":self.theme,
+				"flags":self.flags,
+				"outputs":self.outputs,
+				"assets":self.assets
+			}, file, indent=1, sort_keys=True)
+
+
+	@staticmethod
+	def getdigests(inputs):
+		"""getdigests(inputs:dict)
+		Returns a dictionary that maps each of the specified inputs to its digest.
+		"""
+		return {filename:state["digest"] for filename, state in inputs.iteritems()}
+
+
+	@staticmethod
+	def listinputs(path):
+		"""listinputs(path:string)
+		Returns the paths, relative to the specified project directory, of the
+		project's input files.
+		"""
+		filenames = set(os.listdir(path))
+		inputs = [f for f in Manifest.INPUTS if f in filenames]
+
+		if "help" in filenames:
+			helpdir = os.path.join(path, "help")
+			if os.path.isdir(helpdir):
+				inputs.extend(sorted([os.path.join("help", f) for f in os.listdir(helpdir) if f.endswith(".html")]))
+
+		if "locales" in filenames:
+			from src.translation import iscatalog
+
+			localedir = os.path.join(path, "locales")
+			if os.path.isdir(localedir):
+				inputs.extend(sorted([os.path.join("locales", f) for f in os.listdir(localedir) if iscatalog(f)]))
+
+		return inputs
+
+
+	@staticmethod
+	def isinput(filename):
+		"""isinput(filename:string)
+		Returns true if the specified path, relative to a project directory,
+		is one of the project's input files, false otherwise.
+		"""
+		directory, basename = os.path.split(filename)
+		if directory == "":
+			return basename in Manifest.INPUTS
+		elif directory == "locales":
+			from src.translation import iscatalog
+			return iscatalog(basename)
+		else:
+			return directory == "help" and basename.endswith(".html")
+
+
+	@staticmethod
+	def getdigest(filepaths, root=None):
+		"""getdigest(filepaths:list, root:string)
+		Returns the SHA-1 digest of the content of the specified files. If a
+		root directory is specified, each file's path relative to it is also
+		included in the digest, so that renaming a file changes the digest.
+		"""
+		import hashlib
+
+		digest = hashlib.sha1()
+		for filepath in filepaths:
+			if root is not None:
+				digest.update(os.path.relpath(filepath, root) + "\0")
+			with open(filepath, "rb") as file:
+				for block in iter(lambda: file.read(65536), ""):
+					digest.update(block)
+
+		return digest.hexdigest()
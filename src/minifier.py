@@ -0,0 +1,411 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, re
+
+class MinificationCache:
+	DEFAULT_CAPACITY = 64 * 1024 * 1024
+
+	path = None
+	capacity = None
+	size = None
+
+
+	def __init__(self, path, capacity=None):
+		"""__init__(path:string, capacity:int)
+		Instantiates a MinificationCache object that stores minified sources
+		in the directory located at the specified path, and whose content is
+		limited to the specified number of bytes.
+		"""
+		self.path = path
+		self.capacity = MinificationCache.DEFAULT_CAPACITY if capacity is None else capacity
+
+
+	def get(self, key):
+		"""get(key:string)
+		Returns the minified source stored under the specified key, or None if
+		the cache does not contain it.
+		"""
+		filepath = self.getfilepath(key)
+		try:
+			with open(filepath, "rb") as file:
+				data = file.read().decode("utf-8")
+		except (IOError, OSError):
+			return None
+
+		# Mark the entry as recently used. The entry may belong to another user
+		# or be on a read-only file system, in which case it is still used.
+		try:
+			os.utime(filepath, None)
+		except OSError:
+			pass
+
+		return data
+
+
+	def put(self, key, data):
+		"""put(key:string, data:string)
+		Stores the minified source under the specified key. Entries are written
+		atomically so that the cache can be shared by several processes. If the
+		cache grows beyond its capacity, the least recently used entries are
+		evicted. Note that since caching is merely an optimization, any I/O
+		error is ignored.
+		"""
+		import tempfile
+
+		filepath = self.getfilepath(key)
+		data = data.encode("utf-8")
+		try:
+			directory = os.path.dirname(filepath)
+			if not os.path.isdir(directory):
+				os.makedirs(directory)
+
+			descriptor, temppath = tempfile.mkstemp(dir=directory, prefix=".tmp")
+			with os.fdopen(descriptor, "wb") as file:
+				file.write(data)
+			os.rename(temppath, filepath)
+		except (IOError, OSError):
+			return
+
+		if self.size is None:
+			self.size = sum([size for _, size, _ in self.getentries()])
+		else:
+			self.size += len(data)
+
+		if self.size > self.capacity:
+			self.evict()
+
+
+	def evict(self):
+		"""evict()
+		Removes the least recently used entries until the cache's content
+		occupies no more than 90% of its capacity.
+		"""
+		entries = sorted(self.getentries(), key=lambda entry: entry[2])
+		self.size = sum([size for _, size, _ in entries])
+
+		limit = self.capacity * 0.9
+		for filepath, size, _ in entries:
+			if self.size <= limit:
+				break
+			try:
+				os.remove(filepath)
+				self.size -= size
+			except OSError:
+				pass
+
+
+	def getentries(self):
+		"""getentries()
+		Returns a (path, size, time of last use) tuple for each entry in the cache.
+		"""
+		entries = []
+		for root, _, filenames in os.walk(self.path):
+			for filename in [f for f in filenames if not f.startswith(".tmp")]:
+				filepath = os.path.join(root, filename)
+				try:
+					stat = os.stat(filepath)
+					entries.append((filepath, stat.st_size, stat.st_mtime))
+				except OSError:
+					pass
+
+		return entries
+
+
+	def getfilepath(self, key):
+		"""getfilepath(key:string)
+		Returns the path to the file that stores the entry with the specified key.
+		"""
+		return os.path.join(self.path, key[:2], key[2:])
+
+
+	@staticmethod
+	def getkey(data, name, version, options):
+		"""getkey(data:string, name:string, version:string, options:dict)
+		Returns the key for the specified source, minified by the minifier with
+		the given name and version, and the specified options.
+		"""
+		import hashlib, json
+
+		digest = hashlib.sha1()
+		digest.update("\0".join([name, str(version), json.dumps(options, sort_keys=True)]) + "\0")
+		digest.update(data.encode("utf-8"))
+
+		return digest.hexdigest()
+
+
+# The cache used by the minification functions. It is set by calling setcache.
+_cache = None
+
+
+def setcache(cache):
+	"""setcache(cache:MinificationCache)
+	Sets the cache used by the minification functions. If the specified cache is
+	None, sources are always minified.
+	"""
+	global _cache
+	_cache = cache
+
+
+def minifyjs(data):
+	"""minifyjs(data:string)
+	Returns the specified Javascript source, minified.
+	"""
+	import slimit
+	options = {"mangle":True}
+	return _minify(data, "slimit", _getversion(slimit, "slimit"), options, lambda: slimit.minify(data, **options))
+
+
+def minifycss(data):
+	"""minifycss(data:string)
+	Returns the specified stylesheet, minified.
+	"""
+	import rcssmin
+	return _minify(data, "rcssmin", _getversion(rcssmin, "rcssmin"), {}, lambda: rcssmin.cssmin(data))
+
+
+def minifyhtml(chunks):
+	"""minifyhtml(chunks:iterable)
+	Minifies the HTML document formed by the specified sequence of chunks, and
+	returns a generator that yields the minified document in chunks. The
+	result is the same as when minifying the whole document at once, since
+	the parser never minifies a text node until it is complete (see
+	getstreamingparser).
+	"""
+	parser = getstreamingparser(remove_comments=True, remove_empty_space=True)
+	for chunk in chunks:
+		parser.feed(chunk)
+		data = parser.flush()
+		if len(data) > 0:
+			yield data
+
+	parser.close()
+	yield parser.result
+
+
+# The htmlmin parser subclass returned by getstreamingparser. It is created
+# when first needed, so that htmlmin is only loaded if HTML is minified.
+_StreamingParser = None
+
+
+def getstreamingparser(**options):
+	"""getstreamingparser(**options)
+	Returns an htmlmin parser, created with the specified htmlmin options,
+	whose output can be flushed while the document is fed to it: its flush
+	method returns the output produced so far and removes it from the parser,
+	which keeps the memory used bounded by the size of the input that is fed
+	at once. Text that ends a fed chunk may continue in the next one, so it is
+	only minified once the parser reports the event that follows it, e.g. a
+	tag, or when the parser is closed.
+	"""
+	global _StreamingParser
+	if _StreamingParser is None:
+		from htmlmin.parser import HTMLMinParser
+
+		class StreamingParser(HTMLMinParser):
+			pending  = None
+			boundary = False
+
+			def feed(self, data):
+				HTMLMinParser.feed(self, data)
+				self.boundary = True
+
+			def close(self):
+				HTMLMinParser.close(self)
+				self.flushdata()
+
+			def handle_data(self, data):
+				# Text that follows the text that ended the previous chunk is the
+				# rest of the same text node.
+				if self.pending is not None and self.boundary:
+					data = self.pending + data
+				else:
+					self.flushdata()
+				self.pending, self.boundary = data, False
+
+			def flushdata(self):
+				"""flushdata()
+				Minifies the pending text, now that it is known to be complete.
+				"""
+				if self.pending is not None:
+					data, self.pending = self.pending, None
+					HTMLMinParser.handle_data(self, data)
+
+			def handle_starttag(self, tag, attrs):
+				self.flushdata()
+				HTMLMinParser.handle_starttag(self, tag, attrs)
+
+			def handle_endtag(self, tag):
+				self.flushdata()
+				HTMLMinParser.handle_endtag(self, tag)
+
+			def handle_startendtag(self, tag, attrs):
+				self.flushdata()
+				HTMLMinParser.handle_startendtag(self, tag, attrs)
+
+			def handle_comment(self, data):
+				self.flushdata()
+				HTMLMinParser.handle_comment(self, data)
+
+			def handle_decl(self, decl):
+				self.flushdata()
+				HTMLMinParser.handle_decl(self, decl)
+
+			def handle_pi(self, data):
+				self.flushdata()
+				HTMLMinParser.handle_pi(self, data)
+
+			def unknown_decl(self, data):
+				self.flushdata()
+				HTMLMinParser.unknown_decl(self, data)
+
+			def handle_entityref(self, name):
+				self.flushdata()
+				HTMLMinParser.handle_entityref(self, name)
+
+			def handle_charref(self, name):
+				self.flushdata()
+				HTMLMinParser.handle_charref(self, name)
+
+			def flush(self):
+				"""flush()
+				Returns the output produced so far and removes it from the parser's
+				buffer, except for the buffer's last item, which the parser may
+				still inspect to avoid emitting consecutive whitespace. The buffer
+				is internal to htmlmin (which is pinned in requirements.txt): if it
+				is not a list, nothing is flushed and the whole output is returned
+				by the result property once the parser is closed.
+				"""
+				buffer = getattr(self, "_data_buffer", None)
+				if not isinstance(buffer, list) or len(buffer) < 2:
+					return ""
+
+				data = "".join(buffer[:-1])
+				del buffer[:-1]
+				return data
+
+		_StreamingParser = StreamingParser
+
+	return _StreamingParser(**options)
+
+
+def minifytemplate(source):
+	"""minifytemplate(source:string)
+	Returns the specified Jinja2 template source, minified. Template tags,
+	expressions and comments are replaced with placeholders before the source
+	is minified and restored afterwards, which leaves them intact. Attribute
+	quotes are also preserved since an attribute's value is not known until
+	the template is rendered. If any tag is lost in the process, e.g. because
+	it was part of an HTML comment, the source is returned unchanged.
+	"""
+	import htmlmin
+
+	tags = []
+	def replace(match):
+		tags.append(match.group(0))
+		return "{0}{1}z".format(_PLACEHOLDER, len(tags) - 1)
+
+	if _PLACEHOLDER in source:
+		return source
+
+	# Whitespace-only text that contains a newline is removed by the minifier.
+	# Since statements and comments produce no markup of their own, they are
+	# ignored when looking for such whitespace. Whitespace next to an
+	# expression is left to the minifier, which collapses it to a single space
+	# like that of any text, since the expression's value is not known. The
+	# content of <script>, <style>, <pre> and <textarea> elements is left
+	# untouched.
+	html, start = [], 0
+	for match in _RAW_PATTERN.finditer(source):
+		html.append(_BLOCK_WHITESPACE_PATTERN.sub(_stripblockwhitespace, source[start:match.start()]))
+		html.append(match.group(0))
+		start = match.end()
+	html.append(_BLOCK_WHITESPACE_PATTERN.sub(_stripblockwhitespace, source[start:]))
+
+	html = _TAG_PATTERN.sub(replace, "".join(html))
+	try:
+		html = htmlmin.minify(html, remove_comments=True, remove_empty_space=True, remove_optional_attribute_quotes=False)
+	except Exception:
+		return source
+
+	indices = [int(i) for i in re.findall(_PLACEHOLDER + r"(\d+)z", html)]
+	if indices != range(len(tags)):
+		return source
+
+	return re.sub(_PLACEHOLDER + r"(\d+)z", lambda match: tags[int(match.group(1))], html)
+
+
+def _stripblockwhitespace(match):
+	"""_stripblockwhitespace(match:MatchObject)
+	Returns the statements and comments in a sequence of whitespace, statements
+	and comments, if the whitespace contains a newline.
+	"""
+	text = match.group(0)
+	if "\n" in _BLOCK_PATTERN.sub("", text):
+		return "".join(_BLOCK_PATTERN.findall(text))
+	else:
+		return text
+
+
+# The pattern that matches Jinja2 statements, expressions and comments, and
+# the prefix of the placeholders that replace them when a template is minified.
+# Note that the placeholder is lowercase since the HTML parser converts tag and
+# attribute names to lowercase.
+_TAG_PATTERN = re.compile(r"\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}", re.DOTALL)
+_PLACEHOLDER = "jinjaplaceholder"
+
+# The patterns that match Jinja2 statements and comments, a sequence of
+# whitespace, statements and comments located between two HTML tags, and
+# elements whose content must not be minified.
+_BLOCK_PATTERN = re.compile(r"\{%(?:(?!%\}).)*%\}|\{#(?:(?!#\}).)*#\}", re.DOTALL)
+_BLOCK_WHITESPACE_PATTERN = re.compile(r"(?:(?<=>)|^)(?:\s|" + _BLOCK_PATTERN.pattern + r")+(?=<|$)", re.DOTALL)
+_RAW_PATTERN = re.compile(r"<(script|style|pre|textarea)\b.*?</\1\s*>", re.DOTALL | re.IGNORECASE)
+
+
+def _minify(data, name, version, options, minify):
+	"""_minify(data:string, name:string, version:string, options:dict, minify:function)
+	Returns the minified source, either from the cache or by calling the
+	specified minify function.
+	"""
+	if _cache is None:
+		return minify()
+
+	key = MinificationCache.getkey(data, name, version, options)
+	result = _cache.get(key)
+	if result is None:
+		result = minify()
+		_cache.put(key, result)
+
+	return result
+
+
+_versions = {}
+
+
+def _getversion(module, distribution):
+	"""_getversion(module:module, distribution:string)
+	Returns the version of the specified module. If the module does not define
+	its version, it is retrieved from the installed distribution's metadata.
+	"""
+	version = _versions.get(distribution)
+	if version is None:
+		version = getattr(module, "__version__", None)
+		if version is None:
+			import pkg_resources
+			version = pkg_resources.get_distribution(distribution).version
+
+		_versions[distribution] = version
+
+	return version
@@ -0,0 +1,194 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import json, threading, time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+
+class MockServer:
+	projects    = None
+	tasks       = None
+	apikey      = None
+	failures    = 0
+	status      = 503
+	stalls      = 0
+	delay       = 0
+	requests    = 0
+	connections = None
+	endpoint    = None
+	server      = None
+	lock        = None
+
+
+	def __init__(self, projects=None, apikey=None):
+		"""__init__(projects:list, apikey:string)
+		Instantiates a MockServer object, i.e. a stand-in for a PyBossa server
+		that implements the parts of its REST API used by the project builder,
+		and stores the specified projects, i.e. dictionaries with at least an id
+		and a short_name, as well as the tasks it receives, in memory. Updates
+		to a project are applied to its dictionary. If an API key is specified,
+		requests without it are rejected.
+		"""
+		self.projects    = projects or []
+		self.tasks       = []
+		self.apikey      = apikey
+		self.connections = set()
+		self.lock        = threading.Lock()
+
+
+	def start(self):
+		"""start()
+		Starts serving requests on an available local port, in a separate thread,
+		and returns the server's endpoint.
+		"""
+		self.server = _ThreadingHTTPServer(("127.0.0.1", 0), _RequestHandler)
+		self.server.mock = self
+		thread = threading.Thread(target=self.server.serve_forever, args=(0.05,))
+		thread.daemon = True
+		thread.start()
+
+		self.endpoint = "http://127.0.0.1:{}".format(self.server.server_address[1])
+		return self.endpoint
+
+
+	def stop(self):
+		"""stop()
+		Stops serving requests.
+		"""
+		self.server.shutdown()
+		self.server.server_close()
+
+
+	def fail(self, count, status=503):
+		"""fail(count:int, status:int)
+		Makes the server respond to the specified number of subsequent requests
+		with the specified error status, by default 503 (Service Unavailable),
+		without processing them.
+		"""
+		with self.lock:
+			self.failures = count
+			self.status   = status
+
+
+	def stall(self, count, delay):
+		"""stall(count:int, delay:float)
+		Makes the server wait for the specified number of seconds before it
+		responds to the specified number of subsequent task creations, once the
+		tasks are created.
+		"""
+		with self.lock:
+			self.stalls = count
+			self.delay  = delay
+
+
+	def getdelay(self, method, path):
+		"""getdelay(method:string, path:string)
+		Returns the number of seconds to wait before responding to a request
+		that was handled.
+		"""
+		with self.lock:
+			if method == "POST" and path == "/api/task" and self.stalls > 0:
+				self.stalls -= 1
+				return self.delay
+			return 0
+
+
+	def handle(self, method, path, params, payload):
+		"""handle(method:string, path:string, params:dict, payload:object)
+		Handles a request, and returns its response's status code and content.
+		"""
+		with self.lock:
+			self.requests += 1
+			if self.failures > 0:
+				self.failures -= 1
+				return (self.status, {"status":"failed", "exception_msg":"Error"})
+			elif self.apikey is not None and params.get("api_key") != self.apikey:
+				return (401, {"status":"failed", "exception_msg":"Unauthorized"})
+			elif method == "GET" and path == "/api/project":
+				return (200, [p for p in self.projects if all(str(p.get(k)) == v for k, v in params.iteritems() if k != "api_key")])
+			elif method == "PUT" and path.startswith("/api/project/"):
+				project = ([p for p in self.projects if "/api/project/{}".format(p["id"]) == path] or [None])[0]
+				if project is None:
+					return (404, {"status":"failed", "exception_msg":"Not Found"})
+				elif not isinstance(payload, dict) or "id" in payload:
+					return (400, {"status":"failed", "exception_msg":"Invalid project"})
+				project.update(payload)
+				return (200, project)
+			elif method == "POST" and path == "/api/task":
+				if not isinstance(payload, dict) or payload.get("project_id") not in [p["id"] for p in self.projects]:
+					return (400, {"status":"failed", "exception_msg":"Invalid task"})
+				task = dict(payload, id=len(self.tasks) + 1)
+				self.tasks.append(task)
+				return (200, task)
+			else:
+				return (404, {"status":"failed", "exception_msg":"Not Found"})
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+	daemon_threads = True
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+	# Keep connections alive, as PyBossa's web server does.
+	protocol_version = "HTTP/1.1"
+
+	# Send each response in a single write, instead of one per header line, so
+	# that small writes are not delayed by Nagle's algorithm.
+	wbufsize = -1
+
+
+	def do_GET(self):
+		self.respond("GET")
+
+
+	def do_POST(self):
+		self.respond("POST")
+
+
+	def do_PUT(self):
+		self.respond("PUT")
+
+
+	def respond(self, method):
+		"""respond(method:string)
+		Parses the current request, has the mock server handle it, and sends
+		its response.
+		"""
+		import urlparse
+
+		url    = urlparse.urlparse(self.path)
+		params = {k:v[-1] for k, v in urlparse.parse_qs(url.query).iteritems()}
+		length = int(self.headers.get("Content-Length") or 0)
+		try:
+			payload = json.loads(self.rfile.read(length)) if length > 0 else None
+		except ValueError:
+			payload = None
+
+		mock = self.server.mock
+		with mock.lock:
+			mock.connections.add(self.client_address)
+
+		status, content = mock.handle(method, url.path, params, payload)
+		time.sleep(mock.getdelay(method, url.path))
+		body = json.dumps(content)
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+
+	def log_message(self, format, *args):
+		pass
@@ -0,0 +1,230 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import time
+
+class Profiler:
+	path   = None
+	start  = None
+	stages = None
+	stack  = None
+
+
+	def __init__(self):
+		"""__init__()
+		Instantiates a Profiler object that measures the time spent in each
+		stage of a project's build.
+		"""
+		self.stages = {}
+		self.stack  = []
+
+
+	def begin(self, path):
+		"""begin(path:string)
+		Starts profiling the build of the project located at the specified path.
+		"""
+		self.path   = path
+		self.start  = time.time()
+		self.stages = {}
+		self.stack  = []
+
+
+	def end(self):
+		"""end()
+		Stops profiling the current build and returns its record, i.e. a
+		dictionary that contains the project's path, the build's total time,
+		the time spent in each stage and the peak memory usage of the process
+		that built it so far. Since the process may have built other projects
+		before, the latter is not the project's own memory usage.
+		"""
+		total = time.time() - self.start
+		return {
+			"path":self.path,
+			"time":total,
+			"stages":dict(self.stages, other=max(0.0, total - sum(self.stages.values()))),
+			"processmaxrss":Profiler.getmaxrss()
+		}
+
+
+	def enter(self, name):
+		"""enter(name:string)
+		Enters the stage with the specified name.
+		"""
+		self.stack.append([name, time.time(), 0.0])
+
+
+	def exit(self):
+		"""exit()
+		Exits the current stage. The time spent in a stage excludes the time
+		spent in the stages it encloses, so that the time of each stage is
+		only counted once.
+		"""
+		name, start, nested = self.stack.pop()
+		elapsed = time.time() - start
+		self.stages[name] = self.stages.get(name, 0.0) + elapsed - nested
+		if len(self.stack) > 0:
+			self.stack[-1][2] += elapsed
+
+
+	@staticmethod
+	def getmaxrss():
+		"""getmaxrss()
+		Returns the peak resident memory of the current process, in kilobytes,
+		or None if it can not be determined.
+		"""
+		try:
+			import resource, sys
+
+			maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+			return maxrss // 1024 if sys.platform == "darwin" else maxrss
+		except ImportError:
+			return None
+
+
+class _Stage:
+	profiler = None
+	name     = None
+
+
+	def __init__(self, profiler, name):
+		self.profiler = profiler
+		self.name     = name
+
+
+	def __enter__(self):
+		self.profiler.enter(self.name)
+
+
+	def __exit__(self, type, value, traceback):
+		self.profiler.exit()
+
+
+class _NoStage:
+	def __enter__(self):
+		pass
+
+
+	def __exit__(self, type, value, traceback):
+		pass
+
+
+# The profiler used by the current process, or None if profiling is disabled.
+# It is set by calling setprofiler. When profiling is disabled, the functions
+# below return shared no-op objects so that instrumented code runs at full speed.
+_profiler = None
+_nostage = _NoStage()
+
+
+def setprofiler(profiler):
+	"""setprofiler(profiler:Profiler)
+	Sets the profiler used by the current process. If the specified profiler
+	is None, profiling is disabled.
+	"""
+	global _profiler
+	_profiler = profiler
+
+
+def begin(path):
+	"""begin(path:string)
+	Starts profiling the build of the project located at the specified path.
+	"""
+	if _profiler is not None:
+		_profiler.begin(path)
+
+
+def end():
+	"""end()
+	Stops profiling the current build and returns its record, or None if
+	profiling is disabled.
+	"""
+	return None if _profiler is None else _profiler.end()
+
+
+def stage(name):
+	"""stage(name:string)
+	Returns a context manager that measures the time spent in the stage with
+	the specified name.
+	"""
+	return _nostage if _profiler is None else _Stage(_profiler, name)
+
+
+def iterate(name, iterable):
+	"""iterate(name:string, iterable:iterable)
+	Returns an iterator over the specified iterable that measures the time
+	spent producing its items in the stage with the specified name. This is
+	used to profile streams, e.g. a template that is rendered while it is
+	written to disk.
+	"""
+	return iterable if _profiler is None else _iterate(_profiler, name, iter(iterable))
+
+
+def _iterate(profiler, name, iterator):
+	"""_iterate(profiler:Profiler, name:string, iterator:iterator)
+	Returns a generator that yields the items of the specified iterator, and
+	measures the time spent producing them.
+	"""
+	while True:
+		profiler.enter(name)
+		try:
+			item = next(iterator)
+		except StopIteration:
+			return
+		finally:
+			profiler.exit()
+
+		yield item
+
+
+def writereport(records, filepath):
+	"""writereport(records:list, filepath:string)
+	Writes the specified build records to the file located at the specified
+	path, one JSON object per line.
+	"""
+	import json
+
+	with open(filepath, "w") as file:
+		for record in records:
+			file.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def summarize(records, top=10):
+	"""summarize(records:list, top:int)
+	Returns a summary of the specified build records, i.e. the top slowest
+	projects, the total time spent in each stage and the peak memory usage of
+	the largest build process, in the form of a string.
+	"""
+	if len(records) < 1:
+		return "No build was profiled."
+
+	lines = ["Slowest projects:"]
+	for record in sorted(records, key=lambda r: r["time"], reverse=True)[:top]:
+		slowest = max(record["stages"].iteritems(), key=lambda s: s[1])
+		lines.append("  {:>9.1f} ms  {} (slowest stage: {}, {:.1f} ms)".format(record["time"] * 1000, record["path"], slowest[0], slowest[1] * 1000))
+
+	stages = {}
+	for record in records:
+		for name, elapsed in record["stages"].iteritems():
+			stages[name] = stages.get(name, 0.0) + elapsed
+
+	total = sum(stages.values()) or 1.0
+	lines.append("Slowest stages:")
+	for name, elapsed in sorted(stages.iteritems(), key=lambda s: s[1], reverse=True)[:top]:
+		lines.append("  {:>9.1f} ms  {:5.1f}%  {}".format(elapsed * 1000, elapsed * 100 / total, name))
+
+	maxrss = [r["processmaxrss"] for r in records if r["processmaxrss"] is not None]
+	if len(maxrss) > 0:
+		lines.append("Process peak RSS: {:.1f} MB".format(max(maxrss) / 1024.0))
+
+	return "\n".join(lines)
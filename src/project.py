@@ -17,14 +17,8 @@ import os
 from src.questionnaire import Questionnaire
 from src.tutorial import Tutorial
 
-class Project:
-	path = None
-	name = None
-	slug = None
-	description = None
-	why = None
-	questionnaire = None
-	tutorial = None
+class Project(object):
+	__slots__ = ("path", "name", "slug", "description", "why", "questionnaire", "tutorial")
 
 
 	def __init__(self, path):
@@ -41,10 +35,12 @@ class Project:
 		if config is None:
 			raise IOError("The directory '{}' does not contain a GeoTag-X project configuration file or you may not have sufficient access permissions.".format(path))
 		else:
-			# Check for mandatory keys.
-			for field in ["name", "short_name", "description", "why", "questionnaire"]:
-				if field not in config:
-					raise Exception("Error! The project configuration is missing the field '{}'.".format(field))
+			from src import schema
+
+			# Every structural error is reported at once.
+			errors = schema.validate("project", config)
+			if len(errors) > 0:
+				raise Exception("\n".join(errors))
 
 			self.path = os.path.realpath(path)
 			self.name = config["name"].strip()
@@ -91,8 +87,10 @@ class Project:
 			with open(os.path.join(self.path, "project.js"), "r") as file:
 				data = file.read().decode('utf-8')
 				if data is not None:
-					import slimit
-					data = slimit.minify(data, mangle=True)
+					from src.minifier import minifyjs
+					from src.profiler import stage
+					with stage("js"):
+						data = minifyjs(data)
 					if len(data) > 0:
 						js = data
 		except IOError:
@@ -113,8 +111,10 @@ class Project:
 			with open(os.path.join(self.path, "project.css"), "r") as file:
 				data = file.read().decode('utf-8')
 				if data is not None:
-					import rcssmin
-					data = rcssmin.cssmin(data)
+					from src.minifier import minifycss
+					from src.profiler import stage
+					with stage("css"):
+						data = minifycss(data)
 					if len(data) > 0:
 						css = data
 		except IOError:
@@ -147,58 +147,50 @@ class Project:
 		"""
 		configuration = None
 		if path is not None and len(path) > 0:
-			import json, yaml
-			parsers = {
-				".json":lambda file: json.loads(file.read()),
-				".yaml":lambda file: yaml.load(file)
-			}
-			configuration = Project.getprojectconfiguration(path, parsers)
+			# List the directory once instead of probing for each configuration file.
+			filenames = set(os.listdir(path))
+			configuration = Project.getprojectconfiguration(path, filenames)
 			if configuration is not None:
-				configuration["tutorial"] = Project.gettutorialconfiguration(path, parsers)
+				configuration["tutorial"] = Project.gettutorialconfiguration(path, filenames)
 
 		return configuration
 
 
 	@staticmethod
-	def getprojectconfiguration(path, parsers):
-		"""getprojectconfiguration(path:string, parsers:dict)
+	def getprojectconfiguration(path, filenames):
+		"""getprojectconfiguration(path:string, filenames:set)
 		Returns the project configuration for the project located at the
-		specified path.
+		specified path, where the specified files are located.
 		"""
-		for filename in ["project.json", "project.yaml"]:
-			filename = os.path.join(path, filename)
-			if os.access(filename, os.F_OK | os.R_OK):
-				extension = os.path.splitext(filename)[1]
-				parser = parsers.get(extension)
-				if parser:
-					with open(filename) as file:
-						configuration = parser(file)
-						if configuration is not None:
-							return configuration
-				else:
-					print "Error! Could not find a suitable configuration file parser for the extension '{}'.".format(extension)
-
-		return None
+		return Project.loadconfiguration(path, filenames, ["project.json", "project.yaml"])
 
 
 	@staticmethod
-	def gettutorialconfiguration(path, parsers):
-		"""gettutorialconfiguration(path:string, parsers:dict)
+	def gettutorialconfiguration(path, filenames):
+		"""gettutorialconfiguration(path:string, filenames:set)
 		Returns the tutorial configuration for the project located at the
-		specified path.
+		specified path, where the specified files are located.
+		"""
+		configuration = Project.loadconfiguration(path, filenames, ["tutorial.json", "tutorial.yaml"])
+		return None if configuration is None else configuration.get("tutorial")
+
+
+	@staticmethod
+	def loadconfiguration(path, filenames, candidates):
+		"""loadconfiguration(path:string, filenames:set, candidates:list)
+		Returns the content of the first readable configuration file, from the
+		specified candidates, that is located in the project directory.
 		"""
-		for filename in ["tutorial.json", "tutorial.yaml"]:
-			filename = os.path.join(path, filename)
-			if os.access(filename, os.F_OK | os.R_OK):
-				extension = os.path.splitext(filename)[1]
-				parser = parsers.get(extension)
-				if parser:
-					with open(filename) as file:
-						configuration = parser(file)
-						if configuration is not None:
-							return configuration.get("tutorial")
-				else:
-					print "Error! Could not find a suitable configuration file parser for the extension '{}'.".format(extension)
+		from src import configuration
+
+		for filename in [f for f in candidates if f in filenames]:
+			try:
+				content = configuration.load(os.path.join(path, filename))
+				if content is not None:
+					return content
+			except IOError:
+				# Like an inaccessible file, an unreadable one is ignored.
+				pass
 
 		return None
 
@@ -229,7 +221,8 @@ class Project:
 		"""isname(name:string)
 		Returns true if the specified name is valid, false otherwise.
 		"""
-		return (True, None)
+		from src import schema
+		return schema.isvalid("name", name)
 
 
 	@staticmethod
@@ -237,7 +230,8 @@ class Project:
 		"""isslug(slug:string)
 		Returns true if the specified slug (short name) is valid, false otherwise.
 		"""
-		return (True, None)
+		from src import schema
+		return schema.isvalid("slug", short_name)
 
 
 	@staticmethod
@@ -245,7 +239,8 @@ class Project:
 		"""isdescription(description:string)
 		Returns true if the specified description is valid, false otherwise.
 		"""
-		return (True, None)
+		from src import schema
+		return schema.isvalid("description", description)
 
 
 	@staticmethod
@@ -253,12 +248,14 @@ class Project:
 		"""iswhy(why:string)
 		Returns true if the specified reason is valid, false otherwise.
 		"""
-		return (True, None)
+		from src import schema
+		return schema.isvalid("why", why)
 
 
 	@staticmethod
 	def istutorial(tutorial):
-		"""iswhy(tutorial:dict)
-		Returns true if the specified tutorial is valid, false otherwise.
+		"""istutorial(tutorial:Tutorial)
+		Returns true if the specified tutorial is valid, false otherwise. Since
+		a tutorial is optional, None is considered valid.
 		"""
-		return Tutorial.isvalid(tutorial)
+		return (True, None) if tutorial is None else Tutorial.isvalid(tutorial.entries)
@@ -13,13 +13,79 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
-class Question:
-	key = None
-	type = None
-	question = None
-	hint = None
-	help = None
-	parameters = None
+import re
+
+# The keywords reserved for internal use by the HtmlWriter, which can not be
+# used as question keys. They are defined here so that questions can be
+# validated without loading the HtmlWriter and its template engine.
+RESERVED_KEYWORDS = frozenset([
+	"end",
+	"photoAccessible",
+	"photoVisible",
+])
+
+
+def _freeze(value):
+	"""_freeze(value:object)
+	Returns a read-only version of the specified parameter value, where lists
+	are converted into tuples and dictionaries into Parameters, recursively.
+	"""
+	if isinstance(value, Parameters):
+		return value
+	elif isinstance(value, dict):
+		return Parameters(value)
+	elif isinstance(value, (list, tuple)):
+		return tuple(_freeze(v) for v in value)
+	else:
+		return value
+
+
+class Parameters(dict):
+	"""
+	A read-only dictionary of question parameters. Questions that do not
+	override any default parameter share the same Parameters object, which
+	is why it can not be modified. Nested values are frozen as well, i.e.
+	lists are converted into tuples and dictionaries into Parameters. To
+	change a question's parameters, use Question.setparameter which copies
+	them first.
+	"""
+	__slots__ = ()
+
+
+	def __init__(self, *args, **kwargs):
+		dict.__init__(self, [(k, _freeze(v)) for k, v in dict(*args, **kwargs).iteritems()])
+
+
+	def __readonly(self, *args, **kwargs):
+		raise TypeError("Error! Question parameters are read-only. Use Question.setparameter instead.")
+
+
+	__setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __readonly
+
+
+	def __reduce__(self):
+		# Parameters are rebuilt from a plain dictionary, since the default
+		# reconstruction sets each item.
+		return (Parameters, (dict(self),))
+
+
+	def __copy__(self):
+		return self
+
+
+	def __deepcopy__(self, memo):
+		return self
+
+
+	def copy(self):
+		"""copy()
+		Returns a modifiable copy of the parameters.
+		"""
+		return dict(self)
+
+
+class Question(object):
+	__slots__ = ("key", "type", "question", "hint", "help", "parameters")
 	__default_parameters = {
 		"binary":{},
 		"dropdown-list":{
@@ -69,7 +135,10 @@ class Question:
 		"geotagging":{
 			"location":None
 		},
+		"custom":{},
 	}
+	# The default parameters are shared by every question of the same type.
+	__default_parameters = {type:Parameters(parameters) for type, parameters in __default_parameters.iteritems()}
 
 
 	def __init__(self, key, configuration):
@@ -78,8 +147,9 @@ class Question:
 		"""
 		self.key        = key
 
+		# Types are interned since many questions share them.
 		self.type       = configuration.get("type")
-		self.type       = self.type.strip() if isinstance(self.type, basestring) else None
+		self.type       = _intern(self.type.strip()) if isinstance(self.type, basestring) else None
 
 		self.question   = configuration.get("question")
 		self.question   = self.question.strip() if isinstance(self.question, basestring) else None
@@ -87,6 +157,7 @@ class Question:
 		self.hint       = configuration.get("hint")
 		self.hint       = self.hint.strip() if isinstance(self.hint, basestring) else None
 
+		self.help       = None
 		self.parameters = Question.getparameters(self.type, configuration.get("parameters"))
 
 		valid, message = Question.isvalid(self)
@@ -94,25 +165,72 @@ class Question:
 			raise Exception(message)
 
 
+	def setparameter(self, name, value):
+		"""setparameter(name:string, value:object)
+		Sets the value of the parameter with the specified name. Since
+		parameters may be shared with other questions, they are copied before
+		they are modified.
+		"""
+		parameters = self.parameters.copy()
+		parameters[name] = value
+		self.parameters = Parameters(parameters)
+
+
 	@staticmethod
 	def isvalid(question):
 		"""isvalid(question:Question)
 		Returns true if the question is valid, false otherwise.
 		"""
-		validations = {
-			Question.iskey:        question.key,
-			Question.istype:       question.type,
-			Question.isquestion:   question.question,
-			Question.isparameters: question.parameters
-		}
-		for validator, value in validations.items():
-			valid, message = validator(value)
+		validations = [
+			(Question.iskey,        (question.key,)),
+			(Question.istype,       (question.type,)),
+			(Question.isquestion,   (question.question,)),
+			(Question.isparameters, (question.parameters, question.type))
+		]
+		for validator, args in validations:
+			valid, message = validator(*args)
 			if not valid:
 				return (False, message)
 
 		return (True, None)
 
 
+	@staticmethod
+	def validate(configurations):
+		"""validate(configurations:list)
+		Validates the semantics of the specified question configurations in
+		bulk, without instantiating Question objects, and returns a list of
+		(index, message) tuples that describe every error found, where the index
+		is that of the offending configuration. Keys are not checked for
+		uniqueness. Fields that are missing or of the wrong type are skipped,
+		since the structure of a configuration is validated by its JSON schema
+		(see src.schema).
+		"""
+		errors = []
+		for index, configuration in enumerate(configurations):
+			if not isinstance(configuration, dict):
+				continue
+
+			key, type, question, parameters = [configuration.get(f) for f in ["key", "type", "question", "parameters"]]
+			validations = []
+			if isinstance(key, basestring):
+				validations.append((Question.iskey, (key.strip(),)))
+			if isinstance(type, basestring):
+				type = type.strip()
+				validations.append((Question.istype, (type,)))
+				if isinstance(parameters, dict):
+					validations.append((Question.isparameters, (parameters, type)))
+			if isinstance(question, basestring):
+				validations.append((Question.isquestion, (question.strip(),)))
+
+			for validator, args in validations:
+				valid, message = validator(*args)
+				if not valid:
+					errors.append((index, message))
+
+		return errors
+
+
 	@staticmethod
 	def iskey(key):
 		"""iskey(key:string)
@@ -121,16 +239,13 @@ class Question:
 		composed of alphanumeric characters, hypens or underscores, and no
 		whitespace. It must also not be a reserved keyword.
 		"""
-		from src.htmlwriter import HtmlWriter
-		from re import match
-
 		valid, message = False, None
 
 		if not isinstance(key, basestring) or len(key) < 1:
 			message = "Error! A question key must be a non-empty string."
-		elif match(r"[\w-]*", key).group() != key:
+		elif _KEY_PATTERN.match(key) is None:
 			message = "Error! The key '{}' contains an illegal character. A key may only contain letters (a-z, A-Z), numbers (0-9), hyphens (-), and underscores (_). It must not contain any whitespace.".format(key)
-		elif HtmlWriter.isreservedkeyword(key):
+		elif key in RESERVED_KEYWORDS:
 			message = "Error! The string '{}' is a reserved keyword and can not be used as a question key.".format(key)
 		else:
 			valid = True
@@ -143,31 +258,9 @@ class Question:
 		"""istype(type:string)
 		Returns true if the type is valid, false otherwise.
 		"""
-		types = [
-			"binary",
-			"dropdown-list",
-			"select",
-			"checklist",
-			"illustrative-checklist",
-			"text",
-			"longtext",
-			"number",
-			"datetime",
-			"date",
-			"url",
-			"geotagging",
-			"custom"
-		]
-		deprecated = {
-			"single_choice":"select",
-			"multiple_choice":"checklist",
-			"illustrated_multiple_choice":"illustrative-checklist",
-			"textinput":"text",
-			"textarea":"longtext"
-		}
-		if type not in types:
-			if type in deprecated:
-				return (False, "Error! The question type '{}' is deprecated and has been replaced with '{}'.".format(type, deprecated.get(type)))
+		if type not in TYPES:
+			if type in _DEPRECATED_TYPES:
+				return (False, "Error! The question type '{}' is deprecated and has been replaced with '{}'.".format(type, _DEPRECATED_TYPES[type]))
 			else:
 				return (False, "Error! The question type '{}' is not recognized.".format(type))
 		else:
@@ -187,28 +280,109 @@ class Question:
 
 
 	@staticmethod
-	def isparameters(parameters):
-		"""isparameters(parameters:dict)
-		Returns true if the parameters are valid, false otherwise.
+	def isparameters(parameters, type=None):
+		"""isparameters(parameters:dict, type:string)
+		Returns true if the parameters are valid, false otherwise. If a question
+		type is specified, the value of each parameter known to that type must
+		also have the expected type, or be None. Parameters that are unknown to
+		the type are ignored.
 		"""
-		if parameters is None or isinstance(parameters, dict):
+		if parameters is None:
 			return (True, None)
-		else:
+		elif not isinstance(parameters, dict):
 			return (False, "Error! Question parameters must be a dictionary.")
 
+		schema = _PARAMETER_SCHEMAS.get(type)
+		if schema is not None:
+			for name, value in parameters.iteritems():
+				expected = schema.get(name)
+				if expected is not None and value is not None and (not isinstance(value, expected[0]) or isinstance(value, bool)):
+					return (False, "Error! The parameter '{}' of a '{}' question must be {}.".format(name, type, expected[1]))
+
+		return (True, None)
+
 
 	@staticmethod
 	def getparameters(type, defaults=None):
 		"""getparameters(type:string, defaults:dict)
 		Returns the parameters for the specified type of question. If the
 		defaults object is not empty, then any parameter found in it will be
-		used as a default value.
+		used as a default value. Since the returned parameters are read-only,
+		questions without user-defined values share the type's defaults.
 		"""
-		parameters = Question.__default_parameters[type].copy()
+		parameters = Question.__default_parameters.get(type, _NO_PARAMETERS)
 
-		# Set the user-defined default values.
-		if defaults is not None:
-			for key in [k for k in defaults if defaults[k] is not None]:
-				parameters[key] = defaults[key]
+		# Set the user-defined default values, in a copy of the defaults. Note
+		# that invalid parameters are returned as is, so that they are reported
+		# when the question is validated.
+		if not isinstance(defaults, dict):
+			return parameters if defaults is None else defaults
+		else:
+			overrides = {_intern(k):v for k, v in defaults.iteritems() if v is not None}
+			if len(overrides) > 0:
+				parameters = parameters.copy()
+				parameters.update(overrides)
+				parameters = Parameters(parameters)
 
 		return parameters
+
+
+def _intern(string):
+	"""_intern(string:string)
+	Returns the interned version of the specified string, so that equal keys
+	and types share the same object. Strings that can not be interned, i.e.
+	non-ASCII unicode strings, are returned unchanged.
+	"""
+	try:
+		return intern(str(string))
+	except UnicodeError:
+		return string
+
+
+# The validation tables, which are built once. A key may only contain letters,
+# numbers, hyphens and underscores. Each parameter schema maps a parameter's
+# name to a tuple of the types its value may have, and a description of them.
+# Note that booleans are never accepted, even though they are integers.
+_KEY_PATTERN = re.compile(r"[\w-]+\Z")
+TYPES = frozenset([
+	"binary",
+	"dropdown-list",
+	"select",
+	"checklist",
+	"illustrative-checklist",
+	"text",
+	"longtext",
+	"number",
+	"datetime",
+	"date",
+	"url",
+	"geotagging",
+	"custom",
+])
+_DEPRECATED_TYPES = {
+	"single_choice":"select",
+	"multiple_choice":"checklist",
+	"illustrated_multiple_choice":"illustrative-checklist",
+	"textinput":"text",
+	"textarea":"longtext",
+}
+_NO_PARAMETERS = Parameters()
+
+_STRING  = ((basestring,), "a string")
+_INTEGER = ((int, long), "an integer")
+_NUMBER  = ((int, long, float), "a number")
+_OPTIONS = ((list, tuple), "a list of options")
+_PARAMETER_SCHEMAS = {
+	"binary":{},
+	"dropdown-list":{"options":_OPTIONS, "prompt":_STRING, "size":_INTEGER},
+	"select":{"options":_OPTIONS, "size":_INTEGER},
+	"checklist":{"options":_OPTIONS, "size":_INTEGER},
+	"illustrative-checklist":{"options":_OPTIONS},
+	"text":{"placeholder":_STRING, "maxlength":_INTEGER},
+	"longtext":{"placeholder":_STRING, "maxlength":_INTEGER},
+	"number":{"placeholder":_STRING, "min":_NUMBER, "max":_NUMBER, "maxlength":_INTEGER},
+	"datetime":{"mindate":_STRING, "maxdate":_STRING, "mintime":_STRING, "maxtime":_STRING},
+	"date":{"min":_STRING, "max":_STRING},
+	"url":{"placeholder":_STRING, "maxlength":_INTEGER},
+	"geotagging":{"location":((basestring, list, tuple, dict), "a string, list or dictionary")},
+}
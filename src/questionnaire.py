@@ -14,11 +14,10 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 from src.question import Question
+from src.controlflow import ControlFlowGraph
 
-class Questionnaire:
-	questions = None
-	questiontypes = None
-	controlflow = None
+class Questionnaire(object):
+	__slots__ = ("questions", "questiontypes", "controlflow", "graph", "jumptable")
 
 
 	def __init__(self, questions):
@@ -26,6 +25,12 @@ class Questionnaire:
 		Instantiates a Questionnaire object from the list of specified questions.
 		"""
 		assert isinstance(questions, list), "Error! The 'questions' field must be a list."
+		self.questions = None
+		self.questiontypes = None
+		self.controlflow = None
+		self.graph = None
+		self.jumptable = None
+
 		if len(questions) < 1:
 			raise Exception("Error! A questionnaire requires one or more questions.")
 		else:
@@ -44,7 +49,7 @@ class Questionnaire:
 						raise Exception("Error! A questionnaire entry is missing the field '{}'.".format(field))
 
 				key = configuration["key"]
-				key = str(key).strip() if isinstance(key, basestring) else None
+				key = intern(str(key).strip()) if isinstance(key, basestring) else None
 
 				valid, message = self.iskey(key, configuration["question"])
 				if valid:
@@ -62,6 +67,9 @@ class Questionnaire:
 				for key in branch.keys():
 					branch[key.lower()] = branch.pop(key)
 
+			# Compile the control flow into a graph, which also validates it.
+			self.graph = ControlFlowGraph(self.questions.keys(), self.controlflow)
+
 			valid, message = Questionnaire.isvalid(self)
 			if not valid:
 				raise Exception(message)
@@ -91,29 +99,6 @@ class Questionnaire:
 		return (True, None)
 
 
-	def isbranchablekey(self, key):
-		"""isbranchablekey(key:string|dict)
-		Returns true if the specified key is valid, false otherwise.
-		A branch key is valid if
-
-		a iff it branches to an existing or predefined key. As
-		such, this method is best used when the entire questionnaire has been
-		parsed.
-		"""
-		valid, message = True, None
-		if not (isinstance(key, basestring) or isinstance(key, dict)):
-			valid, message = False, "Error! The key is not a string or dictionary."
-		elif isinstance(key, basestring) and not (key in self.questions or key == "end"):
-			valid, message = False, "Error! The key '{}' does not correspond to a question.".format(key)
-		elif isinstance(key, dict):
-			for subkey in key.values():
-				valid, message = self.isbranchablekey(subkey)
-				if not valid:
-					break
-
-		return (valid, message)
-
-
 	def __len__(self):
 		"""
 		Returns the number of questions in the questionnaire.
@@ -129,6 +114,11 @@ class Questionnaire:
 		for i, entry in enumerate(self.questions.values(), start=1):
 			output.append("{}. {} ({})".format(i, entry.question, entry.key))
 
+		if self.graph is not None and self.graph.getmaxpathlength() is not None:
+			output.append("Longest path: {} question(s)".format(self.graph.getmaxpathlength()))
+			if len(self.graph.orphans) > 0:
+				output.append("Unreachable questions: {}".format(", ".join(self.graph.orphans)))
+
 		return "\n".join(output) if len(output) > 0 else "Empty questionnaire."
 
 
@@ -147,10 +137,7 @@ class Questionnaire:
 
 				# If the questionnaire entries are valid, validate the control flow.
 				if valid and questionnaire.controlflow is not None:
-					for k in [k for k in questionnaire.controlflow.values() if k is not None]:
-						valid, message = questionnaire.isbranchablekey(k)
-						if not valid:
-							break
+					valid, message = ControlFlowGraph.isvalid(questionnaire.graph)
 			else:
 				valid, message = False, "Error! Empty questionnaire. A questionnaire must contain at least one question."
 		else:
@@ -0,0 +1,114 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import json, os, re
+
+# The extensions of JSON files, which contain either one JSON object per line
+# (JSON lines) or an array of JSON objects, e.g. a PyBossa export.
+JSON_EXTENSIONS = [".jsonl", ".ndjson", ".json"]
+
+# The number of bytes read at a time from a JSON array.
+BLOCK_SIZE = 65536
+
+def readrows(filepath):
+	"""readrows(filepath:string)
+	Returns an iterator over the rows of the CSV or JSON file located at the
+	specified path. Each row is a dictionary that maps a column name to its
+	value, and the file is read one row at a time, so that files of any size
+	are read in constant memory. The first line of a CSV file contains the
+	column names.
+	"""
+	extension = os.path.splitext(filepath)[1].lower()
+	if extension == ".csv":
+		return _readcsv(filepath)
+	elif extension in JSON_EXTENSIONS:
+		return _readjson(filepath)
+	else:
+		raise Exception("Error! The file '{}' is neither a CSV (.csv) nor a JSON ({}) file.".format(filepath, ", ".join(JSON_EXTENSIONS)))
+
+
+def _readcsv(filepath):
+	"""_readcsv(filepath:string)
+	Returns an iterator over the rows of the UTF-8 encoded CSV file located at
+	the specified path. Values in excess of the column names are ignored.
+	"""
+	import csv
+
+	with open(filepath, "rb") as file:
+		for row in csv.DictReader(file):
+			yield {key.decode("UTF-8").strip():(value or "").decode("UTF-8") for key, value in row.iteritems() if key}
+
+
+def _readjson(filepath):
+	"""_readjson(filepath:string)
+	Returns an iterator over the objects in the JSON lines file, or JSON array,
+	located at the specified path.
+	"""
+	with open(filepath, "rb") as file:
+		head = file.read(BLOCK_SIZE)
+		if head.lstrip().startswith("["):
+			rows = _readjsonarray(file, head)
+		else:
+			file.seek(0)
+			rows = _readjsonlines(file)
+
+		for number, row in rows:
+			if not isinstance(row, dict):
+				raise Exception("Error! The row {} of the file '{}' is not a JSON object.".format(number, filepath))
+			yield row
+
+
+def _readjsonlines(file):
+	"""_readjsonlines(file:file)
+	Returns an iterator over the (line number, value) tuples of the specified
+	JSON lines file. Empty lines are ignored, while a line that is not valid
+	JSON has no value.
+	"""
+	for number, line in enumerate(file, 1):
+		if len(line.strip()) > 0:
+			try:
+				yield (number, json.loads(line))
+			except ValueError:
+				yield (number, None)
+
+
+def _readjsonarray(file, buffer):
+	"""_readjsonarray(file:file, buffer:string)
+	Returns an iterator over the (index, value) tuples of the JSON array stored
+	in the specified file, whose first bytes have already been read into the
+	specified buffer. The file is read one block at a time, and each element is
+	decoded as soon as it has been read in full.
+	"""
+	decoder    = json.JSONDecoder()
+	separators = re.compile(r"[\s,]*")
+	position   = buffer.index("[") + 1
+	number     = 0
+	while True:
+		position = separators.match(buffer, position).end()
+		if buffer.startswith("]", position):
+			break
+		try:
+			value, position = decoder.raw_decode(buffer, position)
+		except ValueError:
+			# The element is incomplete: read the next block, unless the file
+			# has been read in full, in which case the element is invalid.
+			block = file.read(BLOCK_SIZE)
+			if len(block) < 1:
+				yield (number + 1, None)
+				break
+			buffer, position = buffer[position:] + block, 0
+		else:
+			number += 1
+			yield (number, value)
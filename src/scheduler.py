@@ -0,0 +1,84 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# The task that is run by the current (worker) process. It is created once per
+# process by the _initialize function, so that expensive state such as a Theme
+# is shared by every project the process handles.
+_task = None
+_error = None
+
+
+def schedule(paths, factory, args=(), jobs=1, chunksize=1):
+	"""schedule(paths:iterable, factory:callable, args:tuple, jobs:int, chunksize:int)
+	Runs a task on each of the specified paths and returns a list of
+	(path, result, error) tuples, sorted by path. The task is created by
+	calling factory(*args) once per process and must itself be a callable that
+	accepts a path. If the task raises an exception for a given path, the
+	exception's message is stored as the error and the remaining paths are
+	still processed. When jobs is greater than 1, the paths are spread across
+	a pool of that many worker processes, which receive chunksize paths at
+	a time. Larger chunks reduce the cost of dispatching many short tasks. If
+	the chunk size is None, the paths are split into about 8 chunks per job.
+	"""
+	paths = sorted(set(paths))
+	if jobs is None or jobs < 1:
+		raise Exception("Error! The number of jobs must be a positive integer.")
+	elif chunksize is None:
+		chunksize = len(paths) // (jobs * 8)
+
+	if jobs == 1 or len(paths) < 2:
+		_initialize(factory, args)
+		results = [_execute(path) for path in paths]
+	else:
+		import multiprocessing
+
+		pool = multiprocessing.Pool(min(jobs, len(paths)), _initialize, (factory, args))
+		try:
+			results = list(pool.imap_unordered(_execute, paths, chunksize=max(1, chunksize)))
+			pool.close()
+		except:
+			pool.terminate()
+			raise
+		finally:
+			pool.join()
+
+	return sorted(results, key=lambda result: result[0])
+
+
+def _initialize(factory, args):
+	"""_initialize(factory:callable, args:tuple)
+	Creates the current process' task. If the task can not be created, the
+	error is stored and reported for every path the process receives, instead
+	of letting the worker die (which would cause the pool to respawn it
+	indefinitely).
+	"""
+	global _task, _error
+	try:
+		_task, _error = factory(*args), None
+	except Exception as e:
+		_task, _error = None, str(e)
+
+
+def _execute(path):
+	"""_execute(path:string)
+	Runs the current process' task on the specified path.
+	"""
+	if _task is None:
+		return (path, None, _error)
+	try:
+		return (path, _task(path), None)
+	except Exception as e:
+		return (path, None, str(e) or e.__class__.__name__)
@@ -0,0 +1,172 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# The JSON schemas (draft 4) of the project and tutorial configurations. The
+# schemas describe the structure of a configuration, while the semantics of a
+# question, e.g. whether its type exists or its key is reserved, are validated
+# by the Question class.
+TEXT_SCHEMA = {
+	"type":"string",
+	"pattern":"\\S",
+	"description":"a non-empty string"
+}
+SLUG_SCHEMA = {
+	"type":"string",
+	"pattern":"^\\s*[A-Za-z0-9_-]+\\s*$",
+	"description":"a non-empty string that only contains letters (a-z, A-Z), numbers (0-9), hyphens (-) and underscores (_)"
+}
+QUESTION_SCHEMA = {
+	"type":"object",
+	"description":"a dictionary",
+	"required":["key", "type", "question"],
+	"properties":{
+		"key":{"type":"string", "description":"a string"},
+		"type":{"type":"string", "description":"a string"},
+		"question":{"type":"string", "description":"a string"},
+		"hint":{"type":["string", "null"], "description":"a string"},
+		"parameters":{"type":["object", "null"], "description":"a dictionary"},
+		"branch":{
+			"type":["string", "object", "null"],
+			"additionalProperties":{"type":"string", "description":"a question key"},
+			"description":"a question key or a dictionary that maps answers to question keys"
+		}
+	}
+}
+PROJECT_SCHEMA = {
+	"type":"object",
+	"required":["name", "short_name", "description", "why", "questionnaire"],
+	"properties":{
+		"name":TEXT_SCHEMA,
+		"short_name":SLUG_SCHEMA,
+		"description":TEXT_SCHEMA,
+		"why":TEXT_SCHEMA,
+		"questionnaire":{
+			"type":"array",
+			"minItems":1,
+			"items":QUESTION_SCHEMA,
+			"description":"a non-empty list of questions"
+		}
+	}
+}
+TUTORIAL_SCHEMA = {
+	"type":"array",
+	"minItems":1,
+	"items":{
+		"type":"object",
+		"description":"a dictionary",
+		"required":["image", "assertions"],
+		"properties":{
+			"image":TEXT_SCHEMA,
+			"assertions":{
+				"type":"object",
+				"additionalProperties":{
+					"type":"object",
+					"required":["expects"]
+				},
+				"description":"a dictionary that maps question keys to assertions"
+			}
+		}
+	},
+	"description":"a non-empty list of entries"
+}
+
+# The schemas, indexed by name, and the name of the configuration each of them
+# describes.
+SCHEMAS = {
+	"project":(PROJECT_SCHEMA, "project configuration"),
+	"question":(QUESTION_SCHEMA, "question configuration"),
+	"tutorial":(TUTORIAL_SCHEMA, "tutorial configuration"),
+	"name":(TEXT_SCHEMA, "project name"),
+	"slug":(SLUG_SCHEMA, "project short name"),
+	"description":(TEXT_SCHEMA, "project description"),
+	"why":(TEXT_SCHEMA, "project's reason"),
+}
+
+# The keywords whose errors are better described by the schema's description.
+_DESCRIBED = frozenset(["type", "pattern", "minItems"])
+
+# The validators built so far, indexed by schema name.
+_validators = {}
+
+
+def getvalidator(name):
+	"""getvalidator(name:string)
+	Returns the validator for the schema with the specified name. A validator is
+	built, and its schema checked, once per process; the same validator is then
+	reused for every configuration.
+	"""
+	validator = _validators.get(name)
+	if validator is None:
+		from jsonschema import Draft4Validator
+
+		schema, _ = SCHEMAS[name]
+		Draft4Validator.check_schema(schema)
+		validator = _validators[name] = Draft4Validator(schema)
+
+	return validator
+
+
+def validate(name, instance):
+	"""validate(name:string, instance:object)
+	Validates the specified instance against the schema with the specified name,
+	and returns a list of messages that describe every error found, sorted by
+	their location in the instance.
+	"""
+	_, label = SCHEMAS[name]
+	errors = sorted(getvalidator(name).iter_errors(instance), key=lambda e: list(e.absolute_path))
+	return [getmessage(error, label) for error in errors]
+
+
+def isvalid(name, instance):
+	"""isvalid(name:string, instance:object)
+	Returns true if the specified instance is valid against the schema with the
+	specified name, false otherwise. Unlike the validate function, validation
+	stops at the first error.
+	"""
+	_, label = SCHEMAS[name]
+	for error in getvalidator(name).iter_errors(instance):
+		return (False, getmessage(error, label))
+
+	return (True, None)
+
+
+def getmessage(error, label):
+	"""getmessage(error:jsonschema.ValidationError, label:string)
+	Returns a message that describes the specified validation error, which was
+	found in the configuration with the specified label.
+	"""
+	path = getpath(error.absolute_path)
+	where = "The {}".format(label) if len(path) < 1 else "The field '{}' of the {}".format(path, label)
+	description = error.schema.get("description") if error.validator in _DESCRIBED else None
+	if description is not None:
+		return "Error! {} must be {}.".format(where, description)
+	else:
+		return "Error! {} is invalid: {}.".format(where, error.message)
+
+
+def getpath(path):
+	"""getpath(path:iterable)
+	Returns the specified path to an element of a configuration in the form of
+	a string, e.g. questionnaire[2].key.
+	"""
+	result = ""
+	for element in path:
+		if isinstance(element, int):
+			result += "[{}]".format(element)
+		else:
+			result += element if len(result) < 1 else ".{}".format(element)
+
+	return result
@@ -0,0 +1,233 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, zlib
+
+# The compression level used to estimate the size of a file served with gzip
+# compression, which is the default level of most web servers.
+COMPRESSION_LEVEL = 6
+
+# The name of the source that accounts for the bytes of an output that do not
+# come from any other source, i.e. the markup of the theme's templates.
+MARKUP = "markup"
+
+class SizeReport:
+	path    = None
+	outputs = None
+
+
+	def __init__(self):
+		"""__init__()
+		Instantiates a SizeReport object that breaks down the size of each file
+		written by a project's build by source.
+		"""
+		self.outputs = {}
+
+
+	def begin(self, path):
+		"""begin(path:string)
+		Starts measuring the outputs of the project located at the specified path.
+		"""
+		self.path    = path
+		self.outputs = {}
+
+
+	def end(self):
+		"""end()
+		Stops measuring the current build and returns its record, i.e. a
+		dictionary that contains the project's path and, for each output, its
+		size and the size of each of its sources. Each size is a [bytes, gzip]
+		pair where gzip is the size once compressed. Since the size of the
+		markup can only be deduced from the other sizes, its compressed size
+		is None.
+		"""
+		return {
+			"path":self.path,
+			"outputs":self.outputs
+		}
+
+
+	def record(self, output, sources, size):
+		"""record(output:string, sources:dict, size:tuple)
+		Records the size of the specified output, i.e. a (bytes, gzip) tuple,
+		and the size of each of the specified sources, a dictionary that maps a
+		source's name to the content it contributes to the output.
+		"""
+		measured = {name:list(getsize(content)) for name, content in sources.iteritems() if len(content) > 0}
+		markup = size[0] - sum(bytes for bytes, _ in measured.itervalues())
+		measured[MARKUP] = [max(0, markup), None]
+
+		self.outputs[output] = {
+			"bytes":size[0],
+			"gzip":size[1],
+			"sources":measured
+		}
+
+
+class Counter:
+	bytes      = 0
+	compressor = None
+	compressed = 0
+
+
+	def __init__(self):
+		"""__init__()
+		Instantiates a Counter object that measures the size of a file while it
+		is written, without holding it in memory.
+		"""
+		self.compressor = zlib.compressobj(COMPRESSION_LEVEL)
+
+
+	def update(self, data):
+		"""update(data:string)
+		Counts the specified bytes.
+		"""
+		self.bytes += len(data)
+		self.compressed += len(self.compressor.compress(data))
+
+
+	def getsize(self):
+		"""getsize()
+		Returns the (bytes, gzip) size of the data counted so far. No data may
+		be counted once this method is called.
+		"""
+		self.compressed += len(self.compressor.flush())
+		return (self.bytes, self.compressed)
+
+
+# The report used by the current process, or None if sizes are not measured.
+# It is set by calling setreport.
+_report = None
+
+
+def setreport(report):
+	"""setreport(report:SizeReport)
+	Sets the report used by the current process. If the specified report is
+	None, sizes are not measured.
+	"""
+	global _report
+	_report = report
+
+
+def isenabled():
+	"""isenabled()
+	Returns true if sizes are measured, false otherwise.
+	"""
+	return _report is not None
+
+
+def begin(path):
+	"""begin(path:string)
+	Starts measuring the outputs of the project located at the specified path.
+	"""
+	if _report is not None:
+		_report.begin(path)
+
+
+def end():
+	"""end()
+	Stops measuring the current build and returns its record, or None if
+	sizes are not measured.
+	"""
+	return None if _report is None else _report.end()
+
+
+def counter():
+	"""counter()
+	Returns a Counter object that measures the size of an output, or None if
+	sizes are not measured.
+	"""
+	return None if _report is None else Counter()
+
+
+def record(output, sources, counter):
+	"""record(output:string, sources:dict, counter:Counter)
+	Records the size of the specified output, measured with the specified
+	counter, and the size of each of its sources.
+	"""
+	if _report is not None and counter is not None:
+		_report.record(output, sources, counter.getsize())
+
+
+def getsize(content):
+	"""getsize(content:string)
+	Returns the (bytes, gzip) size of the specified content, once encoded in UTF-8.
+	"""
+	if isinstance(content, unicode):
+		content = content.encode("UTF-8")
+
+	return (len(content), len(zlib.compress(content, COMPRESSION_LEVEL)))
+
+
+def check(records, budgets):
+	"""check(records:list, budgets:dict)
+	Returns a list of messages that describe every output or source, in the
+	specified records, whose size exceeds its budget. The budgets map the name
+	of an output (e.g. template.html) or source (e.g. project.js) to its maximum
+	number of bytes. A source's budget applies to each output it is part of.
+	"""
+	messages = []
+	for record in records:
+		for output, measured in sorted(record["outputs"].iteritems()):
+			sizes = [(output, measured["bytes"])] + [(name, size[0]) for name, size in sorted(measured["sources"].iteritems())]
+			for name, bytes in sizes:
+				budget = budgets.get(name)
+				if budget is not None and bytes > budget:
+					where = output if name == output else "{} in {}".format(name, output)
+					messages.append("Error! The {} of the project '{}' is {} bytes, which exceeds its budget of {} bytes.".format(where, record["path"], bytes, budget))
+
+	return messages
+
+
+def summarize(records, top=10):
+	"""summarize(records:list, top:int)
+	Returns a summary of the specified records aggregated across the fleet,
+	i.e. the total size of each output and its sources before and after
+	compression, as well as the top largest outputs, in the form of a string.
+	"""
+	if len(records) < 1:
+		return "No output was measured."
+
+	outputs = {}
+	for record in records:
+		for output, measured in record["outputs"].iteritems():
+			total = outputs.setdefault(output, {"bytes":0, "gzip":0, "count":0, "sources":{}})
+			total["bytes"] += measured["bytes"]
+			total["gzip"] += measured["gzip"]
+			total["count"] += 1
+			for name, (bytes, gzip) in measured["sources"].iteritems():
+				source = total["sources"].setdefault(name, [0, 0])
+				source[0] += bytes
+				source[1] = None if gzip is None or source[1] is None else source[1] + gzip
+
+	lines = ["Output sizes across {} project(s):".format(len(records)), "  {:<22}{:>10}{:>10}".format("", "size", "gzip")]
+	for output, total in sorted(outputs.iteritems()):
+		lines.append("  {:<22}{:>10}{:>10}  ({} file(s))".format(output, _format(total["bytes"]), _format(total["gzip"]), total["count"]))
+		for name, (bytes, gzip) in sorted(total["sources"].iteritems(), key=lambda s: s[1][0], reverse=True):
+			lines.append("    {:<20}{:>10}{:>10}  {:5.1f}%".format(name, _format(bytes), _format(gzip), bytes * 100.0 / (total["bytes"] or 1)))
+
+	largest = [(measured["bytes"], output, record["path"]) for record in records for output, measured in record["outputs"].iteritems()]
+	lines.append("Largest outputs:")
+	for bytes, output, path in sorted(largest, reverse=True)[:top]:
+		lines.append("  {:>10}  {}".format(_format(bytes), os.path.join(path, output)))
+
+	return "\n".join(lines)
+
+
+def _format(bytes):
+	"""_format(bytes:int)
+	Returns the specified number of bytes in kilobytes, in the form of a string.
+	"""
+	return "-" if bytes is None else "{:.1f} KB".format(bytes / 1024.0)
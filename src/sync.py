@@ -0,0 +1,228 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import json, os
+
+# The files written by a build that are uploaded to a project's counterpart on
+# the server, and the field of the counterpart's info each is uploaded to.
+OUTPUTS = {
+	"template.html":"task_presenter",
+	"tutorial.html":"tutorial"
+}
+
+# The fields of a project that are uploaded to its counterpart on the server,
+# and the counterpart's field each is uploaded to.
+FIELDS = {
+	"name":"name",
+	"description":"description",
+	"why":"long_description"
+}
+
+class SyncRecord:
+	FILENAME = ".sync.record"
+	VERSION  = 1
+
+	filepath = None
+	server   = None
+	servers  = None
+
+
+	def __init__(self, filepath, server):
+		"""__init__(filepath:string, server:string)
+		Instantiates a SyncRecord object that records the digests of what was
+		last uploaded to the specified server for each project, indexed by the
+		project's short name, and stores them in the file located at the
+		specified path, alongside the records of any other server. A missing or
+		corrupt record is equivalent to an empty one: every project will simply
+		be uploaded.
+		"""
+		self.filepath = filepath
+		self.server   = server
+		self.servers  = {}
+
+		try:
+			with open(filepath, "r") as file:
+				data = json.load(file)
+				if data.get("version") == SyncRecord.VERSION:
+					self.servers = data.get("servers", {})
+		except (IOError, ValueError, AttributeError):
+			pass
+
+
+	def get(self, slug):
+		"""get(slug:string)
+		Returns the digests of what was last uploaded for the project with the
+		specified short name, or None if it was never uploaded.
+		"""
+		return self.servers.get(self.server, {}).get(slug)
+
+
+	def set(self, slug, digests):
+		"""set(slug:string, digests:dict)
+		Records the specified digests as uploaded for the project with the
+		specified short name. This method may be called by concurrent threads.
+		"""
+		self.servers.setdefault(self.server, {})[slug] = digests
+
+
+	def save(self):
+		"""save()
+		Writes the record to its file, unless it is unchanged.
+		"""
+		from src.atomicfile import AtomicFile
+
+		with AtomicFile(self.filepath) as file:
+			json.dump({"version":SyncRecord.VERSION, "servers":self.servers}, file, indent=1, sort_keys=True)
+
+
+def getdigests(project):
+	"""getdigests(project:Project)
+	Returns a dictionary that maps each uploaded part of the specified project,
+	i.e. its outputs and fields, to the digest of its current content. The
+	digest of a missing output is None. Raises an exception if the project's
+	task presenter has not been built.
+	"""
+	import hashlib
+	from src.manifest import Manifest
+
+	if not os.path.isfile(os.path.join(project.path, "template.html")):
+		raise Exception("Error! The project '{}' has no task presenter. Build it first.".format(project.path))
+
+	digests = {}
+	for filename in OUTPUTS:
+		filepath = os.path.join(project.path, filename)
+		digests[filename] = Manifest.getdigest([filepath]) if os.path.isfile(filepath) else None
+	for field in FIELDS:
+		digests[field] = hashlib.sha1(getattr(project, field).encode("UTF-8")).hexdigest()
+
+	return digests
+
+
+def getchanges(digests, previous):
+	"""getchanges(digests:dict, previous:dict)
+	Returns the sorted list of parts whose specified digests differ from the
+	previous digests, which are None if the project was never uploaded.
+	"""
+	previous = previous or {}
+	return sorted(part for part, digest in digests.iteritems() if digest != previous.get(part, False))
+
+
+def getfields(project, info):
+	"""getfields(project:Project, info:dict)
+	Returns the fields that update the specified project's counterpart on the
+	server, whose current info is specified. The info is updated with the
+	project's outputs rather than replaced, so that fields set by other tools,
+	e.g. a thumbnail, are kept.
+	"""
+	import codecs
+
+	fields = {remote:getattr(project, field) for field, remote in FIELDS.iteritems()}
+	fields["info"] = dict(info or {})
+	for filename, remote in OUTPUTS.iteritems():
+		filepath = os.path.join(project.path, filename)
+		if os.path.isfile(filepath):
+			with codecs.open(filepath, "r", "UTF-8") as file:
+				fields["info"][remote] = file.read()
+		else:
+			fields["info"].pop(remote, None)
+
+	return fields
+
+
+def sync(client, paths, record, jobs=4, dryrun=False):
+	"""sync(client:Client, paths:list, record:SyncRecord, jobs:int, dryrun:bool)
+	Uploads the outputs and fields of each project located at the specified
+	paths whose content differs from what the specified record shows was last
+	uploaded, and returns a list of (path, slug, changes, error) tuples, sorted
+	by path, where changes is the list of parts that changed. Projects are
+	uploaded by the specified number of threads over the client's pooled
+	connections, and the record is updated as soon as a project is uploaded.
+	In dry-run mode, the changes are computed but nothing is uploaded.
+	"""
+	from multiprocessing.pool import ThreadPool
+	from src.project import Project
+
+	if jobs < 1:
+		raise Exception("Error! The number of jobs must be a positive integer.")
+
+	results, pending, slugs = [], [], {}
+	for path in sorted(set(paths)):
+		try:
+			project = Project(path)
+			if project.slug in slugs:
+				raise Exception("Error! The project '{}' has the same short name as the project '{}'.".format(path, slugs[project.slug]))
+			slugs[project.slug] = path
+
+			digests = getdigests(project)
+			changes = getchanges(digests, record.get(project.slug))
+			if len(changes) > 0 and not dryrun:
+				pending.append((project, digests, changes))
+			else:
+				results.append((path, project.slug, changes, None))
+		except Exception as e:
+			results.append((path, None, [], str(e)))
+
+	def upload(entry):
+		project, digests, changes = entry
+		try:
+			remote = client.getproject(project.slug)
+			client.updateproject(remote["id"], getfields(project, remote.get("info")))
+		except Exception as e:
+			return (project.path, project.slug, changes, str(e))
+
+		record.set(project.slug, digests)
+		return (project.path, project.slug, changes, None)
+
+	if len(pending) > 0:
+		pool = ThreadPool(min(jobs, len(pending)))
+		try:
+			# Waiting for a result without a timeout can not be interrupted in Python 2.
+			result = pool.map_async(upload, pending)
+			while not result.ready():
+				result.wait(1)
+			results.extend(result.get())
+			pool.close()
+		finally:
+			pool.terminate()
+			pool.join()
+			record.save()
+
+	return sorted(results, key=lambda result: result[0])
+
+
+def summarize(results, dryrun=False):
+	"""summarize(results:list, dryrun:bool)
+	Returns a summary of the specified (path, slug, changes, error) tuples, as
+	returned by the sync function, in the form of a string.
+	"""
+	lines = []
+	changed, unchanged, failed = 0, 0, 0
+	for path, slug, changes, error in results:
+		if error is not None:
+			failed += 1
+			lines.append("FAILED    {}: {}".format(path, error))
+		elif len(changes) < 1:
+			unchanged += 1
+			lines.append("UNCHANGED {}".format(slug))
+		else:
+			changed += 1
+			lines.append("{} {} ({})".format("CHANGED  " if dryrun else "UPDATED  ", slug, ", ".join(changes)))
+
+	if dryrun:
+		lines.append("{} project(s): {} changed, {} unchanged, {} failed. Nothing was uploaded.".format(len(results), changed, unchanged, failed))
+	else:
+		lines.append("{} project(s): {} updated, {} unchanged, {} failed.".format(len(results), changed, unchanged, failed))
+
+	return "\n".join(lines)
@@ -0,0 +1,180 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os
+
+# The question types used by default, and their relative frequency. Questions
+# with options are generated with the OPTIONS number of options.
+DEFAULT_TYPES = {
+	"binary":4,
+	"dropdown-list":1,
+	"select":2,
+	"checklist":2,
+	"illustrative-checklist":1,
+	"text":1,
+	"longtext":1,
+	"number":1,
+	"datetime":1,
+	"date":1,
+	"url":1,
+	"geotagging":1,
+}
+OPTIONS = 6
+
+
+def generate(path, questions=20, types=None, depth=3, tutorial=5, helpfiles=5, jssize=4096, seed=0):
+	"""generate(path:string, questions:int, types:dict, depth:int, tutorial:int, helpfiles:int, jssize:int, seed:int)
+	Writes a synthetic GeoTag-X project to the directory located at the
+	specified path, which is created if need be. The project's questionnaire
+	contains the specified number of questions whose types are drawn from the
+	specified dictionary, which maps a question type to its relative frequency.
+	The first questions form a chain of conditional branches that is depth
+	questions deep. The project also contains a tutorial with the specified
+	number of entries, the specified number of help files, and a project.js
+	file of roughly jssize bytes. Projects generated with the same arguments
+	are identical.
+	"""
+	import json, random
+
+	if questions < 1:
+		raise Exception("Error! A synthetic project requires one or more questions.")
+
+	generator = random.Random(seed)
+	types = DEFAULT_TYPES if types is None else types
+	population = [t for t in sorted(types) for _ in range(types[t])]
+	keys = ["q{:04d}".format(i) for i in range(questions)]
+	depth = min(depth, questions - 1)
+
+	questionnaire = []
+	for i, key in enumerate(keys):
+		type = "binary" if i < depth else generator.choice(population)
+		entry = {
+			"key":key,
+			"type":type,
+			"question":"Synthetic question #{} ({})?".format(i, type),
+			"hint":"A hint for question #{}.".format(i),
+		}
+		if type in ["dropdown-list", "select", "checklist", "illustrative-checklist"]:
+			entry["parameters"] = {"options":[{"value":"o{}".format(j), "label":"Option {}".format(j)} for j in range(OPTIONS)]}
+
+		if i < depth:
+			# Answering 'no' skips the rest of the branch.
+			entry["branch"] = {"Yes":keys[i + 1], "No":keys[depth] if depth + 1 < questions else "end"}
+
+		questionnaire.append(entry)
+
+	if not os.path.isdir(path):
+		os.makedirs(path)
+
+	_write(os.path.join(path, "project.json"), json.dumps({
+		"name":"Synthetic project {}".format(seed),
+		"short_name":"synthetic-{}".format(seed),
+		"description":"A synthetic project with {} question(s).".format(questions),
+		"why":"To measure the builder's performance.",
+		"questionnaire":questionnaire
+	}, indent=1))
+
+	if tutorial > 0:
+		_write(os.path.join(path, "tutorial.json"), json.dumps({
+			"tutorial":[{
+				"image":"http://example.com/image{}.jpg".format(i),
+				"assertions":{key:{"expects":"yes", "onFailure":"Try again.", "onSuccess":"Well done."} for key in keys[:depth + 1]}
+			} for i in range(tutorial)]
+		}, indent=1))
+
+	if helpfiles > 0:
+		helpdir = os.path.join(path, "help")
+		if not os.path.isdir(helpdir):
+			os.makedirs(helpdir)
+		for key in generator.sample(keys, min(helpfiles, questions)):
+			_write(os.path.join(helpdir, key + ".html"), (
+				"<div class=\"help\">\n"
+				"    <!-- Help for question {0}. -->\n"
+				"    <p>\n        Some help for question {0}.\n    </p>\n"
+				"    <img src=\"http://example.com/{0}.png\" alt=\"An illustration\">\n"
+				"</div>\n"
+			).format(key))
+
+	if jssize > 0:
+		lines = []
+		size = 0
+		while size < jssize:
+			line = "function synthetic{0}(value) {{\n    var result = value * {0};\n    return result + {1};\n}}\n".format(len(lines), generator.randint(0, 1000))
+			lines.append(line)
+			size += len(line)
+		_write(os.path.join(path, "project.js"), "".join(lines))
+
+	return path
+
+
+def generatetheme(path, assetsize=16384):
+	"""generatetheme(path:string, assetsize:int)
+	Writes a synthetic theme to the directory located at the specified path,
+	which is created if need be. The theme's template renders every field of
+	a project and each of its asset bundles is roughly assetsize bytes.
+	"""
+	templates = os.path.join(path, "templates")
+	bundles = os.path.join(path, "assets", "bundles")
+	for directory in [templates, bundles]:
+		if not os.path.isdir(directory):
+			os.makedirs(directory)
+
+	_write(os.path.join(templates, "base.html"), (
+		"<!DOCTYPE html>\n<html>\n<head>\n    <title>{{ name }}</title>\n"
+		"    {{ csslinks }}<style>{{ css }}</style>\n</head>\n<body>\n"
+		"    <h1>{{ name }}</h1>\n    <p class=\"description\">{{ description }}</p>\n"
+		"    <p class=\"why\">{{ why }}</p>\n"
+		"    {% include 'questionnaire.html' %}\n"
+		"    <script>var controlflow = {{ questionnaire.controlflow }};</script>\n"
+		"    {% if istutorial %}<script>var tutorial = {{ tutorial }};</script>{% endif %}\n"
+		"    {{ jslinks }}<script>{{ js }}</script>\n</body>\n</html>\n"
+	))
+	_write(os.path.join(templates, "questionnaire.html"), (
+		"<div id=\"questionnaire\">\n"
+		"    {% for key, question in questionnaire.questions.items() %}\n"
+		"    <section id=\"{{ key }}\" class=\"question {{ question.type }}\">\n"
+		"        <h2>{{ question.question }}</h2>\n"
+		"        {% if question.hint %}<p class=\"hint\">{{ question.hint }}</p>{% endif %}\n"
+		"        {% if question.parameters.options %}\n"
+		"        <ul>\n"
+		"            {% for option in question.parameters.options %}\n"
+		"            <li><input type=\"checkbox\" value=\"{{ option.value }}\"> {{ option.label }}</li>\n"
+		"            {% endfor %}\n"
+		"        </ul>\n"
+		"        {% endif %}\n"
+		"        {% if question.help %}<div class=\"help\">{{ question.help }}</div>{% endif %}\n"
+		"    </section>\n"
+		"    {% endfor %}\n"
+		"</div>\n"
+	))
+
+	for name in ["core", "geolocation", "datetime", "tutorial"]:
+		css, js = [], []
+		while len(css) * 40 < assetsize:
+			css.append(".{0}-{1} {{ margin: {1}px; }}\n".format(name, len(css)))
+		while len(js) * 60 < assetsize:
+			js.append("function {0}{1}(a, b) {{ return a + b * {1}; }}\n".format(name, len(js)))
+		_write(os.path.join(bundles, "asset.bundle.{}.css".format(name)), "".join(css))
+		_write(os.path.join(bundles, "asset.bundle.{}.js".format(name)), "".join(js))
+
+	return path
+
+
+def _write(filepath, content):
+	"""_write(filepath:string, content:string)
+	Writes the specified content to the file located at the specified path.
+	"""
+	with open(filepath, "w") as file:
+		file.write(content)
@@ -0,0 +1,81 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import json, unittest
+import aggregator
+from StringIO import StringIO
+from questionnaire import Questionnaire
+
+class TestAggregator(unittest.TestCase):
+	def setUp(self):
+		self.questionnaire = Questionnaire([
+			{"key":"flooded", "type":"binary", "question":"Is the area flooded?"},
+			{"key":"water", "type":"checklist", "question":"Where is the water?", "parameters":{"options":[{"label":"Road", "value":"road"}, {"label":"House", "value":"house"}]}},
+			{"key":"depth", "type":"number", "question":"How deep is the water?"},
+			{"key":"comment", "type":"text", "question":"Any comment?"},
+		])
+
+	def aggregate(self, taskruns, sort=True):
+		output = StringIO()
+		taskruns = aggregator.sortbytask(taskruns) if sort else iter(taskruns)
+		counts = aggregator.aggregate(self.questionnaire, taskruns, output)
+		return counts, [json.loads(line) for line in output.getvalue().splitlines()]
+
+	def test_aggregate(self):
+		taskruns = [
+			{"task_id":2, "info":{"flooded":"Yes", "water":["road", "house"], "depth":"1.5"}},
+			{"task_id":2, "info":json.dumps({"flooded":"yes", "water":["road"], "depth":0.5, "comment":"deep"})},
+			{"task_id":1, "info":{"flooded":"no"}},
+			{"task_id":2, "info":{"flooded":"no", "water":"house", "depth":"n/a"}},
+			{"task_id":1, "info":{"flooded":"yes"}},
+		]
+		counts, results = self.aggregate(taskruns)
+		self.assertEqual(counts, (2, 5))
+		self.assertEqual([result["task_id"] for result in results], [1, 2])
+		self.assertEqual(sorted(results[0]["answers"]), ["depth", "flooded", "water"])
+
+		first, second = results[0]["answers"], results[1]["answers"]
+		self.assertEqual(first["flooded"], {"answer":None, "agreement":None, "count":2, "votes":{"yes":1, "no":1}})
+		self.assertEqual(second["flooded"]["answer"], "Yes")
+		self.assertEqual(second["flooded"]["votes"], {"Yes":2, "no":1})
+		self.assertAlmostEqual(second["flooded"]["agreement"], 2.0 / 3)
+		self.assertEqual(second["water"], {"count":3, "options":{"road":2, "house":2}})
+		self.assertEqual(second["depth"], {"count":2, "mean":1.0, "stddev":0.5, "min":0.5, "max":1.5})
+		self.assertEqual(first["depth"]["count"], 0)
+
+	def test_sorted(self):
+		taskruns = [{"task_id":i // 3, "info":{"depth":i}} for i in range(9)]
+		counts, results = self.aggregate(taskruns, sort=False)
+		self.assertEqual(counts, (3, 9))
+		self.assertEqual([r["answers"]["depth"]["mean"] for r in results], [1.0, 4.0, 7.0])
+		self.assertRaises(Exception, self.aggregate, taskruns + taskruns[:1], False)
+		self.assertRaises(Exception, self.aggregate, [{"info":{}}], False)
+		self.assertRaises(Exception, self.aggregate, [{"info":{}}])
+
+	def test_sortbytask(self):
+		taskruns = [{"task_id":(i * 7) % 5, "info":{"n":i}} for i in range(23)]
+		expected = sorted(taskruns, key=lambda t: t["task_id"])
+		for size in [1, 4, 100]:
+			self.assertEqual(list(aggregator.sortbytask(iter(taskruns), size)), expected, "Buffer size %d" % size)
+
+	def test_taskid(self):
+		taskruns = [{"task_id":"10", "info":{"depth":1}}, {"task_id":9, "info":{"depth":2}}, {"task_id":"9", "info":{"depth":4}}]
+		counts, results = self.aggregate(taskruns)
+		self.assertEqual(counts, (2, 3))
+		self.assertEqual([(r["task_id"], r["answers"]["depth"]["mean"]) for r in results], [(9, 3.0), (10, 1.0)])
+
+
+if __name__ == "__main__":
+	unittest.main()
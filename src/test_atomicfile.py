@@ -0,0 +1,54 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, shutil, tempfile, unittest
+from atomicfile import AtomicFile
+
+class TestAtomicFile(unittest.TestCase):
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.filepath = os.path.join(self.path, "template.html")
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def write(self, content):
+		with AtomicFile(self.filepath) as file:
+			file.write(content)
+		return file.changed
+
+	def test_write(self):
+		self.assertTrue(self.write("<html></html>"))
+		self.assertEqual(open(self.filepath).read(), "<html></html>")
+		os.utime(self.filepath, (0, 0))
+		self.assertFalse(self.write("<html></html>"))
+		self.assertEqual(os.path.getmtime(self.filepath), 0, "An unchanged file is not touched")
+		self.assertTrue(self.write("<html> </html>"))
+		self.assertEqual(os.listdir(self.path), ["template.html"], "Temporary files are removed")
+
+	def test_discard(self):
+		self.write("<html></html>")
+		try:
+			with AtomicFile(self.filepath) as file:
+				file.write("<ht")
+				raise ValueError()
+		except ValueError:
+			pass
+		self.assertEqual(open(self.filepath).read(), "<html></html>", "A failed write leaves the file untouched")
+		self.assertEqual(os.listdir(self.path), ["template.html"])
+
+
+if __name__ == "__main__":
+	unittest.main()
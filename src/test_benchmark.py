@@ -0,0 +1,47 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, shutil, tempfile, unittest
+import benchmark
+
+class TestBenchmark(unittest.TestCase):
+	def test_compare(self):
+		baseline = {"results":{"a":1.0, "b":1.0, "c":1.0}, "thresholds":{"b":0.5}}
+		comparison = benchmark.compare({"a":1.3, "b":1.3, "c":0.5, "d":2.0}, baseline, 0.25)
+		self.assertEqual([(name, regressed) for name, _, _, _, regressed in comparison], [
+			("a", True),
+			("b", False),
+			("c", False),
+			("d", False),
+		])
+		self.assertEqual(comparison[3][3], None, "A benchmark without a baseline has no relative change")
+
+	def test_run(self):
+		path = tempfile.mkdtemp()
+		try:
+			parameters = {"questions":5, "projects":2, "repeat":1}
+			results, memory = benchmark.run(path, parameters, benchmarks=["questionnaire", "fleet"])
+			self.assertEqual(sorted(results), ["fleet", "questionnaire"])
+			self.assertTrue(memory > 0)
+
+			filepath = os.path.join(path, "baseline.json")
+			benchmark.savebaseline(filepath, results, parameters)
+			self.assertEqual(benchmark.loadbaseline(filepath)["results"], results)
+		finally:
+			shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,50 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, shutil, subprocess, sys, tempfile, unittest
+import synthetic
+
+class TestBuild(unittest.TestCase):
+	HEAVY = ["jinja2", "slimit", "htmlmin", "rcssmin", "multiprocessing"]
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.project = synthetic.generate(os.path.join(self.path, "project"), questions=3)
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def getmodules(self, args):
+		"""Returns the heavy modules loaded when the builder runs with the specified arguments."""
+		script = (
+			"import sys, build\n"
+			"try:\n"
+			"    build.main(['build.py'] + {0!r})\n"
+			"except SystemExit:\n"
+			"    pass\n"
+			"sys.stderr.write(repr(sorted(m for m in {1!r} if m in sys.modules)))\n"
+		).format(args, TestBuild.HEAVY)
+		root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+		process = subprocess.Popen([sys.executable, "-c", script], cwd=root, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+		_, modules = process.communicate()
+		return modules
+
+	def test_startup(self):
+		for args in [["--help"], ["--summarize", self.project], ["--check", "--no-cache", self.project]]:
+			self.assertEqual(self.getmodules(args), "[]", "{} loads no heavy module".format(args[0]))
+
+
+if __name__ == "__main__":
+	unittest.main()
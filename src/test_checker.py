@@ -0,0 +1,68 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import json, os, shutil, subprocess, sys, tempfile, unittest
+from checker import check
+
+class TestChecker(unittest.TestCase):
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def write(self, configuration):
+		with open(os.path.join(self.path, "project.json"), "w") as file:
+			json.dump(configuration, file)
+
+	def test_valid(self):
+		self.write({"name":"N", "short_name":"s", "description":"D", "why":"W", "questionnaire":[
+			{"key":"a", "type":"binary", "question":"A?", "branch":"end"},
+			{"key":"b", "type":"binary", "question":"B?"},
+		]})
+		self.assertEqual(check(self.path), ([], ["Warning! The following questions can not be reached: b."]))
+
+	def test_errors(self):
+		self.write({"name":"N", "short_name":"s", "why":"W", "questionnaire":[
+			{"key":"end", "type":"binary", "question":"A?"},
+			{"key":"b", "type":"unknown", "question":""},
+			{"key":"b", "type":"binary", "question":"C?"},
+			{"key":"c", "type":"binary", "question":"D?", "branch":{"yes":"x"}},
+		]})
+		errors, _ = check(self.path)
+		self.assertEqual(len(errors), 6, "Every error is reported")
+		self.assertTrue(all(e.startswith("Error! ") for e in errors))
+
+	def test_missing(self):
+		for path in [os.path.join(self.path, "missing"), self.path]:
+			errors, _ = check(path)
+			self.assertEqual(len(errors), 1)
+			self.assertTrue(errors[0].startswith("Error! "))
+
+	def test_unparsable(self):
+		with open(os.path.join(self.path, "project.json"), "w") as file:
+			file.write("{")
+		errors, _ = check(self.path)
+		self.assertEqual(len(errors), 1)
+
+	def test_no_template_engine(self):
+		self.write({"name":"N", "short_name":"s", "description":"D", "why":"W", "questionnaire":[{"key":"a", "type":"binary", "question":"A?"}]})
+		script = "import sys; from src.checker import Checker; Checker('')({0!r}); print sorted(m for m in ['jinja2', 'slimit', 'htmlmin', 'rcssmin'] if m in sys.modules)".format(self.path)
+		root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+		self.assertEqual(subprocess.check_output([sys.executable, "-c", script], cwd=root).strip(), "[]")
+
+
+if __name__ == "__main__":
+	unittest.main()
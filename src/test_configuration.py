@@ -0,0 +1,60 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, shutil, tempfile, unittest
+import configuration
+from configuration import ConfigurationCache
+
+class TestConfiguration(unittest.TestCase):
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.cache = os.path.join(self.path, "cache")
+		self.yaml = os.path.join(self.path, "project.yaml")
+		with open(self.yaml, "w") as file:
+			file.write("name: A project\nquestionnaire:\n  - key: q1\n    type: binary\n")
+
+	def tearDown(self):
+		configuration.setcache(None)
+		shutil.rmtree(self.path)
+
+	def test_parsers(self):
+		expected = {"name":"A project", "questionnaire":[{"key":"q1", "type":"binary"}]}
+		self.assertEqual(configuration.load(self.yaml), expected)
+
+		filepath = os.path.join(self.path, "project.json")
+		with open(filepath, "w") as file:
+			file.write('{"name":"A project", "questionnaire":[{"key":"q1", "type":"binary"}]}')
+		self.assertEqual(configuration.load(filepath), expected)
+
+		self.assertRaises(Exception, configuration.load, os.path.join(self.path, "project.xml"))
+
+	def test_cache(self):
+		configuration.setcache(ConfigurationCache(self.cache))
+		expected = configuration.load(self.yaml)
+		self.assertEqual(len(os.listdir(self.cache)), 1)
+
+		# A cached configuration is returned as long as the file is unchanged.
+		stat = os.stat(self.yaml)
+		self.assertEqual(ConfigurationCache(self.cache).get(self.yaml, stat), expected)
+		self.assertEqual(configuration.load(self.yaml), expected)
+
+		with open(self.yaml, "a") as file:
+			file.write("why: Because\n")
+		self.assertIsNone(ConfigurationCache(self.cache).get(self.yaml, os.stat(self.yaml)))
+		self.assertEqual(configuration.load(self.yaml)["why"], "Because")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,69 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import unittest
+from controlflow import ControlFlowGraph
+
+class TestControlFlowGraph(unittest.TestCase):
+	def test_compile(self):
+		graph = ControlFlowGraph(["a", "b", "c", "d"], {
+			"a":{"yes":"c", "no":"end"},
+			"b":None,
+			"c":"d",
+			"d":None,
+		})
+		self.assertEqual(ControlFlowGraph.isvalid(graph), (True, None))
+		self.assertEqual(graph.defaults, [1, 2, 3, 4])
+		self.assertEqual(graph.branches[0], {"yes":2, "no":4})
+		self.assertEqual(graph.orphans, [])
+		self.assertEqual(graph.remaining, [4, 3, 2, 1, 0])
+		self.assertEqual(graph.getmaxpathlength(), 4)
+
+	def test_jumptable(self):
+		graph = ControlFlowGraph(["a", "b", "c"], {"a":{" Yes ":"c", "no":"end"}, "b":"end"})
+		self.assertEqual(graph.getjumptable(), {
+			"keys":["a", "b", "c"],
+			"end":3,
+			"table":[
+				[1, {"yes":2, "no":3}, 2],
+				[3, {}, 1],
+				[3, {}, 1],
+			]
+		})
+		self.assertEqual(ControlFlowGraph(["a"], {"a":"x"}).getjumptable(), None)
+
+	def test_orphans(self):
+		graph = ControlFlowGraph(["a", "b", "c"], {"a":"c"})
+		self.assertEqual(graph.orphans, ["b"])
+		self.assertEqual(graph.getmaxpathlength(), 2)
+
+	def test_cycle(self):
+		graph = ControlFlowGraph(["a", "b", "c", "d"], {"b":{"yes":"d", "no":"c"}, "c":"b"})
+		valid, message = ControlFlowGraph.isvalid(graph)
+		self.assertFalse(valid)
+		self.assertEqual(graph.cycle, ["b", "c", "b"])
+		self.assertEqual(graph.getmaxpathlength(), None)
+
+		graph = ControlFlowGraph(["a"], {"a":"a"})
+		self.assertEqual(graph.cycle, ["a", "a"])
+
+	def test_invalid_branches(self):
+		graph = ControlFlowGraph(["a", "b"], {"a":{"yes":"x", "no":{"maybe":"b"}}, "b":42})
+		self.assertEqual(len(graph.errors), 3, "Every error is reported")
+		self.assertFalse(ControlFlowGraph.isvalid(graph)[0])
+
+
+if __name__ == "__main__":
+	unittest.main()
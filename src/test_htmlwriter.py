@@ -13,11 +13,114 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
-import unittest
+import json, os, shutil, tempfile, unittest
 from htmlwriter import HtmlWriter
+from project import Project
+from theme import Theme
 
 class TestHtmlWriter(unittest.TestCase):
-	pass
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.theme = os.path.join(self.path, "theme")
+		self.project = os.path.join(self.path, "project")
+
+		os.makedirs(os.path.join(self.theme, "templates"))
+		os.makedirs(os.path.join(self.theme, "assets", "bundles"))
+		os.makedirs(os.path.join(self.project, "help"))
+		self.write(os.path.join(self.theme, "templates", "base.html"),
+			"<html>\n<head>\n{{ csslinks }}<style>{{ css }}</style>\n</head>\n<body>\n"
+			"{% for key, q in questionnaire.questions.items() %}\n<p>{{ q.question }}</p>\n{% if q.help %}{{ q.help }}{% endif %}\n{% endfor %}\n"
+			"{{ jslinks }}<script>{{ js }}</script>\n</body>\n</html>\n"
+		)
+		self.write(os.path.join(self.theme, "assets", "bundles", "asset.bundle.core.css"), "body{}")
+		self.write(os.path.join(self.theme, "assets", "bundles", "asset.bundle.core.js"), "var core;")
+		self.write(os.path.join(self.project, "project.json"), json.dumps({
+			"name":"Name", "short_name":"slug", "description":"Description", "why":"Why",
+			"questionnaire":[{"key":"q1", "type":"binary", "question":"Question?"}]
+		}))
+		self.write(os.path.join(self.project, "project.css"), "p { margin: 0; }")
+		self.write(os.path.join(self.project, "help", "q1.html"), "<div>\n  Help\n</div>\n")
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def write(self, filepath, content):
+		with open(filepath, "w") as file:
+			file.write(content)
+
+	def read(self, filename):
+		with open(os.path.join(self.project, filename), "r") as file:
+			return file.read()
+
+	def test_write(self):
+		writer = HtmlWriter(Theme(self.theme), True, True, False, False)
+		self.assertEqual(writer.write(Project(self.project)), (["template.html"], ["template.html"]))
+		self.assertEqual(self.read("template.html"),
+			"<html><head><style>body{}p{margin:0}</style></head><body><p>Question?</p><div> Help </div><script>var core;</script></body></html>"
+		)
+		self.assertFalse(os.path.exists(os.path.join(self.project, "tutorial.html")), "No tutorial")
+		self.assertEqual(writer.write(Project(self.project)), (["template.html"], []), "Unchanged files are not rewritten")
+
+	def test_minified_theme(self):
+		writer = HtmlWriter(Theme(self.theme, minify=True), True, True, False, False)
+		writer.write(Project(self.project))
+
+		# Whitespace around interpolated values is kept since the values are
+		# unknown when the template is minified.
+		self.assertEqual(self.read("template.html"),
+			"<html><head> <style>body{}p{margin:0}</style></head><body><p>Question?</p> <div> Help </div>  <script>var core;</script></body></html>"
+		)
+
+	def test_external_assets(self):
+		assetdir = os.path.join(self.path, "assets")
+		writer = HtmlWriter(Theme(self.theme), True, True, False, False, assetdir, "/static/")
+		writer.write(Project(self.project))
+
+		filenames = sorted(os.listdir(assetdir))
+		self.assertEqual([f.split(".")[-1] for f in filenames], ["css", "js"])
+		self.assertEqual(self.read("template.html"),
+			"<html><head><link rel=stylesheet href=/static/{0}><style>p{{margin:0}}</style></head>"
+			"<body><p>Question?</p><div> Help </div><script src=/static/{1}></script><script></script></body></html>".format(*filenames)
+		)
+
+		# A theme without the link variables has its assets inlined. Mentions in
+		# comments and longer identifiers are not references.
+		self.write(os.path.join(self.theme, "templates", "base.html"), "<html><head>{# csslinks #}<style>{{ css }}</style></head><body>{{ jslinks_ }}<script>{{ js }}</script></body></html>")
+		writer = HtmlWriter(Theme(self.theme), True, True, False, False, assetdir, "/static/")
+		self.assertEqual(writer.assetdir, None)
+		writer.write(Project(self.project))
+		self.assertEqual(self.read("template.html"), "<html><head><style>body{}p{margin:0}</style></head><body><script>var core;</script></body></html>")
+
+	def test_locales(self):
+		import polib
+
+		self.write(os.path.join(self.theme, "templates", "base.html"), "<p>{% trans %}Hello {{ name }}{% endtrans %}</p><p>{{ _('Bye') }}</p>")
+		for path, entries in [(self.theme, {u"Hello %(name)s":u"Bonjour %(name)s", u"Bye":u"Au revoir"}), (self.project, {u"Bye":u"Salut"})]:
+			catalog = polib.POFile()
+			for msgid, msgstr in entries.iteritems():
+				catalog.append(polib.POEntry(msgid=msgid, msgstr=msgstr))
+			os.makedirs(os.path.join(path, "locales"))
+			catalog.save(os.path.join(path, "locales", "fr.po"))
+
+		writer = HtmlWriter(Theme(self.theme), False, True, False, False, locales=["fr", "es"])
+		outputs, _ = writer.write(Project(self.project))
+		self.assertEqual(outputs, ["template.html", "template.fr.html", "template.es.html"])
+		self.assertEqual(self.read("template.html"), "<p>Hello Name</p><p>Bye</p>")
+		self.assertEqual(self.read("template.fr.html"), "<p>Bonjour Name</p><p>Salut</p>", "The project's catalog takes precedence")
+		self.assertEqual(self.read("template.es.html"), "<p>Hello Name</p><p>Bye</p>", "Missing catalogs leave messages untranslated")
+
+	def test_targets(self):
+		self.write(os.path.join(self.theme, "templates", "base.html"), "<p>{{ pdfmode }} {{ istutorial }}</p>")
+		self.write(os.path.join(self.project, "tutorial.json"), json.dumps({"tutorial":[{"image":"i", "assertions":{}}]}))
+
+		writer = HtmlWriter(Theme(self.theme), False, True, False, False, targets=["pdf", "tutorial", "image"])
+		self.assertEqual(writer.getfilenames(), [("pdf", "template.html"), ("tutorial", "tutorial.html"), ("image", "template.image.html")])
+		writer.write(Project(self.project))
+		self.assertEqual(self.read("template.html"), "<p>True False</p>")
+		self.assertEqual(self.read("template.image.html"), "<p>False False</p>")
+		self.assertEqual(self.read("tutorial.html"), "<p>True True</p>", "The tutorial is rendered in the mode of the first task presenter")
+
+		self.assertRaises(Exception, HtmlWriter, Theme(self.theme), False, True, False, False, targets=["video"])
 
 
 if __name__ == "__main__":
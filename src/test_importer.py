@@ -0,0 +1,94 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import json, os, shutil, tempfile, unittest
+import importer
+from client import Client, UncertainError
+from mockserver import MockServer
+
+class TestImporter(unittest.TestCase):
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.server = MockServer([{"id":7, "short_name":"flood"}], apikey="secret")
+		self.endpoint = self.server.start()
+
+	def tearDown(self):
+		self.server.stop()
+		shutil.rmtree(self.path)
+
+	def write(self, filename, rows):
+		filepath = os.path.join(self.path, filename)
+		with open(filepath, "w") as file:
+			file.write("\n".join(json.dumps(row) for row in rows) + "\n")
+		return filepath
+
+	def test_gettask(self):
+		row = {"image_url":"http://a.org/1.jpg", "n_answers":"3", "priority_0":""}
+		self.assertEqual(importer.gettask(7, row), {"project_id":7, "info":{"image_url":"http://a.org/1.jpg"}, "n_answers":3})
+		self.assertRaises(Exception, importer.gettask, 7, {"n_answers":"many"})
+
+	def test_importtasks(self):
+		filepath = self.write("tasks.jsonl", [{"image_url":str(i)} for i in range(25)])
+		self.server.fail(2)
+
+		client = Client(self.endpoint, "secret", connections=3, backoff=0)
+		self.assertEqual(importer.importtasks(client, "flood", filepath, batchsize=10, jobs=3), (25, 0, []))
+		self.assertEqual(sorted(int(t["info"]["image_url"]) for t in self.server.tasks), range(25))
+		self.assertTrue(len(self.server.connections) <= 3, "connections are pooled")
+
+		self.assertEqual(importer.importtasks(client, "flood", filepath, batchsize=10, jobs=3), (0, 25, []))
+		self.assertRaises(Exception, importer.importtasks, client, "drought", filepath)
+		client.close()
+
+		client = Client(self.endpoint, "wrong", backoff=0)
+		self.assertRaises(Exception, client.getproject, "flood")
+		client.close()
+
+	def test_resume(self):
+		rows = [{"image_url":str(i)} for i in range(20)]
+		filepath = self.write("tasks.jsonl", rows[:13] + [{"image_url":"13", "n_answers":"many"}] + rows[14:])
+
+		client = Client(self.endpoint, "secret", backoff=0)
+		self.assertRaises(Exception, importer.importtasks, client, "flood", filepath, batchsize=5, jobs=2)
+		self.assertEqual(len(self.server.tasks), 14)
+
+		self.write("tasks.jsonl", rows)
+		self.assertEqual(importer.importtasks(client, "flood", filepath, batchsize=5, jobs=2), (6, 14, []))
+		self.assertEqual(sorted(int(t["info"]["image_url"]) for t in self.server.tasks), range(20))
+		client.close()
+
+	def test_uncertain(self):
+		filepath = self.write("tasks.jsonl", [{"image_url":str(i)} for i in range(6)])
+		client = Client(self.endpoint, "secret", backoff=0, timeout=0.2)
+		client.getproject("flood")
+
+		# A task whose response times out may have been created, and one that
+		# fails with a server error may have been processed: neither is sent again.
+		self.server.stall(1, 0.5)
+		self.assertEqual(importer.importtasks(client, "flood", filepath, batchsize=2, jobs=1), (5, 0, [1]))
+		self.assertEqual(importer.importtasks(client, "flood", filepath, batchsize=2, jobs=1), (0, 6, [1]))
+		self.assertEqual(len(self.server.tasks), 6, "Uncertain tasks are never created twice")
+
+		self.server.fail(1, 500)
+		self.assertRaises(UncertainError, client.createtask, {"project_id":7, "info":{}})
+		self.assertEqual(len(self.server.tasks), 6)
+		self.server.fail(1, 503)
+		client.createtask({"project_id":7, "info":{}})
+		self.assertEqual(len(self.server.tasks), 7, "Tasks the server did not process are sent again")
+		client.close()
+
+
+if __name__ == "__main__":
+	unittest.main()
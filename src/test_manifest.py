@@ -0,0 +1,89 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, shutil, tempfile, unittest
+from manifest import Manifest
+
+class TestManifest(unittest.TestCase):
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		os.mkdir(os.path.join(self.path, "help"))
+		os.mkdir(os.path.join(self.path, "locales"))
+		for filename in ["project.json", "project.js", "help/q1.html", "help/notes.txt", "locales/fr.po", "template.html"]:
+			with open(os.path.join(self.path, filename), "w") as file:
+				file.write(filename)
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def build(self, flags={"compress":False}):
+		manifest = Manifest(self.path)
+		manifest.update(manifest.getinputs(), "theme", flags, ["template.html"])
+
+	def test_inputs(self):
+		self.assertEqual(Manifest.listinputs(self.path), ["project.json", "project.js", os.path.join("help", "q1.html"), os.path.join("locales", "fr.po")])
+		self.assertTrue(Manifest.isinput(os.path.join("locales", "fr.mo")))
+
+	def test_empty(self):
+		manifest = Manifest(self.path)
+		self.assertTrue(manifest.isempty())
+		self.assertFalse(manifest.isuptodate("theme", {"compress":False}))
+
+	def test_uptodate(self):
+		self.build()
+		self.assertTrue(Manifest(self.path).isuptodate("theme", {"compress":False}))
+		self.assertFalse(Manifest(self.path).isuptodate("other", {"compress":False}), "Theme changed")
+		self.assertFalse(Manifest(self.path).isuptodate("theme", {"compress":True}), "Flags changed")
+
+	def test_touched(self):
+		self.build()
+		os.utime(os.path.join(self.path, "project.js"), (0, 0))
+		self.assertTrue(Manifest(self.path).isuptodate("theme", {"compress":False}), "Content unchanged")
+		self.assertNotEqual(Manifest(self.path).inputs["project.js"]["mtime"], 0, "The check is read-only")
+
+		manifest = Manifest(self.path)
+		manifest.refresh(manifest.getinputs())
+		self.assertEqual(Manifest(self.path).inputs["project.js"]["mtime"], 0, "Touched input recorded")
+
+		with open(os.path.join(self.path, "project.js"), "a") as file:
+			file.write("!")
+		manifest = Manifest(self.path)
+		manifest.refresh(manifest.getinputs())
+		self.assertFalse(Manifest(self.path).isuptodate("theme", {"compress":False}), "Modified inputs are not recorded")
+
+	def test_modified(self):
+		self.build()
+		with open(os.path.join(self.path, "help", "q1.html"), "a") as file:
+			file.write("!")
+		self.assertFalse(Manifest(self.path).isuptodate("theme", {"compress":False}))
+
+	def test_missing_output(self):
+		self.build()
+		os.remove(os.path.join(self.path, "template.html"))
+		self.assertFalse(Manifest(self.path).isuptodate("theme", {"compress":False}))
+
+	def test_missing_asset(self):
+		asset = os.path.join(self.path, "asset.bundle.core.js")
+		with open(asset, "w") as file:
+			file.write("var core;")
+		manifest = Manifest(self.path)
+		manifest.update(manifest.getinputs(), "theme", {"compress":False}, ["template.html"], [asset])
+		self.assertTrue(Manifest(self.path).isuptodate("theme", {"compress":False}))
+		os.remove(asset)
+		self.assertFalse(Manifest(self.path).isuptodate("theme", {"compress":False}), "Asset removed")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,145 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, shutil, tempfile, unittest
+import minifier
+from minifier import MinificationCache
+
+class TestMinificationCache(unittest.TestCase):
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+
+	def tearDown(self):
+		minifier.setcache(None)
+		shutil.rmtree(self.path)
+
+	def test_keys(self):
+		key = MinificationCache.getkey(u"var a = 1;", "slimit", "0.8.1", {"mangle":True})
+		self.assertEqual(key, MinificationCache.getkey(u"var a = 1;", "slimit", "0.8.1", {"mangle":True}))
+		self.assertNotEqual(key, MinificationCache.getkey(u"var a = 2;", "slimit", "0.8.1", {"mangle":True}), "Source")
+		self.assertNotEqual(key, MinificationCache.getkey(u"var a = 1;", "slimit", "0.8.2", {"mangle":True}), "Version")
+		self.assertNotEqual(key, MinificationCache.getkey(u"var a = 1;", "slimit", "0.8.1", {"mangle":False}), "Options")
+
+	def test_get_put(self):
+		cache = MinificationCache(self.path)
+		self.assertIsNone(cache.get("0123456789"))
+		cache.put("0123456789", u"caf\u00e9")
+		self.assertEqual(MinificationCache(self.path).get("0123456789"), u"caf\u00e9")
+
+	def test_read_only(self):
+		cache = MinificationCache(self.path)
+		cache.put("0123456789", u"x")
+
+		# An entry whose time of last use can not be updated is still used.
+		def utime(path, times):
+			raise OSError(1, "Operation not permitted")
+		original, os.utime = os.utime, utime
+		try:
+			self.assertEqual(cache.get("0123456789"), u"x")
+		finally:
+			os.utime = original
+
+	def test_eviction(self):
+		cache = MinificationCache(self.path, capacity=250)
+		for i in range(5):
+			key = "%02d" % i * 20
+			cache.put(key, u"x" * 100)
+			os.utime(cache.getfilepath(key), (i, i))
+			# Keep the first entry in use.
+			if i > 0:
+				self.assertIsNotNone(cache.get("00" * 20))
+
+		self.assertLessEqual(cache.size, 250)
+		self.assertIsNotNone(cache.get("00" * 20), "Recently used entry is kept")
+		self.assertIsNone(cache.get("01" * 20), "Least recently used entry is evicted")
+
+	def test_minify(self):
+		minifier.setcache(MinificationCache(self.path))
+		css = minifier.minifycss(u"h1 {  margin : 0 ; }")
+		self.assertEqual(css, u"h1{margin:0}")
+		self.assertEqual(len(MinificationCache(self.path).getentries()), 1)
+		self.assertEqual(minifier.minifycss(u"h1 {  margin : 0 ; }"), css)
+
+
+class TestMinifyHtml(unittest.TestCase):
+	DOCUMENT = (
+		u"<!DOCTYPE html>\n<html>\n  <head>\n    <title>  A   title </title>\n  </head>\n"
+		u"  <body>\n    <!-- comment -->\n    <p>Some   text &amp; <b>bold</b>   text.</p>\n"
+		u"    <pre>  keep   this  </pre>\n    <script>if (a > b && c < d) { x = '<p>'; }</script>\n"
+		u"  </body>\n</html>\n"
+	)
+
+	def test_streaming(self):
+		import htmlmin
+		expected = htmlmin.minify(self.DOCUMENT, remove_comments=True, remove_empty_space=True)
+		for size in [1, 2, 3, 7, 16, 64, len(self.DOCUMENT)]:
+			chunks = [self.DOCUMENT[i:i + size] for i in range(0, len(self.DOCUMENT), size)]
+			self.assertEqual(u"".join(minifier.minifyhtml(chunks)), expected, "Chunk size %d" % size)
+
+	def test_split_text(self):
+		import htmlmin
+		for document in [u"<p>1 >\n  </p>", u"<div>\n  a >\n  b\n</div>\n<p>c &amp; d &e f</p>\n"]:
+			expected = htmlmin.minify(document, remove_comments=True, remove_empty_space=True)
+			for i in range(1, len(document)):
+				self.assertEqual(u"".join(minifier.minifyhtml([document[:i], document[i:]])), expected, "Split at %d" % i)
+
+	def test_flush(self):
+		import htmlmin
+		parser = minifier.getstreamingparser(remove_comments=True, remove_empty_space=True)
+		output = []
+		for _ in range(100):
+			parser.feed(u"<p>Some   text</p>\n  <p> and <b>more</b> </p>  ")
+			output.append(parser.flush())
+			self.assertTrue(len(parser.result) < 8, "Only the last item is kept")
+
+		parser.close()
+		output.append(parser.result)
+		self.assertEqual(u"".join(output), htmlmin.minify(u"<p>Some   text</p>\n  <p> and <b>more</b> </p>  " * 100, remove_comments=True, remove_empty_space=True))
+
+
+class TestMinifyTemplate(unittest.TestCase):
+	def test_tags_preserved(self):
+		source = (
+			"<ul>\n  {% for item in items %}\n    <li class=\"{{ item.class }}\">{{ item }}</li>\n  {% endfor %}\n</ul>\n"
+			"<p>Hello\n{% if x %}\nworld{% endif %}</p>\n<input {% if c %}checked{% endif %}>\n{% if h %}{{ h }}{% endif %}\n"
+			"<script>\n  var a = {{ a }};\n  {% if b %}\n  var b = 1;\n  {% endif %}\n</script>"
+		)
+		self.assertEqual(minifier.minifytemplate(source), (
+			"<ul>{% for item in items %}<li class=\"{{ item.class }}\">{{ item }}</li>{% endfor %}</ul>"
+			"<p>Hello {% if x %} world{% endif %}</p><input {% if c %}checked{% endif %}> {% if h %}{{ h }}{% endif %} "
+			"<script>\n  var a = {{ a }};\n  {% if b %}\n  var b = 1;\n  {% endif %}\n</script>"
+		))
+
+	def test_lost_tags(self):
+		source = "<p>a</p>\n<!-- {% if a %} -->\n<p>b</p>\n<!-- {% endif %} -->"
+		self.assertEqual(minifier.minifytemplate(source), source)
+
+	def test_rendering(self):
+		import htmlmin, jinja2
+		source = "<div>\n  {% for i in items %}\n    <span> {{ i }} </span>\n  {% endfor %}\n</div>\n"
+		context = {"items":["a b", "c"]}
+		expected = htmlmin.minify(jinja2.Template(source).render(context), remove_comments=True, remove_empty_space=True)
+		self.assertEqual(jinja2.Template(minifier.minifytemplate(source)).render(context), expected)
+
+		# Line breaks next to an expression are collapsed to a space, as they
+		# are in text.
+		source = "<p><b>Why:</b>\n{{ why }}\n</p>"
+		expected = htmlmin.minify(jinja2.Template(source).render(why="Because"), remove_comments=True, remove_empty_space=True)
+		self.assertEqual(jinja2.Template(minifier.minifytemplate(source)).render(why="Because"), expected)
+		self.assertEqual(expected, "<p><b>Why:</b> Because </p>")
+
+
+if __name__ == "__main__":
+	unittest.main()
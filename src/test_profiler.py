@@ -0,0 +1,59 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import time, unittest
+import profiler
+
+def produce(delay):
+	for i in range(3):
+		time.sleep(delay)
+		yield i
+
+
+class TestProfiler(unittest.TestCase):
+	def tearDown(self):
+		profiler.setprofiler(None)
+
+	def test_disabled(self):
+		profiler.setprofiler(None)
+		items = [1, 2]
+		self.assertTrue(profiler.iterate("render", items) is items)
+		with profiler.stage("write"):
+			pass
+		self.assertEqual(profiler.end(), None)
+
+	def test_stages(self):
+		profiler.setprofiler(profiler.Profiler())
+		profiler.begin("project")
+		with profiler.stage("outer"):
+			with profiler.stage("inner"):
+				time.sleep(0.02)
+			items = list(profiler.iterate("stream", produce(0.01)))
+		record = profiler.end()
+
+		self.assertEqual(items, [0, 1, 2])
+		self.assertEqual(record["path"], "project")
+		self.assertEqual(set(record["stages"]), set(["outer", "inner", "stream", "other"]))
+		self.assertTrue(record["stages"]["inner"] >= 0.02)
+		self.assertTrue(record["stages"]["stream"] >= 0.03)
+		self.assertTrue(record["stages"]["outer"] < 0.01, "Nested stages are excluded")
+		self.assertTrue(record["time"] >= 0.05)
+
+		summary = profiler.summarize([record], 1)
+		self.assertTrue("project" in summary and "stream" in summary)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -14,7 +14,7 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 import unittest
-from question import Question
+from question import Question, TYPES
 
 class TestQuestion(unittest.TestCase):
 	def test_valid_keys(self):
@@ -37,6 +37,47 @@ class TestQuestion(unittest.TestCase):
 		self.assertFalse(Question.iskey("photoVisible")[0], "Reserved keyword")
 		self.assertFalse(Question.iskey(32768)[0], "Not a string")
 		self.assertFalse(Question.iskey("\n")[0], "Illegal escape character")
+		self.assertFalse(Question.iskey("key\n")[0], "Trailing newline")
+
+	def test_types(self):
+		self.assertTrue(Question.istype("custom")[0])
+		self.assertTrue("deprecated" in Question.istype("textarea")[1])
+		self.assertRaisesRegexp(Exception, "not recognized", Question, "a", {"type":"unknown", "question":"A?"})
+		self.assertEqual(Question("a", {"type":"custom", "question":"A?"}).parameters, {})
+
+	def test_parameters(self):
+		for type in TYPES:
+			self.assertEqual(Question.isparameters(Question.getparameters(type), type), (True, None), "Default parameters of '{}' questions".format(type))
+
+		self.assertTrue(Question.isparameters({"size":4, "unknown":True}, "select")[0])
+		self.assertFalse(Question.isparameters({"size":"4"}, "select")[0])
+		self.assertFalse(Question.isparameters({"size":True}, "select")[0])
+		self.assertFalse(Question.isparameters(["size"], "select")[0])
+		self.assertRaises(Exception, Question, "a", {"type":"number", "question":"A?", "parameters":{"min":"zero"}})
+
+	def test_readonly_parameters(self):
+		import copy, pickle
+
+		question = Question("a", {"type":"select", "question":"A?", "parameters":{"options":[{"value":"x", "label":"X"}]}})
+		parameters = question.parameters
+		self.assertRaises(TypeError, parameters.update, {"size":1})
+		self.assertRaises(TypeError, parameters["options"][0].update, {"value":"y"})
+		self.assertFalse(hasattr(parameters["options"], "append"), "Nested lists are frozen")
+		self.assertEqual(copy.deepcopy(parameters), parameters)
+		self.assertEqual(pickle.loads(pickle.dumps(parameters, 2)), parameters)
+		self.assertRaises(TypeError, pickle.loads(pickle.dumps(parameters, 2)).clear)
+
+		question.setparameter("size", 2)
+		self.assertEqual(question.parameters["size"], 2)
+
+	def test_validate(self):
+		errors = Question.validate([
+			{"key":"a", "type":"binary", "question":"A?"},
+			{"key":"end", "type":"text", "question":"", "parameters":{"maxlength":"long"}},
+			{"type":"unknown"},
+			"b",
+		])
+		self.assertEqual([index for index, _ in errors], [1, 1, 1, 2], "Structural errors are left to the schema")
 
 
 if __name__ == "__main__":
@@ -17,7 +17,19 @@ import unittest
 from questionnaire import Questionnaire
 
 class TestQuestionnaire(unittest.TestCase):
-	pass
+	def test_controlflow(self):
+		questionnaire = Questionnaire([
+			{"key":"a", "type":"binary", "question":"A?", "branch":{"Yes":"b", "No":"end"}},
+			{"key":"b", "type":"binary", "question":"B?"},
+		])
+		self.assertEqual(questionnaire.graph.branches[0], {"yes":1, "no":2})
+		self.assertEqual(questionnaire.graph.getmaxpathlength(), 2)
+
+	def test_cycle(self):
+		self.assertRaises(Exception, Questionnaire, [
+			{"key":"a", "type":"binary", "question":"A?"},
+			{"key":"b", "type":"binary", "question":"B?", "branch":"a"},
+		])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,51 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import json, os, shutil, tempfile, unittest
+import rows
+
+class TestRows(unittest.TestCase):
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def write(self, filename, content):
+		filepath = os.path.join(self.path, filename)
+		with open(filepath, "w") as file:
+			file.write(content)
+		return filepath
+
+	def test_readrows(self):
+		filepath = self.write("tasks.csv", "image_url,n_answers\nhttp://a.org/1.jpg,3\nhttp://a.org/2.jpg\n")
+		self.assertEqual(list(rows.readrows(filepath)), [{"image_url":"http://a.org/1.jpg", "n_answers":"3"}, {"image_url":"http://a.org/2.jpg", "n_answers":""}])
+
+		filepath = self.write("tasks.jsonl", '{"a":1}\n\n{"a":2}\n')
+		self.assertEqual(list(rows.readrows(filepath)), [{"a":1}, {"a":2}])
+		self.assertRaises(Exception, list, rows.readrows(self.write("tasks.jsonl", '{"a":1}\n[1]\n')))
+		self.assertRaises(Exception, list, rows.readrows(self.write("tasks.jsonl", '{"a":\n')))
+		self.assertRaises(Exception, rows.readrows, "tasks.txt")
+
+	def test_readjsonarray(self):
+		expected = [{"id":i, "info":{"text":u"\u00e9" * (i % 7)}} for i in range(5000)]
+		filepath = self.write("taskruns.json", " \n" + json.dumps(expected, indent=1))
+		self.assertEqual(list(rows.readrows(filepath)), expected)
+		self.assertEqual(list(rows.readrows(self.write("empty.json", "[ ]"))), [])
+		self.assertRaises(Exception, list, rows.readrows(self.write("truncated.json", json.dumps(expected)[:-100])))
+
+
+if __name__ == "__main__":
+	unittest.main()
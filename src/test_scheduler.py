@@ -0,0 +1,65 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import unittest
+from scheduler import schedule
+
+class UppercaseTask:
+	def __init__(self, suffix):
+		self.suffix = suffix
+
+	def __call__(self, path):
+		if path.startswith("bad"):
+			raise Exception("Error! Bad path '{}'.".format(path))
+		return path.upper() + self.suffix
+
+
+class BrokenTask:
+	def __init__(self):
+		raise Exception("Error! Broken task.")
+
+
+class TestScheduler(unittest.TestCase):
+	def test_serial(self):
+		results = schedule(["b", "a", "bad", "a"], UppercaseTask, ("!",))
+		self.assertEqual(results, [
+			("a", "A!", None),
+			("b", "B!", None),
+			("bad", None, "Error! Bad path 'bad'."),
+		])
+
+	def test_parallel(self):
+		paths = ["p%02d" % i for i in range(20)] + ["bad1", "bad0"]
+		results = schedule(paths, UppercaseTask, ("?",), jobs=3)
+		self.assertEqual([r[0] for r in results], sorted(paths), "Results are in a fixed order")
+		self.assertEqual(len([r for r in results if r[2] is not None]), 2, "Errors are collected")
+		self.assertEqual(results[-1], ("p19", "P19?", None))
+
+	def test_broken_factory(self):
+		for jobs in (1, 2):
+			results = schedule(["a", "b"], BrokenTask, (), jobs=jobs)
+			self.assertEqual([r[2] for r in results], ["Error! Broken task."] * 2)
+
+	def test_invalid_jobs(self):
+		self.assertRaises(Exception, schedule, ["a"], UppercaseTask, ("",), 0)
+		self.assertRaises(Exception, schedule, ["a"], UppercaseTask, ("",), 0, None)
+
+	def test_automatic_chunksize(self):
+		paths = ["p%02d" % i for i in range(40)]
+		self.assertEqual(schedule(paths, UppercaseTask, ("",), 2, None), [(p, p.upper(), None) for p in paths])
+
+
+if __name__ == "__main__":
+	unittest.main()
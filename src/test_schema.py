@@ -0,0 +1,47 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import unittest
+import schema
+
+class TestSchema(unittest.TestCase):
+	def test_project(self):
+		configuration = {"name":"N", "short_name":"s", "description":"D", "why":"W", "questionnaire":[
+			{"key":"a", "type":"binary", "question":"A?", "branch":{"yes":"end"}},
+		]}
+		self.assertEqual(schema.validate("project", configuration), [])
+
+		del configuration["description"]
+		configuration["short_name"] = "a slug"
+		configuration["questionnaire"].append({"key":1, "question":"B?", "branch":{"no":2}})
+		errors = schema.validate("project", configuration)
+		self.assertEqual(len(errors), 5, "Every error is reported")
+		self.assertTrue(errors[1].startswith("Error! The field 'questionnaire[1]' "))
+
+	def test_tutorial(self):
+		self.assertEqual(schema.validate("tutorial", [{"image":"i", "assertions":{"a":{"expects":"yes"}}}]), [])
+		self.assertEqual(len(schema.validate("tutorial", [{"assertions":{"a":{}}}])), 2)
+		self.assertFalse(schema.isvalid("tutorial", [])[0])
+
+	def test_validator(self):
+		self.assertIs(schema.getvalidator("project"), schema.getvalidator("project"), "A validator is built once")
+
+	def test_path(self):
+		self.assertEqual(schema.getpath(["questionnaire", 2, "key"]), "questionnaire[2].key")
+		self.assertEqual(schema.getpath([0, "image"]), "[0].image")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,48 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import unittest, zlib
+import sizes
+
+class TestSizes(unittest.TestCase):
+	def test_counter(self):
+		counter = sizes.Counter()
+		for chunk in ["<html>", "a" * 1000, "</html>"]:
+			counter.update(chunk)
+		self.assertEqual(counter.getsize(), (1013, len(zlib.compress("<html>" + "a" * 1000 + "</html>", sizes.COMPRESSION_LEVEL))))
+
+	def test_record(self):
+		report = sizes.SizeReport()
+		report.begin("p")
+		report.record("template.html", {"project.js":u"var \u00e9;", "project.css":""}, (100, 50))
+		record = report.end()
+		self.assertEqual(record["path"], "p")
+		self.assertEqual(record["outputs"]["template.html"]["sources"]["project.js"][0], 7, "Sources are measured in UTF-8 bytes")
+		self.assertEqual(record["outputs"]["template.html"]["sources"][sizes.MARKUP], [93, None])
+		self.assertNotIn("project.css", record["outputs"]["template.html"]["sources"], "Empty sources are omitted")
+
+	def test_check(self):
+		records = [{"path":"p", "outputs":{"template.html":{"bytes":2048, "gzip":100, "sources":{"help":[1024, 10], "markup":[1024, None]}}}}]
+		self.assertEqual(sizes.check(records, {"template.html":4096, "help":2048}), [])
+		self.assertEqual(len(sizes.check(records, {"template.html":1024, "help":512, "project.js":1})), 2)
+
+	def test_summarize(self):
+		self.assertEqual(sizes.summarize([]), "No output was measured.")
+		records = [{"path":p, "outputs":{"template.html":{"bytes":1024, "gzip":512, "sources":{"markup":[1024, None]}}}} for p in ["a", "b"]]
+		self.assertIn("template.html             2.0 KB    1.0 KB  (2 file(s))", sizes.summarize(records))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,77 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, shutil, tempfile, unittest
+import synthetic, sync
+from client import Client
+from mockserver import MockServer
+
+class TestSync(unittest.TestCase):
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.projects = [synthetic.generate(os.path.join(self.path, name), questions=2, seed=i) for i, name in enumerate(["a", "b"])]
+		for project in self.projects:
+			with open(os.path.join(project, "template.html"), "w") as file:
+				file.write("<p>{}</p>".format(project))
+
+		from project import Project
+		self.slugs = [Project(project).slug for project in self.projects]
+		self.server = MockServer([{"id":i, "short_name":slug, "info":{"thumbnail":"t.png"}} for i, slug in enumerate(self.slugs)])
+		self.client = Client(self.server.start(), backoff=0)
+		self.record = os.path.join(self.path, sync.SyncRecord.FILENAME)
+
+	def tearDown(self):
+		self.client.close()
+		self.server.stop()
+		shutil.rmtree(self.path)
+
+	def sync(self, dryrun=False):
+		results = sync.sync(self.client, self.projects, sync.SyncRecord(self.record, self.client.endpoint), 2, dryrun)
+		self.assertEqual([error for _, _, _, error in results], [None, None])
+		return [changes for _, _, changes, _ in results]
+
+	def test_sync(self):
+		everything = ["description", "name", "template.html", "tutorial.html", "why"]
+		self.assertEqual(self.sync(dryrun=True), [everything, everything])
+		self.assertEqual(self.server.requests, 0, "a dry run sends no request")
+
+		self.assertEqual(self.sync(), [everything, everything])
+		remote = self.server.projects[0]
+		self.assertEqual(remote["info"], {"thumbnail":"t.png", "task_presenter":"<p>{}</p>".format(self.projects[0])})
+		self.assertTrue(all(remote[field] for field in ["name", "description", "long_description"]))
+
+		requests = self.server.requests
+		self.assertEqual(self.sync(), [[], []])
+		self.assertEqual(self.server.requests, requests, "unchanged projects are not uploaded")
+
+		with open(os.path.join(self.projects[1], "template.html"), "w") as file:
+			file.write("<p>changed</p>")
+		self.assertEqual(self.sync(dryrun=True), [[], ["template.html"]])
+		self.assertEqual(self.sync(), [[], ["template.html"]])
+		self.assertEqual(self.server.projects[1]["info"]["task_presenter"], "<p>changed</p>")
+
+	def test_failure(self):
+		self.server.fail(100)
+		client = Client(self.client.endpoint, retries=0)
+		results = sync.sync(client, self.projects, sync.SyncRecord(self.record, self.client.endpoint), 2)
+		client.close()
+		self.assertTrue(all(error is not None for _, _, _, error in results))
+
+		self.server.fail(0)
+		self.assertEqual(len(self.sync(dryrun=True)[0]), 5, "failed uploads are not recorded")
+
+
+if __name__ == "__main__":
+	unittest.main()
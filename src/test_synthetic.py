@@ -0,0 +1,54 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, shutil, tempfile, unittest
+import synthetic
+from project import Project
+from theme import Theme
+from htmlwriter import HtmlWriter
+
+class TestSynthetic(unittest.TestCase):
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def test_generate(self):
+		path = synthetic.generate(os.path.join(self.path, "project"), questions=12, types={"select":1, "number":1}, depth=4, tutorial=2, helpfiles=3, jssize=100)
+		project = Project(path)
+		self.assertEqual(len(project.questionnaire), 12)
+		self.assertEqual(project.questionnaire.questiontypes, set(["binary", "select", "number"]))
+		self.assertEqual(project.questionnaire.controlflow["q0000"], {"yes":"q0001", "no":"q0004"})
+		self.assertEqual(len(project.tutorial), 2)
+		self.assertEqual(len(os.listdir(os.path.join(path, "help"))), 3)
+		self.assertTrue(os.path.getsize(os.path.join(path, "project.js")) >= 100)
+
+		theme = Theme(synthetic.generatetheme(os.path.join(self.path, "theme")))
+		HtmlWriter(theme, True, True, False, False).write(project)
+		with open(os.path.join(path, "template.html"), "r") as file:
+			self.assertTrue("Synthetic question #11" in file.read())
+
+	def test_deterministic(self):
+		contents = []
+		for name in ["a", "b"]:
+			path = synthetic.generate(os.path.join(self.path, name), seed=7)
+			with open(os.path.join(path, "project.json"), "r") as file:
+				contents.append(file.read())
+		self.assertEqual(contents[0], contents[1])
+
+
+if __name__ == "__main__":
+	unittest.main()
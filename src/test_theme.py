@@ -13,11 +13,50 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
-import unittest
+import os, shutil, tempfile, unittest
 from theme import Theme
 
 class TestTheme(unittest.TestCase):
-	pass
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.theme = os.path.join(self.path, "theme")
+		self.cache = os.path.join(self.path, "cache")
+		os.makedirs(os.path.join(self.theme, "templates"))
+		with open(os.path.join(self.theme, "templates", "base.html"), "w") as file:
+			file.write("<h1>{{ name }}</h1>{% include 'body.html' %}")
+		with open(os.path.join(self.theme, "templates", "body.html"), "w") as file:
+			file.write("<p>{{ description }}</p>")
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def render(self, theme):
+		return theme.template.render({"name":"Name", "description":"Description"})
+
+	def test_uncached(self):
+		self.assertEqual(self.render(Theme(self.theme)), "<h1>Name</h1><p>Description</p>")
+		self.assertFalse(os.path.exists(self.cache))
+
+	def test_bytecode_cache(self):
+		self.assertEqual(self.render(Theme(self.theme, self.cache)), "<h1>Name</h1><p>Description</p>")
+		self.assertEqual(len(os.listdir(os.path.join(self.cache, "bytecode"))), 2)
+		self.assertEqual(self.render(Theme(self.theme, self.cache)), "<h1>Name</h1><p>Description</p>")
+
+	def test_precompile(self):
+		self.assertEqual(self.render(Theme(self.theme, self.cache, True)), "<h1>Name</h1><p>Description</p>")
+		self.assertEqual(len(os.listdir(os.path.join(self.cache, "templates"))), 1)
+
+		# A modified theme is compiled into a separate directory.
+		with open(os.path.join(self.theme, "templates", "body.html"), "w") as file:
+			file.write("<div>{{ description }}</div>")
+		self.assertEqual(self.render(Theme(self.theme, self.cache, True)), "<h1>Name</h1><div>Description</div>")
+		self.assertEqual(len(os.listdir(os.path.join(self.cache, "templates"))), 2)
+
+	def test_minify(self):
+		with open(os.path.join(self.theme, "templates", "body.html"), "w") as file:
+			file.write("\n<p>\n  {{ description }}\n</p>\n<!-- comment -->\n")
+		self.assertEqual(self.render(Theme(self.theme, minify=True)), "<h1>Name</h1><p> Description </p>")
+		self.assertEqual(self.render(Theme(self.theme, self.cache, True, True)), "<h1>Name</h1><p> Description </p>")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, shutil, tempfile, unittest
+import polib
+import translation
+
+class TestTranslation(unittest.TestCase):
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def test_catalog(self):
+		catalog = polib.POFile()
+		catalog.append(polib.POEntry(msgid=u"Yes", msgstr=u"Oui"))
+		catalog.append(polib.POEntry(msgid=u"No", msgstr=u"Non", flags=["fuzzy"]))
+		catalog.append(polib.POEntry(msgid=u"Maybe", msgstr=u""))
+		catalog.append(polib.POEntry(msgid=u"%(n)s image", msgid_plural=u"%(n)s images", msgstr_plural={0:u"%(n)s image", 1:u"%(n)s images (fr)"}))
+		catalog.save(os.path.join(self.path, "fr.po"))
+		catalog.save_as_mofile(os.path.join(self.path, "es.mo"))
+
+		for locale in ["fr", "es"]:
+			translations = translation.gettranslations(locale, [self.path])
+			self.assertEqual(translations.gettext(u"Yes"), u"Oui")
+			self.assertEqual(translations.gettext(u"No"), u"No", "Fuzzy entries are ignored")
+			self.assertEqual(translations.gettext(u"Maybe"), u"Maybe", "Untranslated entries are ignored")
+			self.assertEqual(translations.ngettext(u"%(n)s image", u"%(n)s images", 2), u"%(n)s images (fr)")
+
+		self.assertEqual(translation.gettranslations("de", [self.path]).gettext(u"Yes"), u"Yes")
+
+	def test_plural_forms(self):
+		catalog = polib.POFile()
+		catalog.metadata = {"Content-Type":"text/plain; charset=UTF-8", "Plural-Forms":"nplurals=3; plural=(n==1 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2);"}
+		catalog.append(polib.POEntry(msgid=u"file", msgid_plural=u"files", msgstr_plural={0:u"plik", 1:u"pliki", 2:u"plik\u00f3w"}))
+		catalog.save(os.path.join(self.path, "pl.po"))
+		catalog.save_as_mofile(os.path.join(self.path, "pl_PL.mo"))
+
+		for locale in ["pl", "pl_PL"]:
+			translations = translation.gettranslations(locale, [self.path])
+			self.assertEqual([translations.ngettext(u"file", u"files", n) for n in [1, 3, 5, 22, 112]], [u"plik", u"pliki", u"plik\u00f3w", u"pliki", u"plik\u00f3w"])
+
+		self.assertEqual(translation.Translations.getplural("Plural-Forms: nplurals=1; plural=0;\n")(5), 0)
+		self.assertEqual(translation.Translations.getplural("Plural-Forms: nplurals=2; plural=import os;\n")(5), 1, "Invalid expressions are ignored")
+		self.assertEqual(translation.Translations().ngettext(u"file", u"files", 0), u"files")
+
+	def test_filename(self):
+		self.assertTrue(translation.iscatalog("fr.po"))
+		self.assertTrue(translation.iscatalog("pt_BR.mo"))
+		self.assertFalse(translation.iscatalog("fr.json"))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,62 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, shutil, tempfile, unittest
+from watcher import getwatcher, PollingWatcher
+
+class TestWatcher(unittest.TestCase):
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		os.makedirs(os.path.join(self.path, "theme", "templates"))
+		os.makedirs(os.path.join(self.path, "project", "images"))
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def write(self, *path):
+		with open(os.path.join(self.path, *path), "w") as file:
+			file.write("x")
+
+	def check(self, watcher):
+		try:
+			self.assertEqual(watcher.read(0.05), set())
+
+			self.write("project", "project.json")
+			self.write("theme", "templates", "base.html")
+			changes = watcher.read(1)
+			changes.update(watcher.read(0.2))
+			self.assertEqual(changes, set([
+				os.path.join(self.path, "project", "project.json"),
+				os.path.join(self.path, "theme", "templates", "base.html"),
+			]))
+
+			# Subdirectories are only watched recursively where requested.
+			self.write("project", "images", "image.png")
+			self.assertEqual(watcher.read(0.2), set())
+		finally:
+			watcher.close()
+
+	def directories(self):
+		return [(os.path.join(self.path, "theme"), True), (os.path.join(self.path, "project"), False)]
+
+	def test_default(self):
+		self.check(getwatcher(self.directories()))
+
+	def test_polling(self):
+		self.check(PollingWatcher(self.directories(), interval=0.01))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -13,38 +13,111 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
-class Theme:
-	path = None
-	assets = {
-		"core":{
-			"js":None,
-			"css":None
-		},
-		"geolocation":{
-			"js":None,
-			"css":None
-		},
-		"datetime":{
-			"js":None,
-			"css":None
-		},
-	}
-	template = None
-
-	def __init__(self, path):
-		"""__init__(path:string)
+from jinja2 import BaseLoader
+from src.manifest import Manifest
+
+class Theme(object):
+	__slots__ = ("path", "assets", "exported", "template", "minified", "digest")
+
+	def __init__(self, path, cachedir=None, precompile=False, minify=False):
+		"""__init__(path:string, cachedir:string, precompile:bool, minify:bool)
 		Instantiates a Theme object from the content of the directory located at
-		the specified path.
+		the specified path. If a cache directory is specified, the compiled
+		templates are stored in it and reused by subsequent instances: when the
+		precompile flag is set, the templates are compiled into Python modules
+		that are imported directly, otherwise Jinja2's bytecode cache is used.
+		If the minify flag is set, the templates' markup is minified when they
+		are loaded, i.e. before they are compiled.
 		"""
-		import os
-		from jinja2 import Environment, FileSystemLoader
-
 		valid, message = Theme.isvalidpath(path)
 		if not valid:
 			raise Exception(message)
 
 		self.path = path
-		self.template = Environment(loader=FileSystemLoader(searchpath=os.path.join(self.path, "templates"))).get_template("base.html")
+		self.minified = minify
+		self.digest = None
+
+		# The assets are loaded into memory on demand. Each theme keeps its own
+		# copy so that a reloaded theme does not reuse stale assets.
+		self.assets = {name:{"js":None, "css":None} for name in ["core", "geolocation", "datetime", "tutorial"]}
+		self.exported = {}
+		self.template = self.getenvironment(cachedir, precompile).get_template("base.html")
+
+
+	def getenvironment(self, cachedir=None, precompile=False):
+		"""getenvironment(cachedir:string, precompile:bool)
+		Returns the Jinja2 environment used to load the theme's templates.
+		Jinja2's i18n extension is enabled so that templates may contain
+		translatable messages. Messages are left untranslated unless the
+		gettext and ngettext functions are passed to the template when it is
+		rendered (see src.translation).
+		"""
+		import os
+		from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, ModuleLoader
+
+		templatedir = os.path.join(self.path, "templates")
+		loader = FileSystemLoader(searchpath=templatedir)
+		if self.minified:
+			loader = MinifyingLoader(loader)
+
+		if cachedir is None:
+			environment = Environment(loader=loader, extensions=["jinja2.ext.i18n"])
+		elif precompile:
+			# Precompiled templates are stored in a directory named after the
+			# templates' digest, which means a modified theme is recompiled
+			# into a new directory instead of using stale modules.
+			target = os.path.join(cachedir, "templates", Manifest.getdigest(Theme.listfiles(templatedir), templatedir))
+			if self.minified:
+				target += ".min"
+			if not os.path.isdir(target):
+				self.precompile(target)
+
+			environment = Environment(loader=ModuleLoader(target), extensions=["jinja2.ext.i18n"])
+		else:
+			bytecodedir = os.path.join(cachedir, "bytecode")
+			if not os.path.isdir(bytecodedir):
+				try:
+					os.makedirs(bytecodedir)
+				except OSError:
+					# The directory may have been created by a concurrent process.
+					if not os.path.isdir(bytecodedir):
+						raise
+
+			environment = Environment(loader=loader, bytecode_cache=FileSystemBytecodeCache(bytecodedir), extensions=["jinja2.ext.i18n"])
+
+		environment.install_null_translations()
+		return environment
+
+
+	def precompile(self, target):
+		"""precompile(target:string)
+		Compiles the theme's templates into Python modules that are written to
+		the specified directory, which can then be loaded with Jinja2's
+		ModuleLoader. The modules are compiled into a temporary directory that
+		is then renamed, so that concurrent processes never load a partially
+		compiled theme.
+		"""
+		import os, shutil, tempfile
+
+		parent = os.path.dirname(target)
+		if not os.path.isdir(parent):
+			try:
+				os.makedirs(parent)
+			except OSError:
+				if not os.path.isdir(parent):
+					raise
+
+		temporary = tempfile.mkdtemp(dir=parent, prefix=".tmp")
+		try:
+			self.getenvironment().compile_templates(temporary, zip=None, ignore_errors=False, py_compile=True)
+			os.rename(temporary, target)
+		except OSError:
+			# Another process has already precompiled the templates.
+			if not os.path.isdir(target):
+				raise
+		finally:
+			if os.path.isdir(temporary):
+				shutil.rmtree(temporary)
 
 
 	def getasset(self, name):
@@ -103,9 +176,129 @@ class Theme:
 
 		return css, js
 
+	def exportasset(self, name, directory):
+		"""exportasset(name:string, directory:string)
+		Writes the assets contained in the bundle with the specified name to the
+		specified directory, and returns the (css, js) filenames. Each file is
+		named after a digest of its content, e.g. asset.bundle.core.<digest>.js,
+		which means it never changes and can be cached indefinitely by clients.
+		An empty asset is not written, in which case its filename is None.
+		"""
+		import os, hashlib, tempfile
+
+		# Exported bundles are remembered per directory, but written again if
+		# they were removed, e.g. while the builder is watching projects.
+		exported = self.exported.get((name, directory))
+		if exported is None or not all(os.path.isfile(os.path.join(directory, f)) for f in exported if f is not None):
+			filenames = []
+			for extension, content in zip(["css", "js"], self.getasset(name)):
+				if len(content) < 1:
+					filenames.append(None)
+					continue
+
+				filename = "asset.bundle.{0}.{1}.{2}".format(name, hashlib.sha1(content).hexdigest()[:16], extension)
+				filepath = os.path.join(directory, filename)
+				if not os.path.isfile(filepath):
+					if not os.path.isdir(directory):
+						os.makedirs(directory)
+
+					# The file is renamed into place so that concurrent processes
+					# never read a partially written asset.
+					descriptor, temppath = tempfile.mkstemp(dir=directory, prefix=".tmp")
+					with os.fdopen(descriptor, "wb") as file:
+						file.write(content)
+					os.chmod(temppath, 0644)
+					os.rename(temppath, filepath)
+
+				filenames.append(filename)
+
+			exported = self.exported[(name, directory)] = tuple(filenames)
+
+		return exported
+
+
+	def getdigest(self):
+		"""getdigest()
+		Returns a digest of the theme's templates, asset bundles and message
+		catalogs, which changes whenever any of these files is modified, added
+		or removed.
+		"""
+		if self.digest is None:
+			import os
+
+			filepaths = []
+			for directory in [os.path.join(self.path, "templates"), os.path.join(self.path, "assets", "bundles"), os.path.join(self.path, "locales")]:
+				filepaths.extend(Theme.listfiles(directory))
+
+			self.digest = Manifest.getdigest(filepaths, self.path)
+
+		return self.digest
+
+
+	def isvariable(self, name):
+		"""isvariable(name:string)
+		Returns true if any of the theme's templates refers to the context
+		variable with the specified name, false otherwise. The templates are
+		parsed, so that a name in a comment, in a longer identifier, or that of
+		a variable the templates set themselves, is not a reference.
+		"""
+		import os
+		from jinja2 import Environment, meta
+
+		environment = Environment(extensions=["jinja2.ext.i18n"])
+		for filepath in Theme.listfiles(os.path.join(self.path, "templates")):
+			with open(filepath, "r") as file:
+				source = file.read()
+			try:
+				variables = meta.find_undeclared_variables(environment.parse(source.decode("utf-8")))
+			except Exception:
+				# A file that is not a template, e.g. an image, references nothing.
+				continue
+			if name in variables:
+				return True
+
+		return False
+
+
+	@staticmethod
+	def listfiles(directory):
+		"""listfiles(directory:string)
+		Returns the paths to every file in the specified directory and its
+		subdirectories, in a fixed order.
+		"""
+		import os
+
+		filepaths = []
+		for root, dirnames, filenames in os.walk(directory):
+			dirnames.sort()
+			filepaths.extend([os.path.join(root, f) for f in sorted(filenames)])
+
+		return filepaths
+
+
 	@staticmethod
 	def isvalidpath(path):
 		"""isvalidpath(path:string)
 		Returns true if the specified path contains a valid theme, false otherwise.
 		"""
 		return (True, None)
+
+
+class MinifyingLoader(BaseLoader):
+	def __init__(self, loader):
+		"""__init__(loader:BaseLoader)
+		Instantiates a MinifyingLoader object that minifies the markup of the
+		templates returned by the specified loader.
+		"""
+		self.loader = loader
+
+
+	def get_source(self, environment, template):
+		from src.minifier import minifytemplate
+
+		source, filename, uptodate = self.loader.get_source(environment, template)
+		return minifytemplate(source), filename, uptodate
+
+
+	def list_templates(self):
+		return self.loader.list_templates()
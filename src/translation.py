@@ -0,0 +1,178 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os
+
+# The name of the directory, in a theme or project, that contains the message
+# catalogs, i.e. one <locale>.mo or <locale>.po file per locale.
+DIRECTORY = "locales"
+
+# The extensions of message catalog files, in order of preference: compiled
+# catalogs are faster to parse.
+EXTENSIONS = [".mo", ".po"]
+
+# The message whose translation is a catalog's header, as in gettext.
+HEADER = ""
+
+class Translations:
+	catalog = None
+	plural  = None
+
+
+	def __init__(self, catalog=None):
+		"""__init__(catalog:dict)
+		Instantiates a Translations object from the specified catalog, i.e. a
+		dictionary that maps a message to its translation, and a (singular,
+		plural) tuple to the list of its plural forms. A message that is not in
+		the catalog is not translated. The plural form to use for a number is
+		selected by the Plural-Forms field of the catalog's header, if any.
+		"""
+		self.catalog = catalog or {}
+		self.plural  = Translations.getplural(self.catalog.get(HEADER, ""))
+
+
+	def gettext(self, message):
+		"""gettext(message:string)
+		Returns the translation of the specified message.
+		"""
+		return self.catalog.get(message, message)
+
+
+	def ngettext(self, singular, plural, n):
+		"""ngettext(singular:string, plural:string, n:int)
+		Returns the translation of the singular or plural form of the specified
+		message, depending on n.
+		"""
+		forms = self.catalog.get((singular, plural))
+		index = self.plural(n)
+		if forms is None or index >= len(forms):
+			return singular if n == 1 else plural
+		else:
+			return forms[index]
+
+
+	@staticmethod
+	def getplural(header):
+		"""getplural(header:string)
+		Returns a function that maps a number to the index of its plural form,
+		based on the Plural-Forms field of the specified catalog header. If the
+		header has no such field or its expression is invalid, the first form
+		is used when the number is 1 and the second otherwise.
+		"""
+		import gettext, re
+
+		match = re.search(r"^Plural-Forms:.*?\bplural=([^;\n]+)", header, re.IGNORECASE | re.MULTILINE)
+		if match is not None:
+			try:
+				return gettext.c2py(match.group(1).strip())
+			except (ValueError, SyntaxError):
+				pass
+
+		return lambda n: int(n != 1)
+
+
+	def getcontext(self):
+		"""getcontext()
+		Returns the variables that make the translations available to a theme's
+		templates, i.e. the gettext and ngettext functions used by Jinja2's i18n
+		extension, as well as the '_' alias of gettext.
+		"""
+		return {
+			"gettext":self.gettext,
+			"ngettext":self.ngettext,
+			"_":self.gettext
+		}
+
+
+# The catalogs loaded by the current process, indexed by file path. Each entry
+# is a (size, mtime, catalog) tuple, so that a catalog shared by many projects,
+# such as a theme's, is only loaded once.
+_catalogs = {}
+
+
+def gettranslations(locale, directories):
+	"""gettranslations(locale:string, directories:list)
+	Returns the Translations object for the specified locale, which merges the
+	catalogs for that locale found in the specified directories. A message in
+	a catalog overrides the same message in the catalogs of the preceding
+	directories, e.g. a project's catalog overrides its theme's.
+	"""
+	catalog = {}
+	for directory in directories:
+		filepath = getcatalogpath(directory, locale)
+		if filepath is not None:
+			catalog.update(getcatalog(filepath))
+
+	return Translations(catalog)
+
+
+def getcatalogpath(directory, locale):
+	"""getcatalogpath(directory:string, locale:string)
+	Returns the path to the catalog for the specified locale in the specified
+	directory, or None if it does not contain one.
+	"""
+	for extension in EXTENSIONS:
+		filepath = os.path.join(directory, locale + extension)
+		if os.path.isfile(filepath):
+			return filepath
+
+	return None
+
+
+def getcatalog(filepath):
+	"""getcatalog(filepath:string)
+	Returns the catalog stored in the file located at the specified path. The
+	catalog is parsed through the configuration cache, and is kept in memory
+	for as long as the file is unchanged.
+	"""
+	from src import configuration
+
+	stat = os.stat(filepath)
+	entry = _catalogs.get(filepath)
+	if entry is None or entry[0] != stat.st_size or entry[1] != stat.st_mtime:
+		entry = _catalogs[filepath] = (stat.st_size, stat.st_mtime, configuration.load(filepath))
+
+	return entry[2]
+
+
+def iscatalog(filename):
+	"""iscatalog(filename:string)
+	Returns true if the specified file name is that of a message catalog,
+	false otherwise.
+	"""
+	return os.path.splitext(filename)[1] in EXTENSIONS
+
+
+def parsecatalog(entries):
+	"""parsecatalog(entries:polib._BaseFile)
+	Returns the catalog that contains the specified entries, as parsed by polib.
+	Untranslated, fuzzy and obsolete entries are ignored. The catalog's header
+	is stored as the translation of the empty message (see HEADER).
+	"""
+	catalog = {}
+	if entries.metadata:
+		catalog[HEADER] = u"".join(u"{}: {}\n".format(k, v) for k, v in entries.metadata.iteritems())
+
+	for entry in entries:
+		if entry.obsolete or "fuzzy" in entry.flags or not entry.msgid:
+			continue
+		elif entry.msgid_plural:
+			forms = [entry.msgstr_plural[i] for i in sorted(entry.msgstr_plural)]
+			if all(forms):
+				catalog[(entry.msgid, entry.msgid_plural)] = forms
+		elif entry.msgstr:
+			catalog[entry.msgid] = entry.msgstr
+
+	return catalog
@@ -16,9 +16,8 @@
 import os
 from src.questionnaire import Questionnaire
 
-class Tutorial:
-	entries = None
-	serialized = None
+class Tutorial(object):
+	__slots__ = ("entries", "serialized")
 
 
 	def __init__(self, configuration):
@@ -29,6 +28,7 @@ class Tutorial:
 			raise Exception("Error! The configuration object does not contain a valid tutorial.")
 
 		self.entries = configuration
+		self.serialized = None
 
 
 	def __len__(self):
@@ -53,7 +53,11 @@ class Tutorial:
 
 	@staticmethod
 	def isvalid(tutorial):
-		"""iswhy(tutorial:dict)
-		Returns true if the specified tutorial is valid, false otherwise.
+		"""isvalid(tutorial:list)
+		Returns true if the specified tutorial configuration is valid, false
+		otherwise. Every error is included in the returned message.
 		"""
-		return (True, None)
+		from src import schema
+
+		errors = schema.validate("tutorial", tutorial)
+		return (True, None) if len(errors) < 1 else (False, "\n".join(errors))
@@ -0,0 +1,274 @@
+# This module is part of the GeoTag-X project builder.
+# Copyright (C) 2015 UNITAR.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os, time
+
+class InotifyWatcher:
+	# Event masks, as defined in <sys/inotify.h>.
+	IN_MODIFY      = 0x00000002
+	IN_ATTRIB      = 0x00000004
+	IN_CLOSE_WRITE = 0x00000008
+	IN_MOVED_FROM  = 0x00000040
+	IN_MOVED_TO    = 0x00000080
+	IN_CREATE      = 0x00000100
+	IN_DELETE      = 0x00000200
+	IN_Q_OVERFLOW  = 0x00004000
+	IN_ISDIR       = 0x40000000
+	MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+	libc = None
+	descriptor = None
+	directories = None
+	recursive = None
+
+
+	def __init__(self, directories):
+		"""__init__(directories:list)
+		Instantiates an InotifyWatcher object that watches the files in the
+		specified (directory, recursive) pairs. Raises an OSError if inotify is
+		not supported by the system.
+		"""
+		import ctypes, ctypes.util
+
+		self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+		if not hasattr(self.libc, "inotify_init"):
+			raise OSError("Error! inotify is not supported by this system.")
+
+		self.descriptor = self.libc.inotify_init()
+		if self.descriptor < 0:
+			raise OSError(ctypes.get_errno(), "Error! Could not initialize inotify.")
+
+		self.directories = {}
+		self.recursive = set()
+		for directory, recursive in directories:
+			self.add(directory, recursive)
+
+
+	def add(self, directory, recursive=False):
+		"""add(directory:string, recursive:bool)
+		Watches the files in the specified directory and, if the recursive flag
+		is set, its subdirectories. Directories that do not exist are ignored.
+		"""
+		if not os.path.isdir(directory):
+			return
+
+		descriptor = self.libc.inotify_add_watch(self.descriptor, directory, InotifyWatcher.MASK)
+		if descriptor >= 0:
+			self.directories[descriptor] = directory
+			if recursive:
+				self.recursive.add(directory)
+				for name in os.listdir(directory):
+					self.add(os.path.join(directory, name), True)
+
+
+	def read(self, timeout=None):
+		"""read(timeout:float)
+		Waits at most timeout seconds (or indefinitely if the timeout is None)
+		for files to change, and returns the set of paths to the changed files.
+		"""
+		import select, struct
+
+		ready, _, _ = select.select([self.descriptor], [], [], timeout)
+		if not ready:
+			return set()
+
+		changes = set()
+		data = os.read(self.descriptor, 65536)
+		offset = 0
+		while offset + 16 <= len(data):
+			descriptor, mask, _, length = struct.unpack_from("iIII", data, offset)
+			name = data[offset + 16:offset + 16 + length].rstrip("\0")
+			offset += 16 + length
+
+			directory = self.directories.get(descriptor)
+			if mask & InotifyWatcher.IN_Q_OVERFLOW:
+				# Events were lost, so assume every watched directory changed.
+				changes.update(self.directories.values())
+			elif directory is not None and len(name) > 0:
+				path = os.path.join(directory, name)
+				if mask & InotifyWatcher.IN_ISDIR:
+					if mask & (InotifyWatcher.IN_CREATE | InotifyWatcher.IN_MOVED_TO) and directory in self.recursive:
+						self.add(path, True)
+				changes.add(path)
+
+		return changes
+
+
+	def close(self):
+		"""close()
+		Stops watching files.
+		"""
+		if self.descriptor is not None:
+			os.close(self.descriptor)
+			self.descriptor = None
+
+
+class PollingWatcher:
+	directories = None
+	interval = None
+	snapshot = None
+
+
+	def __init__(self, directories, interval=0.5):
+		"""__init__(directories:list, interval:float)
+		Instantiates a PollingWatcher object that checks the files in the
+		specified (directory, recursive) pairs for changes every interval
+		seconds.
+		"""
+		self.directories = list(directories)
+		self.interval = interval
+		self.snapshot = self.getsnapshot()
+
+
+	def read(self, timeout=None):
+		"""read(timeout:float)
+		Waits at most timeout seconds (or indefinitely if the timeout is None)
+		for files to change, and returns the set of paths to the changed files.
+		"""
+		deadline = None if timeout is None else time.time() + timeout
+		while True:
+			snapshot = self.getsnapshot()
+			changes = set([p for p in set(snapshot) | set(self.snapshot) if snapshot.get(p) != self.snapshot.get(p)])
+			self.snapshot = snapshot
+			if len(changes) > 0:
+				return changes
+
+			remaining = self.interval if deadline is None else min(self.interval, deadline - time.time())
+			if remaining <= 0:
+				return set()
+
+			time.sleep(remaining)
+
+
+	def add(self, directory, recursive=False):
+		"""add(directory:string, recursive:bool)
+		Watches the files in the specified directory and, if the recursive flag
+		is set, its subdirectories.
+		"""
+		if (directory, recursive) not in self.directories:
+			self.directories.append((directory, recursive))
+
+
+	def getsnapshot(self):
+		"""getsnapshot()
+		Returns a dictionary that maps each watched file to its modification
+		time and size.
+		"""
+		snapshot = {}
+		for directory, recursive in self.directories:
+			for root, dirnames, filenames in os.walk(directory):
+				for filepath in [os.path.join(root, f) for f in filenames]:
+					try:
+						stat = os.stat(filepath)
+						snapshot[filepath] = (stat.st_mtime, stat.st_size)
+					except OSError:
+						pass
+				if not recursive:
+					break
+
+		return snapshot
+
+
+	def close(self):
+		"""close()
+		Stops watching files.
+		"""
+		pass
+
+
+def getwatcher(directories):
+	"""getwatcher(directories:list)
+	Returns a watcher for the specified (directory, recursive) pairs. An
+	InotifyWatcher is returned if inotify is supported by the system,
+	otherwise a PollingWatcher is returned.
+	"""
+	try:
+		return InotifyWatcher(directories)
+	except (OSError, AttributeError):
+		return PollingWatcher(directories)
+
+
+def watch(paths, themepath, factory, args, debounce=0.1):
+	"""watch(paths:list, themepath:string, factory:callable, args:tuple, debounce:float)
+	Watches the projects located at the specified paths, as well as the theme
+	located at the specified path, and rebuilds a project as soon as one of
+	its input files changes, or every project if the theme changes. The
+	builder is created by calling factory(*args) and is kept for as long as
+	the theme is unchanged. Bursts of changes are grouped together: a rebuild
+	only starts once no change has been detected for debounce seconds. This
+	function only returns when interrupted.
+	"""
+	from src.manifest import Manifest
+
+	paths = sorted(set([os.path.realpath(p) for p in paths]))
+	themepath = os.path.realpath(themepath)
+	directories = [(os.path.join(themepath, d), True) for d in ["templates", "assets", "locales"]]
+	for path in paths:
+		directories.extend([(path, False), (os.path.join(path, "help"), False), (os.path.join(path, "locales"), False)])
+
+	builder, message = _getbuilder(factory, args)
+	if message is not None:
+		print message
+
+	watcher = getwatcher(directories)
+	try:
+		while True:
+			changes = watcher.read(None)
+			while True:
+				more = watcher.read(debounce)
+				if len(more) < 1:
+					break
+				changes.update(more)
+
+			# Find the projects affected by the changes.
+			affected = set()
+			themechanged = any(c.startswith(themepath + os.sep) for c in changes)
+			if themechanged:
+				builder, message = _getbuilder(factory, args)
+				if message is not None:
+					print message
+				affected.update(paths)
+			else:
+				for change in changes:
+					for path in paths:
+						if change.startswith(path + os.sep) and Manifest.isinput(os.path.relpath(change, path)):
+							affected.add(path)
+						elif change in [os.path.join(path, "help"), os.path.join(path, "locales")]:
+							# The help or locales directory was created, removed or renamed.
+							watcher.add(change)
+							affected.add(path)
+
+			if builder is not None:
+				for path in sorted(affected):
+					start = time.time()
+					try:
+						status, message, _, _, _ = builder(path)
+						print "{0:<10}{1} ({2:.0f} ms){3}".format(status.upper(), path, (time.time() - start) * 1000, "" if message is None else ": " + message)
+					except Exception as e:
+						print "{0:<10}{1}: {2}".format("FAILED", path, e)
+	finally:
+		watcher.close()
+
+
+def _getbuilder(factory, args):
+	"""_getbuilder(factory:callable, args:tuple)
+	Returns a (builder, message) tuple where the builder is created by calling
+	factory(*args). If the builder can not be created, it is None and the
+	message describes the error.
+	"""
+	try:
+		return (factory(*args), None)
+	except Exception as e:
+		return (None, "Error! Could not load the theme: {}".format(e))